@@ -3,7 +3,6 @@ Interactive help system loader.
 """
 
 import re
-import webbrowser
 
 import sublime
 from sublime_plugin import WindowCommand, TextCommand
@@ -152,7 +151,7 @@ class GsHelpGotoLink(TextCommand):
 
     @staticmethod
     def goto_url(dest):
-        webbrowser.open(dest)
+        util.open_in_browser(dest)
 
     def goto_help_page(self, dest):
         page, anchor = dest.split("#", 1) if "#" in dest else (dest, None)
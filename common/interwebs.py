@@ -1,16 +1,36 @@
 """
 A simple HTTP interface for making GET, PUT and POST requests.
+
+Connections are kept alive and reused for later requests to the same host.
+Responses to GET requests carrying an `ETag` or `Last-Modified` header are
+cached, and requested again conditionally; a `304 Not Modified` answer is
+served from the cache.
 """
 
-import http.client
 import json
-from urllib.parse import urlparse, urlencode, quote  # NOQA
+import threading
+from urllib.parse import urlparse, urlencode, parse_qsl, quote  # NOQA
 from base64 import b64encode
 from functools import partial
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 
 Response = namedtuple("Response", ("payload", "headers", "status", "is_json"))
 
+# Idle connections kept per host.
+MAX_IDLE_CONNECTIONS = 4
+RESPONSE_CACHE_SIZE = 128
+# Requests which may be sent again if a kept-alive connection turns out to
+# be closed.
+RETRY_VERBS = ("GET", "PUT")
+
+# (https, host, port) -> idle connections, most recently used last
+idle_connections = {}
+idle_connections_lock = threading.Lock()
+
+# request key -> (etag, last modified, Response)
+response_cache = OrderedDict()
+response_cache_lock = threading.Lock()
+
 
 def request(verb, host, port, path, payload=None, https=False, headers=None, auth=None, redirect=True):
     """
@@ -27,23 +47,39 @@ def request(verb, host, port, path, payload=None, https=False, headers=None, aut
         username_password = "{}:{}".format(*auth).encode("ascii")
         headers["Authorization"] = "Basic {}".format(b64encode(username_password).decode("ascii"))
 
-    connection = (http.client.HTTPSConnection(host, port)
-                  if https
-                  else http.client.HTTPConnection(host, port))
-    connection.request(verb, path, body=payload, headers=headers)
+    # The headers identify the user, so that cached responses are not
+    # shared between different credentials.
+    cache_key = (https, host, port, path, tuple(sorted(headers.items())))
+    cached = get_cached_response(cache_key) if verb == "GET" else None
+
+    request_headers = dict(headers, **{"Accept-Encoding": "gzip"})
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            request_headers["If-None-Match"] = etag
+        if last_modified:
+            request_headers["If-Modified-Since"] = last_modified
 
-    response = connection.getresponse()
-    response_payload = response.read()
+    response, response_payload = send_request((https, host, port), verb, path, payload, request_headers)
     response_headers = dict(response.getheaders())
     status = response.status
 
-    is_json = "application/json" in response_headers["Content-Type"]
+    if status == 304 and cached:
+        cached_response = cached[2]
+        # Keep the latest rate limit headers and the like.
+        headers_with_updates = dict(cached_response.headers)
+        headers_with_updates.update(response_headers)
+        return cached_response._replace(headers=headers_with_updates)
+
+    if response.getheader("Content-Encoding", "").lower() == "gzip":
+        import gzip
+        response_payload = gzip.decompress(response_payload)
+        del response_headers[_find_header_name(response_headers, "Content-Encoding")]
+
+    is_json = "application/json" in response.getheader("Content-Type", "")
     if is_json:
         response_payload = json.loads(response_payload.decode("utf-8"))
 
-    response.close()
-    connection.close()
-
     if redirect and verb == "GET" and status == 301 or status == 302:
         return request_url(
             verb,
@@ -52,7 +88,114 @@ def request(verb, host, port, path, payload=None, https=False, headers=None, aut
             auth=auth
         )
 
-    return Response(response_payload, response_headers, status, is_json)
+    result = Response(response_payload, response_headers, status, is_json)
+    etag = response.getheader("ETag")
+    last_modified = response.getheader("Last-Modified")
+    if verb == "GET" and status == 200 and (etag or last_modified):
+        cache_response(cache_key, (etag, last_modified, result))
+
+    return result
+
+
+def _find_header_name(headers, name):
+    return next((key for key in headers if key.lower() == name.lower()), None)
+
+
+def get_header(headers, name, default=None):
+    """
+    Return the value of a header of a `Response`, regardless of the case
+    the server wrote its name in.
+    """
+    key = _find_header_name(headers, name)
+    return default if key is None else headers[key]
+
+
+def send_request(connection_key, verb, path, payload, headers):
+    """
+    Send a request over an idle connection to the host, or a new one, and
+    return the response and its payload.  A reused connection may have been
+    closed by the server in the meantime; in that case the request is sent
+    once more over a new connection.  Other requests always use a new one.
+    """
+    import http.client
+    connection = take_idle_connection(connection_key) if verb in RETRY_VERBS else None
+    if connection:
+        try:
+            return _send_request(connection_key, connection, verb, path, payload, headers)
+        except (http.client.HTTPException, OSError):
+            connection.close()
+
+    return _send_request(connection_key, new_connection(connection_key), verb, path, payload, headers)
+
+
+def _send_request(connection_key, connection, verb, path, payload, headers):
+    try:
+        connection.request(verb, path, body=payload, headers=headers)
+        response = connection.getresponse()
+        response_payload = response.read()
+    except Exception:
+        connection.close()
+        raise
+
+    if response.will_close:
+        connection.close()
+    else:
+        release_connection(connection_key, connection)
+    return response, response_payload
+
+
+def new_connection(connection_key):
+    import http.client
+    https, host, port = connection_key
+    return (http.client.HTTPSConnection(host, port)
+            if https
+            else http.client.HTTPConnection(host, port))
+
+
+def take_idle_connection(connection_key):
+    with idle_connections_lock:
+        connections = idle_connections.get(connection_key)
+        return connections.pop() if connections else None
+
+
+def release_connection(connection_key, connection):
+    with idle_connections_lock:
+        connections = idle_connections.setdefault(connection_key, [])
+        connections.append(connection)
+        if len(connections) > MAX_IDLE_CONNECTIONS:
+            connections.pop(0).close()
+
+
+def close_connections():
+    """
+    Close all idle connections.
+    """
+    with idle_connections_lock:
+        for connections in idle_connections.values():
+            for connection in connections:
+                connection.close()
+        idle_connections.clear()
+
+
+def get_cached_response(cache_key):
+    with response_cache_lock:
+        cached = response_cache.get(cache_key)
+        if cached:
+            response_cache.move_to_end(cache_key)
+        return cached
+
+
+def cache_response(cache_key, entry):
+    with response_cache_lock:
+        response_cache[cache_key] = entry
+        response_cache.move_to_end(cache_key)
+        while len(response_cache) > RESPONSE_CACHE_SIZE:
+            response_cache.popitem(last=False)
+
+
+def clear_cache():
+    with response_cache_lock:
+        response_cache.clear()
 
 
 def request_url(verb, url, payload=None, headers=None, auth=None):
@@ -61,8 +204,8 @@ def request_url(verb, url, payload=None, headers=None, auth=None):
     return request(
         verb,
         parsed.hostname,
-        parsed.port or 443 if https else 80,
-        parsed.path,
+        parsed.port or (443 if https else 80),
+        parsed.path + ("?" + parsed.query if parsed.query else ""),
         payload=payload,
         https=https,
         headers=headers,
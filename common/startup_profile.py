@@ -0,0 +1,92 @@
+"""
+Measure how long importing each module takes while GitSavvy is loaded.
+This module must not import any other GitSavvy module, so that it can be
+imported before them.
+"""
+
+import builtins
+import sys
+import time
+from contextlib import contextmanager
+
+
+# (module name, seconds including its own imports, seconds excluding them),
+# for every module first imported while profiling, in the order they
+# finished importing.
+import_times = []
+load_time = None
+
+
+def _resolve_name(name, globals, level):
+    if not level:
+        return name
+    package = (globals or {}).get("__package__")
+    if package is None:
+        package = (globals or {}).get("__name__", "").rpartition(".")[0]
+    base = package.rsplit(".", level - 1)[0]
+    return "{}.{}".format(base, name) if name else base
+
+
+@contextmanager
+def profile_imports():
+    """
+    Record the import time of every module imported within the block into
+    `import_times`, and the time spent in the block into `load_time`.
+    """
+    global load_time
+    original_import = builtins.__import__
+    # Time spent in nested imports, for each import in progress.
+    nested = []
+
+    def timed_import(module_name, name, import_args):
+        nested.append(0)
+        start = time.perf_counter()
+        try:
+            return original_import(*import_args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self_time = elapsed - nested.pop()
+            if nested:
+                nested[-1] += elapsed
+            if module_name in sys.modules:
+                import_times.append((module_name, elapsed, self_time))
+
+    def profiling_import(name, globals=None, locals=None, fromlist=(), level=0):
+        import_args = (name, globals, locals, fromlist, level)
+        try:
+            module_name = _resolve_name(name, globals, level)
+        except (AttributeError, TypeError):
+            return original_import(*import_args)
+
+        if module_name not in sys.modules:
+            return timed_import(module_name, name, import_args)
+
+        # `from package import module` imports the submodules itself,
+        # without calling `__import__`; import them one by one to time them.
+        module = sys.modules[module_name]
+        for from_name in fromlist or ():
+            submodule_name = "{}.{}".format(module_name, from_name)
+            if (from_name != "*" and not hasattr(module, from_name) and
+                    submodule_name not in sys.modules):
+                try:
+                    timed_import(submodule_name, submodule_name, (submodule_name, ))
+                except ImportError:
+                    # Not a module; let the actual import raise if needed.
+                    pass
+        return original_import(*import_args)
+
+    builtins.__import__ = profiling_import
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        load_time = time.perf_counter() - start
+        builtins.__import__ = original_import
+
+
+def get_slowest_imports(count=20):
+    """
+    Return the `count` modules which took the longest to import, excluding
+    the time spent importing other modules, slowest first.
+    """
+    return sorted(import_times, key=lambda entry: entry[2], reverse=True)[:count]
@@ -5,7 +5,6 @@ to a view.
 """
 
 import os
-from xml.etree import ElementTree
 import json
 from collections import OrderedDict
 
@@ -76,15 +75,34 @@ class ThemeGenerator():
         """
         pass
 
-    def write_new_theme(self, name):
+    def get_theme_contents(self):
         """
-        Write the new theme on disk.
+        Return the transformed theme, encoded for writing to disk.
         """
         pass
 
+    def write_new_theme(self, name):
+        """
+        Write the new theme on disk, unless the file already has the same
+        contents.  Every write makes Sublime rescan its resources.
+        """
+        full_path = os.path.join(sublime.packages_path(), self.get_theme_path(name))
+        contents = self.get_theme_contents()
+
+        try:
+            with open(full_path, "rb") as in_f:
+                if in_f.read() == contents:
+                    return
+        except OSError:
+            pass
+
+        with util.file.safe_open(full_path, "wb", buffering=0) as out_f:
+            out_f.write(contents)
+
     def apply_new_theme(self, name, target_view):
         """
-        Apply the transformed theme to the specified target view.
+        Apply the transformed theme to the specified target view, and return
+        its resource path.
         """
 
         self.write_new_theme(name)
@@ -94,6 +112,7 @@ class ThemeGenerator():
         # Sublime expects `/`-delimited paths, even in Windows.
         theme_path = os.path.join("Packages", path_in_packages).replace("\\", "/")
         target_view.settings().set("color_scheme", theme_path)
+        return theme_path
 
 
 class XMLThemeGenerator(ThemeGenerator):
@@ -105,20 +124,19 @@ class XMLThemeGenerator(ThemeGenerator):
 
     def __init__(self, original_color_scheme):
         super().__init__(original_color_scheme)
+        from xml.etree import ElementTree
         self.plist = ElementTree.XML(self.color_scheme_string)
         self.styles = self.plist.find("./dict/array")
 
     def add_scoped_style(self, name, scope, **kwargs):
         properties = "".join(PROPERTY_TEMPLATE.format(key=k, value=v) for k, v in kwargs.items())
         new_style = STYLE_TEMPLATE.format(name=name, scope=scope, properties=properties)
+        from xml.etree import ElementTree
         self.styles.append(ElementTree.XML(new_style))
 
-    def write_new_theme(self, name):
-        full_path = os.path.join(sublime.packages_path(), self.get_theme_path(name))
-
-        with util.file.safe_open(full_path, "wb", buffering=0) as out_f:
-            out_f.write(STYLES_HEADER.encode("utf-8"))
-            out_f.write(ElementTree.tostring(self.plist, encoding="utf-8"))
+    def get_theme_contents(self):
+        from xml.etree import ElementTree
+        return STYLES_HEADER.encode("utf-8") + ElementTree.tostring(self.plist, encoding="utf-8")
 
 
 class JSONThemeGenerator(ThemeGenerator):
@@ -138,8 +156,5 @@ class JSONThemeGenerator(ThemeGenerator):
             new_rule[k] = v
         self.dict["rules"].insert(0, new_rule)
 
-    def write_new_theme(self, name):
-        full_path = os.path.join(sublime.packages_path(), self.get_theme_path(name))
-
-        with util.file.safe_open(full_path, "wb", buffering=0) as out_f:
-            out_f.write(json.dumps(self.dict, indent=4).encode("utf-8"))
+    def get_theme_contents(self):
+        return json.dumps(self.dict, indent=4).encode("utf-8")
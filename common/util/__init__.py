@@ -1,6 +1,7 @@
 import sys
 
 from .parse_diff import parse_diff
+from .parse_blame import parse_blame
 from . import dates
 from . import view
 from . import file
@@ -9,5 +10,15 @@ from . import actions
 from . import debug
 from . import diff_string
 from . import reload
+from . import debounce
+from . import cache
+from . import graph_layout
+from . import collapsed_diff
 
 super_key = "SUPER" if sys.platform == "darwin" else "CTRL"
+
+
+def open_in_browser(url):
+    # `webbrowser` searches for the installed browsers when it is imported.
+    import webbrowser
+    webbrowser.open(url)
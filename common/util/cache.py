@@ -0,0 +1,78 @@
+"""
+Helpers for data GitSavvy persists between sessions in Sublime's cache
+directory.
+"""
+
+import hashlib
+import json
+import os
+
+import sublime
+
+
+def cache_dir(*parts):
+    """
+    Return (and create) a directory below `<cache_path>/GitSavvy`.
+    """
+    path = os.path.join(sublime.cache_path(), "GitSavvy", *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def repo_key(repo_path):
+    """
+    Return a file name safe key identifying the repository at `repo_path`.
+    """
+    return hashlib.sha1(os.path.normcase(repo_path).encode("utf-8")).hexdigest()
+
+
+def read_json_lines(path):
+    """
+    Yield the decoded records of a JSON lines file.  A missing file yields
+    nothing; a truncated trailing record (e.g. after a crash) is skipped.
+    """
+    try:
+        f = open(path, encoding="utf-8")
+    except FileNotFoundError:
+        return
+
+    with f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def append_json_lines(path, records, mode="a"):
+    with open(path, mode, encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+
+
+def write_json_lines(path, records):
+    """
+    Atomically replace the JSON lines file at `path`.
+    """
+    tmp_path = path + ".tmp"
+    append_json_lines(tmp_path, records, mode="w")
+    os.replace(tmp_path, path)
+
+
+def write_json(path, data):
+    """
+    Atomically replace the JSON file at `path`.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def read_json(path, default=None):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
@@ -0,0 +1,97 @@
+"""
+Render diffs too large to be shown at once: every file is listed with a
+one-line summary from `git diff --numstat`, and only the patches of the
+files the user expanded are included.  Summary lines never start with
+`diff`, `@@` or `+++`, so they are not mistaken for parts of a patch.
+"""
+
+from collections import namedtuple
+import re
+
+
+COLLAPSED_MARKER = "▸"
+EXPANDED_MARKER = "▾"
+FILE_SUMMARY = "^[{}{}] ".format(COLLAPSED_MARKER, EXPANDED_MARKER)
+re_file_summary = re.compile(FILE_SUMMARY)
+
+# `added` and `deleted` are None for binary files; `old_path` is None
+# unless the file was renamed.
+FileStat = namedtuple("FileStat", ("path", "old_path", "added", "deleted"))
+
+
+def parse_numstat(numstat_output):
+    """
+    Parse the output of `git diff --numstat -z` into `FileStat`s.
+    """
+    stats = []
+    fields = iter(numstat_output.split("\0"))
+    for field in fields:
+        if not field:
+            continue
+        added, deleted, path = field.split("\t", 2)
+        old_path = None
+        if not path:
+            # Renames and copies are followed by the old and the new path.
+            old_path, path = next(fields), next(fields)
+        stats.append(FileStat(
+            path, old_path,
+            None if added == "-" else int(added),
+            None if deleted == "-" else int(deleted)))
+    return stats
+
+
+def changed_lines(stats):
+    return sum((stat.added or 0) + (stat.deleted or 0) for stat in stats)
+
+
+def format_changes(stat):
+    if stat.added is None:
+        return "binary"
+    return "+{} -{}".format(stat.added, stat.deleted)
+
+
+def format_diffstat(stats):
+    """
+    Return a summary of all files in the style of `git diff --stat`.
+    """
+    if not stats:
+        return ""
+    names = [
+        "{} => {}".format(stat.old_path, stat.path) if stat.old_path else stat.path
+        for stat in stats]
+    width = max(len(name) for name in names)
+    lines = [
+        " {} | {}\n".format(name.ljust(width), format_changes(stat))
+        for name, stat in zip(names, stats)]
+    lines.append(" {} files changed, {} lines changed\n".format(len(stats), changed_lines(stats)))
+    return "".join(lines)
+
+
+def file_summary(stat, expanded):
+    """
+    Return the line standing for a file, followed by its patch if it is
+    `expanded`.
+    """
+    return "{} {}{} ({})\n".format(
+        EXPANDED_MARKER if expanded else COLLAPSED_MARKER,
+        stat.old_path + " → " if stat.old_path else "",
+        stat.path,
+        format_changes(stat))
+
+
+def render_collapsed_diff(stats, expanded, show_diffstat, get_patch):
+    """
+    Return the text of a collapsed diff: a summary line for every file, each
+    followed by its patch, as returned by `get_patch(stat)`, if its path is
+    in `expanded`.  The diffstat of all files comes first if `show_diffstat`
+    is set.
+    """
+    parts = []
+    if show_diffstat:
+        parts.append(format_diffstat(stats) + "\n")
+    for stat in stats:
+        is_expanded = stat.path in expanded
+        parts.append(file_summary(stat, is_expanded))
+        if is_expanded:
+            parts.append(get_patch(stat))
+    return "".join(parts)
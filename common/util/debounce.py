@@ -0,0 +1,44 @@
+"""
+Coalesce bursts of events (keystrokes, highlights, scrolling) into a
+single delayed call.
+"""
+
+import threading
+
+import sublime
+
+
+_tokens = {}
+_lock = threading.Lock()
+
+
+def debounce(key, delay, callback):
+    """
+    Run `callback` on the async thread after `delay` milliseconds, unless
+    `debounce` is called again with the same `key` in the meantime.  Only
+    the last call for a given key is ever executed.
+    """
+    with _lock:
+        token = _tokens[key] = _tokens.get(key, 0) + 1
+
+    def fire():
+        with _lock:
+            if _tokens.get(key) != token:
+                return
+            del _tokens[key]
+        callback()
+
+    sublime.set_timeout_async(fire, delay)
+
+
+def cancel(key):
+    """
+    Drop the pending call for `key`, if any.
+    """
+    with _lock:
+        _tokens.pop(key, None)
+
+
+def is_pending(key):
+    with _lock:
+        return key in _tokens
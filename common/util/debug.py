@@ -7,6 +7,9 @@ from contextlib import contextmanager
 from ...core.settings import GitSavvySettings
 
 _log = []
+# Messages recorded when the plugin is loaded, before logging can be
+# started; they are included in every log.
+_startup_log = []
 enabled = False
 ENCODING_NOT_UTF8 = "{} was sent as binaries and we dont know the encoding, not utf-8"
 
@@ -14,7 +17,7 @@ ENCODING_NOT_UTF8 = "{} was sent as binaries and we dont know the encoding, not
 def start_logging():
     global _log
     global enabled
-    _log = []
+    _log = list(_startup_log)
     enabled = True
 
 
@@ -42,6 +45,11 @@ def add_to_log(obj):
         _log.append(obj)
 
 
+def log_startup(message):
+    _startup_log.append(message)
+    add_to_log(message)
+
+
 def make_log_message(_type, **kwargs):
     """
     Create a log message dictionary to be stored in JSON formatted debug log
@@ -54,6 +62,8 @@ def make_log_message(_type, **kwargs):
 
 def log_git(command, stdin, stdout, stderr, seconds):
     """ Add git command details to debug log """
+    if not enabled:
+        return
     message = make_log_message(
         'git', command=command, stdin=stdin, stdout=stdout, stderr=stderr,
         seconds=seconds
@@ -75,7 +85,7 @@ def log_process(command, cwd, env, startupinfo):
 
 def try_to_decode(message, name):
     try:
-        return message.decode(),
+        return message.decode()
     except UnicodeDecodeError:
         return ENCODING_NOT_UTF8.format(name)
 
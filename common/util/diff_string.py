@@ -1,5 +1,4 @@
 import re
-from difflib import SequenceMatcher
 from collections import namedtuple
 
 Change = namedtuple("Change", (
@@ -33,6 +32,7 @@ def get_changes(old, new):
     old_indices = get_indices(old_chunks)
     new_indices = get_indices(new_chunks)
 
+    from difflib import SequenceMatcher
     matcher = SequenceMatcher(a=old_chunks, b=new_chunks, autojunk=False)
 
     if matcher.quick_ratio() < 0.85:
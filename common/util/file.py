@@ -1,9 +1,20 @@
 import sublime
 import threading
-import yaml
+import hashlib
+import json
 import os
+import re
 from contextlib import contextmanager
 
+from . import cache
+
+
+PLAIN_TEXT_SYNTAX = "Packages/Text/Plain text.tmLanguage"
+SYNTAX_CACHE_FILE = "syntaxes.json"
+
+re_file_extensions = re.compile(r"^file_extensions:[ \t]*(.*)$", re.MULTILINE)
+re_block_item = re.compile(r"^[ \t]*-[ \t]+(.*)$")
+re_comment = re.compile(r"(^|[ \t])#.*$")
 
 if 'syntax_file_map' not in globals():
     syntax_file_map = {}
@@ -13,34 +24,119 @@ if 'determine_syntax_thread' not in globals():
 
 
 def determine_syntax_files():
-    global determine_syntax_thread
+    """
+    Make the extension to syntax map available.  The map of the last
+    session is loaded from the cache right away; a background thread then
+    checks whether the installed syntaxes changed and rebuilds the map if
+    they did.
+    """
+    global determine_syntax_thread, syntax_file_map
     if not syntax_file_map:
+        cached = cache.read_json(os.path.join(cache.cache_dir(), SYNTAX_CACHE_FILE))
+        if cached and "key" in cached and "map" in cached:
+            syntax_file_map = cached["map"]
         determine_syntax_thread = threading.Thread(
-            target=_determine_syntax_files)
+            target=_determine_syntax_files,
+            args=(cached.get("key") if cached else None, ))
         determine_syntax_thread.start()
 
 
-def _determine_syntax_files():
+def _determine_syntax_files(cached_key):
+    global syntax_file_map
     syntax_files = sublime.find_resources("*.sublime-syntax")
+    key = _syntax_files_key(syntax_files)
+    if key == cached_key:
+        return
+
+    new_map = {}
     for syntax_file in syntax_files:
         try:
             # Use `sublime.load_resource`, in case Package is `*.sublime-package`.
             resource = sublime.load_resource(syntax_file)
-            for extension in yaml.load(resource)["file_extensions"]:
-                if extension not in syntax_file_map:
-                    syntax_file_map[extension] = []
-                extension_list = syntax_file_map[extension]
+            for extension in parse_file_extensions(resource):
+                if extension not in new_map:
+                    new_map[extension] = []
+                extension_list = new_map[extension]
                 extension_list.append(syntax_file)
         except Exception:
             continue
 
+    syntax_file_map = new_map
+    try:
+        cache.write_json(os.path.join(cache.cache_dir(), SYNTAX_CACHE_FILE), {
+            "key": key,
+            "map": new_map
+        })
+    except OSError:
+        pass
+
+
+def _syntax_files_key(syntax_files):
+    """
+    Return a key for the given syntax resources, which changes if any of
+    them is added, removed or modified.  The modification time of a
+    resource is the one of its file, or of the `*.sublime-package` it is
+    packed in.
+    """
+    roots = (
+        sublime.packages_path(),
+        sublime.installed_packages_path(),
+        os.path.join(os.path.dirname(sublime.executable_path()), "Packages"),
+    )
+    stamps = []
+    for syntax_file in syntax_files:
+        path_in_packages = syntax_file[len("Packages/"):]
+        package = path_in_packages.split("/", 1)[0]
+        mtime = None
+        for path in (
+                os.path.join(roots[0], path_in_packages),
+                os.path.join(roots[1], package + ".sublime-package"),
+                os.path.join(roots[2], package + ".sublime-package")):
+            try:
+                mtime = os.stat(path).st_mtime
+                break
+            except OSError:
+                continue
+        stamps.append((syntax_file, mtime))
+    return hashlib.sha1(json.dumps(stamps).encode("utf-8")).hexdigest()
+
+
+def parse_file_extensions(syntax_definition):
+    """
+    Return the `file_extensions` of a `.sublime-syntax` file without
+    parsing all of its YAML.  The key is written either as a block list or
+    as a flow list in every syntax seen in the wild; anything else is left
+    to the YAML parser.
+    """
+    match = re_file_extensions.search(syntax_definition)
+    if not match:
+        return []
+
+    value = re_comment.sub("", match.group(1)).strip()
+    if not value:
+        extensions = []
+        for line in syntax_definition[match.end():].split("\n")[1:]:
+            item = re_block_item.match(line)
+            if item:
+                extensions.append(re_comment.sub("", item.group(1)).strip())
+            elif line.strip() and not line.lstrip().startswith("#"):
+                break
+    elif value.startswith("[") and value.endswith("]"):
+        extensions = [item.strip() for item in value[1:-1].split(",") if item.strip()]
+    else:
+        import yaml
+        return yaml.load(syntax_definition)["file_extensions"]
+
+    return [
+        extension[1:-1] if extension[:1] in "'\"" and extension[-1:] == extension[:1] else extension
+        for extension in extensions
+    ]
+
 
 def get_syntax_for_file(filename):
-    if not determine_syntax_thread or determine_syntax_thread.is_alive():
-        return "Packages/Text/Plain text.tmLanguage"
     extension = get_file_extension(filename)
     syntaxes = syntax_file_map.get(filename, None) or syntax_file_map.get(extension, None)
-    return syntaxes[-1] if syntaxes else "Packages/Text/Plain text.tmLanguage"
+    return syntaxes[-1] if syntaxes else PLAIN_TEXT_SYNTAX
 
 
 def get_file_extension(filename):
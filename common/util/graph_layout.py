@@ -0,0 +1,110 @@
+"""
+Lay out a commit graph: assign every commit a column ("lane") and compute
+the lines connecting it to its parents.  Commits are fed one at a time in
+topological order (children before parents), so a layout can be extended
+as the output of `git log --topo-order` is read.  Any window of rows can
+be rendered as ASCII art in the style of `git log --graph`.
+"""
+
+from collections import namedtuple
+
+
+COMMIT_NODE_CHAR = "●"
+
+# `edges` are `(from_column, to_column)` pairs of the lanes leaving the row.
+GraphRow = namedtuple("GraphRow", ("commit_hash", "column", "width", "edges"))
+
+
+class GraphLayout:
+
+    def __init__(self):
+        self.rows = []
+        # The commit each currently open lane is waiting for.
+        self._lanes = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, commit_hash, parents):
+        """
+        Add the next commit (in topological order) and return its `GraphRow`.
+        """
+        lanes = self._lanes
+        try:
+            column = lanes.index(commit_hash)
+        except ValueError:
+            # Nothing pointed to this commit so far, i.e. it is a tip.
+            column = len(lanes)
+            lanes.append(commit_hash)
+
+        new_lanes = lanes[:]
+        new_lanes[column] = None
+        inserted = 0
+        for index, parent in enumerate(parents):
+            if parent in new_lanes:
+                # Another lane already leads to this parent, join it.
+                continue
+            if index == 0:
+                new_lanes[column] = parent
+            else:
+                inserted += 1
+                new_lanes.insert(column + inserted, parent)
+        new_lanes = [lane for lane in new_lanes if lane is not None]
+
+        position = {lane: index for index, lane in enumerate(new_lanes)}
+        edges = []
+        for index, lane in enumerate(lanes):
+            if index == column:
+                edges.extend((column, position[parent]) for parent in parents)
+            else:
+                edges.append((index, position[lane]))
+
+        row = GraphRow(commit_hash, column, len(lanes), tuple(edges))
+        self.rows.append(row)
+        self._lanes = new_lanes
+        return row
+
+    def render(self, start, stop, format_commit, predicate=None):
+        """
+        Return the lines for the rows `start` to `stop`.  `format_commit` is
+        called with a commit hash and returns the text shown next to its node.
+        Rows of commits for which `predicate` returns False are left out, but
+        their connecting lines are still drawn so the graph stays intact.
+        """
+        lines = []
+        for row in self.rows[start:stop]:
+            if predicate is None or predicate(row.commit_hash):
+                cells = ["|"] * row.width
+                cells[row.column] = COMMIT_NODE_CHAR
+                lines.append("{} {}".format(" ".join(cells), format_commit(row.commit_hash)))
+            lines.extend(connector_lines(row.edges))
+        return lines
+
+
+def connector_lines(edges):
+    """
+    Return the lines leading from the lanes of a row to the lanes of the
+    next row, moving diagonal lines one column per line.  Two edges crossing
+    each other would need a `/` and a `\\` in the same cell; the later one
+    then waits a line, drawn as `|`, so that both stay visible.
+    """
+    current = [from_column for from_column, _ in edges]
+    targets = [to_column for _, to_column in edges]
+    lines = []
+    while current != targets:
+        cells = [" "] * (2 * max(current) + 2)
+        for index, (column, target) in enumerate(zip(current, targets)):
+            if column > target:
+                cell, char, step = 2 * column - 1, "/", -1
+            elif column < target:
+                cell, char, step = 2 * column + 1, "\\", 1
+            else:
+                cell = None
+
+            if cell is not None and cells[cell] in (" ", char):
+                cells[cell] = char
+                current[index] = column + step
+            elif cells[2 * column] == " ":
+                cells[2 * column] = "|"
+        lines.append("".join(cells).rstrip())
+    return lines
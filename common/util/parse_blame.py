@@ -0,0 +1,106 @@
+"""
+Parse the output of `git blame --porcelain`.
+"""
+
+from collections import namedtuple
+import re
+import unicodedata
+
+
+BlamedLine = namedtuple("BlamedLine", ("contents", "commit_hash", "orig_lineno", "final_lineno"))
+
+NOT_COMMITED_HASH = "0000000000000000000000000000000000000000"
+COMMIT_HASH_LENGTH = 12
+COMMIT_CACHE_MAX_SIZE = 20000
+
+re_non_ascii = re.compile(b"[^\x00-\x7f]")
+
+# Keys of a blame record which describe the blamed file rather than the
+# commit, and differ between blames of different files.
+PER_FILE_KEYS = frozenset(("filename", "previous", "boundary"))
+
+# Commit metadata never changes, so it is parsed only once per session
+# (except for the pseudo-commit of uncommitted lines).  Only the keys
+# intrinsic to the commit are cached.
+commit_cache = {}
+
+
+def parse_blame(blame_porcelain):
+    """
+    Given the raw (bytes) output of `git blame --porcelain` (or
+    `--line-porcelain`), return a list of `BlamedLine`s and a dict mapping
+    the hashes of all commits referenced by those lines to their metadata.
+
+    Only the content lines and the headers of commits not seen before are
+    decoded; everything else is handled as bytes.
+    """
+    blamed_lines = []
+    commits = {}
+    append = blamed_lines.append
+
+    commit_hash = orig_lineno = final_lineno = None
+    metadata = None
+    # Whether the commit of the current record is not cached yet.
+    is_new = False
+
+    for line in blame_porcelain.split(b"\n"):
+        if line[:1] == b"\t":
+            # An actual line of code, the last line of a record.
+            append(BlamedLine(_decode_content(line[1:]), commit_hash, orig_lineno, final_lineno))
+            if metadata is not None:
+                if is_new:
+                    _store_commit(commit_hash, metadata)
+                metadata = None
+            continue
+
+        key, _, value = line.partition(b" ")
+        if len(key) == 40:
+            # A record header: `<hash> <orig_lineno> <final_lineno>[ <num_lines>]`
+            commit_hash = key.decode("ascii")
+            orig, _, rest = value.partition(b" ")
+            final, _, _ = rest.partition(b" ")
+            orig_lineno, final_lineno = int(orig), int(final)
+
+            if commit_hash not in commits:
+                cached = commit_cache.get(commit_hash)
+                is_new = cached is None or commit_hash == NOT_COMMITED_HASH
+                if is_new:
+                    metadata = {
+                        "long_hash": commit_hash,
+                        "short_hash": commit_hash[:COMMIT_HASH_LENGTH]
+                    }
+                else:
+                    # The per-file keys still have to be read from this blame.
+                    metadata = dict(cached)
+                commits[commit_hash] = metadata
+
+        elif metadata is not None and key:
+            name = key.decode("ascii", "replace")
+            if is_new or name in PER_FILE_KEYS:
+                # Sometimes git-blame includes keys without values; these are
+                # stored as empty strings.
+                metadata[name] = _decode(value)
+
+    return blamed_lines, commits
+
+
+def _store_commit(commit_hash, metadata):
+    if commit_hash == NOT_COMMITED_HASH:
+        return
+    if len(commit_cache) >= COMMIT_CACHE_MAX_SIZE:
+        commit_cache.clear()
+    commit_cache[commit_hash] = {
+        key: value for key, value in metadata.items() if key not in PER_FILE_KEYS}
+
+
+def _decode(value):
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        return value.decode("latin-1")
+
+
+def _decode_content(value):
+    if re_non_ascii.search(value) is None:
+        return value.decode("ascii")
+    return unicodedata.normalize("NFC", _decode(value))
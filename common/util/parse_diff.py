@@ -3,68 +3,107 @@ Parse and process output from `git diff` command.
 """
 
 from collections import namedtuple
-from itertools import islice
 import re
 
-Hunk = namedtuple("Hunk", ("raw_lines", "changes", "head_start", "head_length", "saved_start", "saved_length"))
 Change = namedtuple("Change", ("raw", "type", "head_pos", "saved_pos", "text"))
 
-re_metadata = re.compile(r"^@@ -(\d+)(,(\d+))? \+(\d+)(,(\d+))? @@")
+re_metadata = re.compile(r"^@@ -(\d+)(,(\d+))? \+(\d+)(,(\d+))? @@", re.MULTILINE)
+# Every line of a hunk starts with one of these; the first line which does
+# not ends the hunk.
+HUNK_LINE_STARTS = (" ", "+", "-", "\\")
+re_hunk_end = re.compile(r"\n(?![ +\-\\])")
 
 
-def parse_diff(diff_str):
+class Hunk:
+
     """
-    Given the string output from a `git diff` command, parse the string into
-    hunks and, more granularly, meta-data and change information for each of
-    those hunks.
+    A hunk of a diff.  Its lines are not copied out of the diff; the hunk
+    only keeps its offsets into `buffer`.  `raw_lines` (starting with the
+    `@@` header line) and `changes` are computed when accessed; `changes`
+    is kept once computed.
     """
-    hunks = []
-
-    raw_hunks = _split_into_hunks(diff_str.splitlines())
-
-    for raw_hunk in raw_hunks:
-        hunk_lines = list(raw_hunk)
-        head_start, head_length, saved_start, saved_length = _get_metadata(hunk_lines[0])
-        changes = _get_changes(hunk_lines[1:], head_start, saved_start)
-        # Remove lines warning about "No newline at end of file"; change[1] will == `\`.
-        changes_filtered = tuple(change for change in changes if change[1] != "\\")
-        hunks.append(Hunk(hunk_lines, changes_filtered, head_start, head_length, saved_start, saved_length))
-
-    return hunks
-
 
-def _split_into_hunks(lines):
+    __slots__ = (
+        "buffer", "start", "end", "head_start", "head_length", "saved_start", "saved_length",
+        "_changes")
+
+    def __init__(self, buffer, start, end, head_start, head_length, saved_start, saved_length):
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+        self.head_start = head_start
+        self.head_length = head_length
+        self.saved_start = saved_start
+        self.saved_length = saved_length
+        self._changes = None
+
+    def __repr__(self):
+        return "Hunk(-{},{} +{},{})".format(
+            self.head_start, self.head_length, self.saved_start, self.saved_length)
+
+    @property
+    def raw_lines(self):
+        text = self.buffer[self.start:self.end]
+        if "\r" in text:
+            return [line.rstrip("\r") for line in text.split("\n")]
+        return text.split("\n")
+
+    @property
+    def changes(self):
+        """
+        Return a `Change` for every line of the hunk, with the position of the
+        HEAD- and saved- versions at that line and the text of the line with
+        the `+` or `-` removed.  Lines warning about "No newline at end of
+        file" are left out.
+        """
+        if self._changes is not None:
+            return self._changes
+
+        changes = []
+        head_pos = self.head_start
+        saved_pos = self.saved_start
+
+        for raw_line in self.raw_lines[1:]:
+            change_type = raw_line[0]
+            if change_type == "\\":
+                continue
+            changes.append(Change(raw_line, change_type, head_pos, saved_pos, raw_line[1:]))
+            if change_type == "-":
+                head_pos += 1
+            elif change_type == "+":
+                saved_pos += 1
+
+        self._changes = tuple(changes)
+        return self._changes
+
+
+def parse_diff(diff):
     """
-    Given an array of lines from the output of a `git-diff` command, yield
-    slices of the lines that correspond to the hunks in the diff.
+    Given the output from a `git diff` command, either as a string or as an
+    iterable of lines, parse it into hunks and, more granularly, meta-data
+    and change information for each of those hunks.
     """
-    # Throw away the first four lines of the git output.
-    #   diff --git a/c9d70aa928a3670bc2b879b4a596f10d3e81ba7c b/d95427d30480b29b99b407981c8e048b6e0c902d
-    #   index c9d70aa..d95427d 100644
-    #   --- a/c9d70aa928a3670bc2b879b4a596f10d3e81ba7c
-    #   +++ b/d95427d30480b29b99b407981c8e048b6e0c902d
-    lines = lines[4:]
-    lines_iter = enumerate(lines)
-    start = 0
+    return list(iter_hunks(diff))
 
-    if len(lines) < 1:
-        return
 
-    for line_number, line in lines_iter:
-        if not line.startswith(("+", "-", "\\")) and line_number != 0:
-            yield islice(lines, start, line_number)
-        if line.startswith("@@"):
-            start = line_number
-
-    yield islice(lines, start, line_number + 1)
+def iter_hunks(diff):
+    """
+    Yield the hunks of a diff one by one.  Hunks of a string point into the
+    string itself.  Of an iterable of lines, only the lines of the current
+    hunk are held, and joined into the hunk's buffer once it is complete.
+    File headers (`diff --git`, `index`, `---`, `+++`, ...) are skipped,
+    also between the files of a multi-file diff, as a hunk ends at the
+    first line which is not a change or context line.
+    """
+    if isinstance(diff, str):
+        return _iter_string_hunks(diff)
+    return _iter_line_hunks(diff)
 
 
-def _get_metadata(meta_str):
+def _get_metadata(match):
     """
-    Given the `@@ ... @@` header from the beginning of a hunk, return
-    the start and length values from that header.
+    Return the start and length values from the `@@ ... @@` header match.
     """
-    match = re_metadata.match(meta_str)
     head_start, _, head_length, saved_start, _, saved_length = match.groups()
     return (int(head_start),
             int(head_length or "1"),
@@ -72,24 +111,140 @@ def _get_metadata(meta_str):
             int(saved_length or "1"))
 
 
-def _get_changes(hunk_lines, head_start, saved_start):
+def _iter_string_hunks(diff):
+    pos = 0
+    while True:
+        match = re_metadata.search(diff, pos)
+        if not match:
+            return
+        end_match = re_hunk_end.search(diff, match.end())
+        end = end_match.start() if end_match else len(diff)
+        yield Hunk(diff, match.start(), end, *_get_metadata(match))
+        pos = end
+
+
+def _iter_line_hunks(lines):
+    hunk_lines = []
+    metadata = None
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+
+        if metadata is not None:
+            if line.startswith(HUNK_LINE_STARTS):
+                hunk_lines.append(line)
+                continue
+            yield _join_hunk(hunk_lines, metadata)
+            hunk_lines = []
+            metadata = None
+
+        match = re_metadata.match(line)
+        if match:
+            metadata = _get_metadata(match)
+            hunk_lines.append(line)
+
+    if metadata is not None:
+        yield _join_hunk(hunk_lines, metadata)
+
+
+def _join_hunk(hunk_lines, metadata):
+    buffer = "\n".join(hunk_lines)
+    return Hunk(buffer, 0, len(buffer), *metadata)
+
+
+def build_partial_patch(hunks, selected, reverse=False):
+    """
+    Given the hunks of a `git diff -U0` and the selected lines as a set of
+    `(hunk index, line index)` pairs, with line indexes counting the lines
+    after the `@@` header, return the hunks of a patch applying only the
+    selected changes.  Context-free hunks like these must be applied with
+    `git apply --unidiff-zero`.
+
+    The patch applies to the old side of the diff.  If `reverse` is set, it
+    applies to the new side instead, with `git apply --reverse`, undoing
+    the selected changes there.
+    """
+    ops = []
+    for hunk_idx, hunk in enumerate(hunks):
+        lines = hunk.raw_lines[1:]
+        removed = []
+        added = []
+        for line_idx, line in enumerate(lines):
+            if not line or line[0] not in "+-":
+                continue
+            if (hunk_idx, line_idx) in selected:
+                no_eol = line_idx + 1 < len(lines) and lines[line_idx + 1].startswith("\\")
+                lines_out = [line, lines[line_idx + 1]] if no_eol else [line]
+            else:
+                lines_out = None
+            (removed if line[0] == "-" else added).append(lines_out)
+        ops.extend(_hunk_ops(hunk, removed, added, reverse))
+
+    patch = []
+    delta = 0
+    for pos, dropped, inserted in ops:
+        dropped_count = _count_lines(dropped)
+        inserted_count = _count_lines(inserted)
+        old_start = pos if dropped_count else pos - 1
+        new_start = pos + delta if inserted_count else pos + delta - 1
+        delta += inserted_count - dropped_count
+        if reverse:
+            # Write out the inverse change, which `git apply --reverse`
+            # turns back into the wanted one.
+            patch.append("@@ -{},{} +{},{} @@".format(new_start, inserted_count, old_start, dropped_count))
+            patch.extend(inserted + dropped)
+        else:
+            patch.append("@@ -{},{} +{},{} @@".format(old_start, dropped_count, new_start, inserted_count))
+            patch.extend(dropped + inserted)
+
+    return "\n".join(patch)
+
+
+def _count_lines(lines):
+    return sum(1 for line in lines if not line.startswith("\\"))
+
+
+def _hunk_ops(hunk, removed, added, reverse):
     """
-    Transform a list of `+` or `-` lines from a `git diff` output
-    into tuples with the original raw line, the type of the change,
-    the position of the HEAD- and saved- versions at that line, and
-    the text of the line with the `+` or `-` removed.
+    Return the changes to make for a hunk as `(position, lines to remove,
+    lines to insert)`, where the position is the line number of the first
+    line to remove, or of the line to insert before, in the file the patch
+    applies to.  `removed` and `added` hold the lines of either side of the
+    hunk, as a list of the lines to write out if selected, else None.
+
+    The lines of that file are the `-` lines of the hunk, or the `+` lines
+    in reverse.  The lines of the other side are inserted after them, or
+    before them in reverse, as `-U0` hunks list all `-` lines first.
     """
-    changes = []
-    head_pos = head_start
-    saved_pos = saved_start
-
-    for raw_line in hunk_lines:
-        change_type = raw_line[0]
-        text = raw_line[1:]
-        changes.append(Change(raw_line, change_type, head_pos, saved_pos, text))
-        if change_type == "-":
-            head_pos += 1
-        elif change_type == "+":
-            saved_pos += 1
-
-    return changes
+    if reverse:
+        present, inserted = added, removed
+        start, length = hunk.saved_start, hunk.saved_length
+    else:
+        present, inserted = removed, added
+        start, length = hunk.head_start, hunk.head_length
+    # A zero-length side starts at the line before the change.
+    first_line = start if length else start + 1
+
+    ops = []
+    run_start = None
+    for idx, lines_out in enumerate(present):
+        if lines_out is None:
+            run_start = None
+        elif run_start is None:
+            run_start = first_line + idx
+            ops.append((run_start, list(lines_out), []))
+        else:
+            ops[-1][1].extend(lines_out)
+
+    insert_lines = [line for lines_out in inserted if lines_out for line in lines_out]
+    if insert_lines:
+        insert_at = first_line if reverse else first_line + len(present)
+        if reverse and ops and ops[0][0] == insert_at:
+            ops[0][2].extend(insert_lines)
+        elif not reverse and run_start is not None:
+            # The last run reaches the end of the hunk's lines.
+            ops[-1][2].extend(insert_lines)
+        else:
+            ops.insert(0 if reverse else len(ops), (insert_at, [], insert_lines))
+
+    return ops
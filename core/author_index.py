@@ -0,0 +1,88 @@
+"""
+Persistent, per-repository index of the authors of the commits reachable
+from HEAD, stored together with the HEAD it was computed for.
+"""
+
+from collections import namedtuple
+import os
+import threading
+
+from ..common import util
+
+
+Author = namedtuple("Author", ("name", "email", "commit_count", "last_commit_time"))
+
+indexes = {}
+indexes_lock = threading.Lock()
+
+
+def get_author_index(repo_path):
+    with indexes_lock:
+        index = indexes.get(repo_path)
+        if index is None:
+            index = indexes[repo_path] = AuthorIndex(repo_path)
+        return index
+
+
+class AuthorIndex:
+
+    def __init__(self, repo_path):
+        try:
+            self.path = os.path.join(
+                util.cache.cache_dir("authors"), util.cache.repo_key(repo_path) + ".json")
+        except OSError:
+            self.path = None
+        self.lock = threading.Lock()
+        self.rebuilding = False
+        self.head = None
+        # (name, email) -> [commit count, last commit time]
+        self.authors = {}
+        self._load()
+
+    def _load(self):
+        data = util.cache.read_json(self.path) if self.path else None
+        if isinstance(data, dict) and "head" in data and "authors" in data:
+            self.head = data["head"]
+            self.authors = {
+                (name, email): [count, last_commit_time]
+                for name, email, count, last_commit_time in data["authors"]
+            }
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            util.cache.write_json(self.path, {
+                "head": self.head,
+                "authors": [list(key) + value for key, value in self.authors.items()]
+            })
+        except OSError as e:
+            util.debug.add_to_log(util.debug.make_log_message("error", author_index=str(e)))
+
+    @staticmethod
+    def count(log_output, authors=None):
+        """
+        Count the commits per author in the output of
+        `git log --format=%aN%x00%aE%x00%at`, adding to `authors`.
+        """
+        authors = {} if authors is None else authors
+        for line in log_output.splitlines():
+            name, email, timestamp = line.split("\x00")
+            timestamp = int(timestamp)
+            entry = authors.get((name, email))
+            if entry is None:
+                authors[(name, email)] = [1, timestamp]
+            else:
+                entry[0] += 1
+                if timestamp > entry[1]:
+                    entry[1] = timestamp
+        return authors
+
+    def sorted_authors(self):
+        """
+        Return the authors like `git shortlog -sne`, most commits first.
+        """
+        return sorted(
+            (Author(name, email, count, last_commit_time)
+             for (name, email), (count, last_commit_time) in self.authors.items()),
+            key=lambda author: (-author.commit_count, author.name, author.email))
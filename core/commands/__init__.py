@@ -11,10 +11,14 @@ from .ignore import *
 from .init import *
 from .diff import *
 from .blame import *
+from .inline_blame import *
+from .gutter_diff import *
 from .show_commit import *
 from .show_commit_info import *
 from .commit_compare import *
 from .log import *
+from .search_commits import *
+from .pickaxe import *
 from .stash import *
 from .reflog import *
 from .merge import*
@@ -1,22 +1,15 @@
-import re
-from collections import namedtuple, defaultdict
-import unicodedata
-
 import sublime
 from sublime_plugin import TextCommand
 
 from ..commands import GsNavigate
 from ..git_command import GitCommand
 from ...common import util
+from ...common.util.parse_blame import BlamedLine, NOT_COMMITED_HASH, COMMIT_HASH_LENGTH  # NOQA
 from .log import LogMixin
 from ..ui_mixins.quick_panel import PanelActionMixin
 
 
-BlamedLine = namedtuple("BlamedLine", ("contents", "commit_hash", "orig_lineno", "final_lineno"))
-
-NOT_COMMITED_HASH = "0000000000000000000000000000000000000000"
 BLAME_TITLE = "BLAME: {}{}"
-COMMIT_HASH_LENGTH = 12
 
 
 class BlameMixin:
@@ -211,80 +204,50 @@ class GsBlameRefreshCommand(BlameMixin, TextCommand, GitCommand):
 
         blame_porcelain = self.git(
             "blame", "-p", '-w' if ignore_whitespace else None, detect_options,
-            commit_hash, "--", filename_at_commit
+            commit_hash, "--", filename_at_commit,
+            decode=False
         )
-        blame_porcelain = unicodedata.normalize('NFC', blame_porcelain)
-        blamed_lines, commits = self.parse_blame(blame_porcelain.splitlines())
+        blamed_lines, commits = util.parse_blame(blame_porcelain)
+        return self.format_blame(blamed_lines, commits)
+
+    @classmethod
+    def format_blame(cls, blamed_lines, commits):
+        """
+        Render the blamed lines in hunks of consecutive lines of the same commit,
+        with the commit info shown to the left of each hunk.
+        """
+        if not blamed_lines:
+            return ""
 
         commit_infos = {
-            commit_hash: self.short_commit_info(commit)
+            commit_hash: cls.short_commit_info(commit)
             for commit_hash, commit in commits.items()
         }
 
-        partitions = tuple(self.partition(blamed_lines))
+        partitions = tuple(cls.partition(blamed_lines))
 
         longest_commit_line = max(
-            (line
-             for commit_info in commit_infos.values()
-             for line in commit_info),
-            key=len)
-
-        longest_code_line = max(
-            (line.contents for partition in partitions for line in partition),
-            key=len
-        )
+            len(line)
+            for commit_info in commit_infos.values()
+            for line in commit_info)
 
-        partitions_with_commits_iter = self.couple_partitions_and_commits(
+        longest_code_line = max(len(line.contents) for line in blamed_lines)
+
+        partitions_with_commits_iter = cls.couple_partitions_and_commits(
             partitions=partitions,
             commit_infos=commit_infos,
-            left_pad=len(longest_commit_line)
+            left_pad=longest_commit_line
         )
 
         spacer = (
-            "-" * len(longest_commit_line) +
+            "-" * longest_commit_line +
             " | " +
-            "-" * (5 + len(longest_code_line)) +
+            "-" * (5 + longest_code_line) +
             "\n"
         )
 
         return spacer.join(partitions_with_commits_iter)
 
-    def parse_blame(self, blame_porcelain):
-        lines_iter = iter(blame_porcelain)
-
-        blamed_lines = []
-        commits = defaultdict(lambda: defaultdict(str))
-
-        for line in lines_iter:
-            commit_hash, orig_lineno, final_lineno, _ = \
-                re.match(r"([0-9a-f]{40}) (\d+) (\d+)( \d+)?", line).groups()
-            commits[commit_hash]["short_hash"] = commit_hash[:COMMIT_HASH_LENGTH]
-            commits[commit_hash]["long_hash"] = commit_hash
-
-            next_line = next(lines_iter)
-            while not next_line.startswith("\t"):
-                # Iterate through header keys and values.
-                try:
-                    k, v = re.match(r"([^ ]+) (.+)", next_line).groups()
-                except AttributeError as e:
-                    # Sometimes git-blame includes keys without values;
-                    # since we don't care about these, simply discard.
-                    print("Skipping blame line: " + repr(next_line))
-                commits[commit_hash][k] = v
-                next_line = next(lines_iter)
-
-            # If `next_lines` starts with a tab (and breaks out of the above
-            # while loop), it is an actual line of code.  The line following
-            # that will be a new header or the end of the file.
-            blamed_lines.append(BlamedLine(
-                # Strip tab character.
-                contents=next_line[1:],
-                commit_hash=commit_hash,
-                orig_lineno=orig_lineno,
-                final_lineno=final_lineno))
-
-        return blamed_lines, commits
-
     @staticmethod
     def partition(blamed_lines):
         prev_line = None
@@ -303,11 +266,11 @@ class GsBlameRefreshCommand(BlameMixin, TextCommand, GitCommand):
         if commit["long_hash"] == NOT_COMMITED_HASH:
             return ("Not committed yet.", )
 
-        summary = commit["summary"]
+        summary = commit.get("summary", "")
         if len(summary) > 40:
             summary = summary[:36] + " ..."
-        author_info = commit["author"] + " " + commit["author-mail"]
-        time_stamp = util.dates.fuzzy(commit["author-time"]) if commit["author-time"] else ""
+        author_info = commit.get("author", "") + " " + commit.get("author-mail", "")
+        time_stamp = util.dates.fuzzy(commit["author-time"]) if commit.get("author-time") else ""
 
         return (summary, commit["short_hash"], author_info, time_stamp)
 
@@ -317,25 +280,25 @@ class GsBlameRefreshCommand(BlameMixin, TextCommand, GitCommand):
         right_fallback = ""
 
         for partition in partitions:
-            output = ""
+            rows = []
             commit_info = commit_infos[partition[0].commit_hash]
             left_len = len(commit_info)
             right_len = len(partition)
-            total_lines = len(max((commit_info, partition), key=len))
+            total_lines = max(left_len, right_len)
 
             for i in range(total_lines):
                 left = commit_info[i] if i < left_len else left_fallback
                 right = partition[i].contents if i < right_len else right_fallback
                 lineno = partition[i].final_lineno if i < right_len else right_fallback
 
-                output += "{left: <{left_pad}} | {lineno: >4} {right}\n".format(
+                rows.append("{left: <{left_pad}} | {lineno: >4} {right}".format(
                     left=left,
                     left_pad=left_pad,
                     lineno=lineno,
-                    right=right)
-                output = output.strip() + "\n"
+                    right=right).rstrip())
 
-            yield output
+            rows[0] = rows[0].lstrip()
+            yield "\n".join(rows) + "\n"
 
     def select_line(self, lineno):
         pattern = r".{{30}} \| {lineno: >4}\s".format(lineno=lineno)
@@ -1,4 +1,5 @@
 import os
+import bisect
 
 import sublime
 from sublime_plugin import WindowCommand, TextCommand
@@ -38,6 +39,8 @@ Signed-off-by: {name} <{email}>
 
 COMMIT_TITLE = "COMMIT: {}"
 
+COMMIT_DIFF_REGION = "git_savvy.commit_view.diff"
+
 CONFIRM_ABORT = "Confirm to abort commit?"
 
 
@@ -114,33 +117,126 @@ class GsCommitInitializeViewCommand(TextCommand, GitCommand):
             with util.file.safe_open(commit_help_extra_path, "r", encoding="utf-8") as f:
                 initial_text += f.read()
 
-        git_args = [
-            "diff",
-            "--no-color"
-        ]
+        self.view.run_command("gs_replace_view_text", {
+            "text": initial_text,
+            "nuke_cursors": True
+        })
+
+        if self.savvy_settings.get("show_commit_diff"):
+            # The diff is loaded in the background and written after this
+            # point, which moves along with edits of the message.
+            self.view.add_regions(
+                COMMIT_DIFF_REGION, [sublime.Region(self.view.size())], flags=sublime.HIDDEN)
+            sublime.set_timeout_async(lambda: self.view.run_command("gs_commit_view_load_diff"), 0)
+
+
+class GsCommitViewLoadDiffCommand(TextCommand, GitCommand):
+
+    """
+    Show the changes to be committed below the help message.  Diffs
+    changing more lines than `commit_diff_threshold` are shown with every
+    file collapsed to a single line, and only the patches of the files the
+    user expanded are loaded.
+    """
+
+    def run(self, edit, cursor=None):
+        sublime.set_timeout_async(lambda: self.run_async(cursor), 0)
+
+    def run_async(self, cursor):
+        settings = self.view.settings()
+        include_unstaged = settings.get("git_savvy.commit_view.include_unstaged", False)
+        option_amend = settings.get("git_savvy.commit_view.amend")
+
+        diff_args = (
+            "--no-color",
+            "--cached" if not include_unstaged else None,
+            "HEAD^" if option_amend else "HEAD" if include_unstaged else None
+        )
 
         show_commit_diff = self.savvy_settings.get("show_commit_diff")
+        show_diffstat = self.savvy_settings.get("show_diffstat")
         # for backward compatibility, check also if show_commit_diff is True
-        if show_commit_diff is True or show_commit_diff == "full":
-            git_args.append("--patch")
+        show_patch = show_commit_diff is True or show_commit_diff == "full"
+        show_stat = show_commit_diff == "stat" or (show_patch and show_diffstat)
+
+        stats = self.get_large_diff_stats(diff_args) if show_patch else None
+        if stats is None:
+            diff = self.git(
+                "diff",
+                "--patch" if show_patch else None,
+                "--stat" if show_stat else None,
+                *diff_args)
+        else:
+            expanded = set(settings.get("git_savvy.commit_view.expanded_files") or [])
+            settings.set("git_savvy.commit_view.files", [stat.path for stat in stats])
+            diff = util.collapsed_diff.render_collapsed_diff(
+                stats, expanded, show_stat,
+                lambda stat: self.git("diff", "--patch", *diff_args + ("--", stat.old_path, stat.path)))
+
+        regions = self.view.get_regions(COMMIT_DIFF_REGION)
+        if not regions or not self.view.is_valid():
+            return
+        begin = regions[0].begin()
+        self.view.run_command("gs_replace_region", {
+            "text": diff,
+            "begin": begin,
+            "end": self.view.size()
+        })
+        # Text inserted at an empty region pushes it along, so mark the
+        # whole diff instead.
+        self.view.add_regions(
+            COMMIT_DIFF_REGION, [sublime.Region(begin, self.view.size())], flags=sublime.HIDDEN)
+        if cursor is not None:
+            self.view.sel().clear()
+            self.view.sel().add(sublime.Region(cursor))
+
+    def get_large_diff_stats(self, diff_args):
+        """
+        Return the `FileStat`s of the diff if it changes more lines than
+        `commit_diff_threshold`, otherwise None.
+        """
+        threshold = self.savvy_settings.get("commit_diff_threshold")
+        if not threshold:
+            return None
+        stats = util.collapsed_diff.parse_numstat(
+            self.git("diff", "--numstat", "-z", *diff_args))
+        if util.collapsed_diff.changed_lines(stats) < threshold:
+            self.view.settings().erase("git_savvy.commit_view.files")
+            return None
+        return stats
+
+
+class GsCommitViewToggleFileCommand(TextCommand):
 
-        show_diffstat = self.savvy_settings.get("show_diffstat")
-        if show_commit_diff == "stat" or (show_commit_diff == "full" and show_diffstat):
-            git_args.append("--stat")
+    """
+    Expand or collapse the patch of the file under the cursor, in a commit
+    view showing a large diff.
+    """
+
+    def run(self, edit):
+        settings = self.view.settings()
+        files = settings.get("git_savvy.commit_view.files")
+        regions = self.view.get_regions(COMMIT_DIFF_REGION)
+        if not files or not regions or not self.view.sel():
+            return
 
-        if not include_unstaged:
-            git_args.append("--cached")
+        summaries = [
+            region.a for region in self.view.find_all(util.collapsed_diff.FILE_SUMMARY)
+            if region.a >= regions[0].begin()]
+        idx = bisect.bisect(summaries, self.view.sel()[0].begin()) - 1
+        if idx < 0:
+            return
 
-        if option_amend:
-            git_args.append("HEAD^")
-        elif include_unstaged:
-            git_args.append("HEAD")
+        expanded = settings.get("git_savvy.commit_view.expanded_files") or []
+        path = files[idx]
+        if path in expanded:
+            expanded.remove(path)
+        else:
+            expanded.append(path)
+        settings.set("git_savvy.commit_view.expanded_files", expanded)
 
-        initial_text += self.git(*git_args) if show_commit_diff else ''
-        self.view.run_command("gs_replace_view_text", {
-            "text": initial_text,
-            "nuke_cursors": True
-        })
+        # The summary lines up to the toggled file stay where they are.
+        self.view.run_command("gs_commit_view_load_diff", {"cursor": summaries[idx]})
 
 
 class GsPedanticEnforceEventListener(EventListener, SettingsMixin):
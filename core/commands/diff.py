@@ -91,18 +91,21 @@ class GsDiffRefreshCommand(TextCommand, GitCommand):
         target_commit = self.view.settings().get("git_savvy.diff_view.target_commit")
         show_diffstat = self.view.settings().get("git_savvy.diff_view.show_diffstat")
 
+        diff_args = (
+            "--ignore-all-space" if ignore_whitespace else None,
+            "--word-diff" if show_word_diff else None,
+            "--no-color",
+            "--cached" if in_cached_mode else None,
+            base_commit,
+            target_commit
+        )
+
         try:
-            stdout = self.git(
-                "diff",
-                "--ignore-all-space" if ignore_whitespace else None,
-                "--word-diff" if show_word_diff else None,
-                "--stat" if show_diffstat else None,
-                "--patch",
-                "--no-color",
-                "--cached" if in_cached_mode else None,
-                base_commit,
-                target_commit,
-                "--", self.file_path)
+            stats = self.get_large_diff_stats(diff_args)
+            if stats is not None:
+                stdout = self.render_collapsed_diff(stats, diff_args, show_diffstat)
+            else:
+                stdout = self.get_full_diff(diff_args, show_diffstat)
         except GitSavvyError as err:
             # When the output of the above Git command fails to correctly parse,
             # the expected notification will be displayed to the user.  However,
@@ -120,6 +123,78 @@ class GsDiffRefreshCommand(TextCommand, GitCommand):
 
         self.view.run_command("gs_replace_view_text", {"text": stdout})
 
+    def get_full_diff(self, diff_args, show_diffstat):
+        return self.git(
+            "diff",
+            "--stat" if show_diffstat else None,
+            "--patch",
+            *diff_args + ("--", self.file_path))
+
+    def get_large_diff_stats(self, diff_args):
+        """
+        Return the `FileStat`s of the diff if it changes more lines than
+        `large_diff_threshold`, otherwise None.  The numstat is cheap to
+        get, so a large patch is never fetched as a whole.
+        """
+        threshold = self.savvy_settings.get("large_diff_threshold")
+        if not threshold:
+            self.view.settings().erase("git_savvy.diff_view.files")
+            return None
+        stats = util.collapsed_diff.parse_numstat(
+            self.git("diff", "--numstat", "-z", *diff_args + ("--", self.file_path)))
+        if util.collapsed_diff.changed_lines(stats) < threshold:
+            self.view.settings().erase("git_savvy.diff_view.files")
+            return None
+        return stats
+
+    def render_collapsed_diff(self, stats, diff_args, show_diffstat):
+        """
+        List every file of the diff on a single line, and fetch the patches
+        of the files the user expanded.
+        """
+        settings = self.view.settings()
+        expanded = set(settings.get("git_savvy.diff_view.expanded_files") or [])
+        settings.set("git_savvy.diff_view.files", [stat.path for stat in stats])
+
+        return util.collapsed_diff.render_collapsed_diff(
+            stats, expanded, show_diffstat,
+            lambda stat: self.git("diff", "--patch", *diff_args + ("--", stat.old_path, stat.path)))
+
+
+class GsDiffToggleFileCommand(TextCommand):
+
+    """
+    Expand or collapse the patch of the file under the cursor, in a diff
+    view showing a large diff.
+    """
+
+    def run(self, edit):
+        settings = self.view.settings()
+        files = settings.get("git_savvy.diff_view.files")
+        if not files or not self.view.sel():
+            return
+
+        summaries = [
+            region.a for region in self.view.find_all(util.collapsed_diff.FILE_SUMMARY)]
+        idx = bisect.bisect(summaries, self.view.sel()[0].begin()) - 1
+        if idx < 0:
+            return
+
+        expanded = settings.get("git_savvy.diff_view.expanded_files") or []
+        path = files[idx]
+        if path in expanded:
+            expanded.remove(path)
+        else:
+            expanded.append(path)
+        settings.set("git_savvy.diff_view.expanded_files", expanded)
+
+        self.view.run_command("gs_diff_refresh")
+        summaries = self.view.find_all(util.collapsed_diff.FILE_SUMMARY)
+        if idx < len(summaries):
+            self.view.sel().clear()
+            self.view.sel().add(sublime.Region(summaries[idx].a))
+            self.view.show(summaries[idx].a)
+
 
 class GsDiffToggleSetting(TextCommand):
 
@@ -172,6 +247,8 @@ class GsDiffStageOrResetHunkCommand(TextCommand, GitCommand):
         self.hunk_ends = sorted(list(
             # Hunks end when the next diff starts.
             set(self.diff_starts[1:]) |
+            # In large diffs, hunks end at the line summarizing the next file.
+            {region.a for region in self.view.find_all(util.collapsed_diff.FILE_SUMMARY)} |
             # Hunks end when the next hunk starts, except for hunks
             # immediately following diff headers.
             (set(self.hunk_starts) - hunk_starts_following_headers) |
@@ -187,6 +264,8 @@ class GsDiffStageOrResetHunkCommand(TextCommand, GitCommand):
         # Apply the diffs in reverse order - otherwise, line number will be off.
         for pt in reversed(cursor_pts):
             hunk_diff = self.get_hunk_diff(pt)
+            if not hunk_diff:
+                continue
 
             # The three argument combinations below result from the following
             # three scenarios:
@@ -227,6 +306,10 @@ class GsDiffStageOrResetHunkCommand(TextCommand, GitCommand):
             return
 
         diff_start = self.hunk_starts[bisect.bisect(self.hunk_starts, pt) - 1]
+        if bisect.bisect(self.hunk_ends, diff_start) != bisect.bisect(self.hunk_ends, pt):
+            # The hunk ended before the cursor, e.g. on the summary of a
+            # collapsed file.
+            return
         diff_end = self.hunk_ends[bisect.bisect(self.hunk_ends, pt)]
 
         header = self.view.substr(sublime.Region(header_start, header_end))
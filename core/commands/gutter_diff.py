@@ -0,0 +1,202 @@
+"""
+Mark added, modified and removed lines in the gutter of a regular file
+view.  The buffer is diffed against the file's blob in the index, which is
+read once and cached by its object name; it is only looked up again when
+`.git/index` changes.  Only the lines between the unchanged start and end
+of the file are compared, with difflib; only if they are too many for it,
+Git is started to diff them.
+"""
+
+from collections import OrderedDict
+import os
+import threading
+
+import sublime
+from sublime_plugin import TextCommand, EventListener
+
+from ..git_command import GitCommand
+from ..git_mixins.line_mapping import change_markers
+from ..settings import SettingsMixin
+from ...common import util
+
+
+GUTTER_REGIONS = (
+    # (region key, scope, icon)
+    ("git-savvy-gutter-added", "markup.inserted", "dot"),
+    ("git-savvy-gutter-modified", "markup.changed", "dot"),
+    ("git-savvy-gutter-removed", "markup.deleted", "dot"),
+)
+INDEX_BLOB_CACHE_SIZE = 32
+
+gutter_diff_states = {}
+# blob object name -> lines of the blob
+index_blobs = OrderedDict()
+index_blobs_lock = threading.Lock()
+
+
+class GutterDiffState:
+
+    """
+    Per-view state: the `.git/index` the blob was looked up for, identified
+    by its modification time and size, and the lines of the file in the
+    index, or None if the file is not in the index.
+    """
+
+    def __init__(self):
+        self.index_stat = None
+        self.index_lines = None
+
+
+def is_enabled(view):
+    return bool(view.file_name()) and view.settings().get("git_savvy.gutter_diff", False)
+
+
+def clear_markers(view):
+    for key, _, _ in GUTTER_REGIONS:
+        view.erase_regions(key)
+
+
+def split_lines(text):
+    return [line.rstrip("\r") for line in text.split("\n")]
+
+
+class GsGutterDiffToggleCommand(TextCommand):
+
+    """
+    Toggle gutter change markers for the current file view.
+    """
+
+    def run(self, edit):
+        settings = self.view.settings()
+        enabled = not settings.get("git_savvy.gutter_diff", False)
+        settings.set("git_savvy.gutter_diff", enabled)
+
+        if enabled:
+            self.view.run_command("gs_gutter_diff_refresh")
+        else:
+            util.debounce.cancel(("gutter_diff", self.view.id()))
+            gutter_diff_states.pop(self.view.id(), None)
+            clear_markers(self.view)
+
+        self.view.window().status_message(
+            "Gutter diff is now {}.".format("on" if enabled else "off"))
+
+    def is_enabled(self):
+        return bool(self.view.file_name())
+
+
+class GsGutterDiffRefreshCommand(TextCommand, GitCommand):
+
+    """
+    Diff the buffer against the file in the index and mark the changed
+    lines in the gutter.
+    """
+
+    def run(self, edit):
+        sublime.set_timeout_async(self.run_async, 0)
+
+    def run_async(self):
+        view = self.view
+        if not view.is_valid() or not is_enabled(view):
+            return
+
+        state = gutter_diff_states.setdefault(view.id(), GutterDiffState())
+        index_lines = self.get_index_lines(state)
+        if index_lines is None:
+            clear_markers(view)
+            return
+
+        change_count = view.change_count()
+        buffer_lines = split_lines(view.substr(sublime.Region(0, view.size())))
+        hunks = self.line_hunks(index_lines, buffer_lines)
+
+        # The buffer changed while diffing; the next debounced refresh will
+        # draw the markers.
+        if view.change_count() != change_count or not is_enabled(view):
+            return
+
+        for (key, scope, icon), rows in zip(GUTTER_REGIONS, change_markers(hunks)):
+            regions = [view.line(view.text_point(row, 0)) for row in rows]
+            view.add_regions(
+                key, regions, scope, icon,
+                sublime.DRAW_NO_FILL | sublime.DRAW_NO_OUTLINE)
+
+    def get_index_lines(self, state):
+        """
+        Return the lines of the file in the index, or None if it is not in
+        the index.  Git is only asked for the blob if `.git/index` changed
+        since the last call, and only reads the blob if it is not cached.
+        """
+        try:
+            git_dir, _ = self.read_git_dirs()
+            index_stat = os.stat(os.path.join(git_dir, "index"))
+        except (OSError, ValueError, RuntimeError):
+            return None
+
+        index_stat = (index_stat.st_mtime, index_stat.st_size)
+        if index_stat == state.index_stat:
+            return state.index_lines
+        state.index_stat = index_stat
+        state.index_lines = None
+
+        # `<mode> <object> <stage>\t<path>`, with one line per stage for
+        # conflicted files, which are not diffed.
+        entries = self.git("ls-files", "-s", "--", self.file_path, throw_on_stderr=False).splitlines()
+        if len(entries) != 1:
+            return None
+        object_name = entries[0].split()[1]
+
+        with index_blobs_lock:
+            lines = index_blobs.get(object_name)
+            if lines is not None:
+                index_blobs.move_to_end(object_name)
+
+        if lines is None:
+            content = self.git("cat-file", "blob", object_name, throw_on_stderr=False, decode=False)
+            lines = split_lines(content.decode("utf-8", "replace"))
+            with index_blobs_lock:
+                index_blobs[object_name] = lines
+                while len(index_blobs) > INDEX_BLOB_CACHE_SIZE:
+                    index_blobs.popitem(last=False)
+
+        state.index_lines = lines
+        return lines
+
+
+class GsGutterDiffEventListener(EventListener, SettingsMixin):
+
+    """
+    Keep the gutter markers up to date: re-diff after edits (debounced),
+    and when the view is activated or saved, as the index may have changed.
+    """
+
+    def on_activated_async(self, view):
+        if not view.file_name():
+            return
+
+        settings = view.settings()
+        if settings.get("git_savvy.gutter_diff") is None:
+            if not self.savvy_settings.get("gutter_diff"):
+                return
+            settings.set("git_savvy.gutter_diff", True)
+
+        if is_enabled(view):
+            view.run_command("gs_gutter_diff_refresh")
+
+    def on_post_save_async(self, view):
+        if is_enabled(view):
+            view.run_command("gs_gutter_diff_refresh")
+
+    def on_modified_async(self, view):
+        if not is_enabled(view):
+            return
+
+        delay = self.savvy_settings.get("gutter_diff_debounce_delay", 250)
+        util.debounce.debounce(
+            ("gutter_diff", view.id()),
+            delay,
+            lambda: view.run_command("gs_gutter_diff_refresh"))
+
+    def on_close(self, view):
+        util.debounce.cancel(("gutter_diff", view.id()))
+        gutter_diff_states.pop(view.id(), None)
@@ -0,0 +1,341 @@
+"""
+Annotate a regular file view with blame information.  Only the lines in
+(or close to) the viewport are blamed, using `git blame -L`, and the
+results are cached until the buffer changes.
+"""
+
+from html import escape
+
+import sublime
+from sublime_plugin import TextCommand, EventListener
+
+from ..exceptions import GitSavvyError
+from ..git_command import GitCommand
+from ..settings import SettingsMixin
+from ...common import util
+from ...common.util.parse_blame import NOT_COMMITED_HASH
+
+
+INLINE_BLAME_TEMPLATE = """
+<body id="gs-inline-blame">
+    <style>
+        div {{
+            color: color(var(--foreground) alpha(0.5));
+            padding-left: 2em;
+        }}
+    </style>
+    <div>{text}</div>
+</body>
+"""
+
+# How often (ms) the viewport of an annotated view is checked for scrolling.
+VIEWPORT_POLL_INTERVAL = 250
+
+# Delay (ms) between the viewport coming to rest and the blame request.
+SCROLL_DEBOUNCE_DELAY = 100
+
+inline_blame_states = {}
+watched_views = set()
+
+
+class InlineBlameState:
+
+    """
+    Per-view cache of blamed lines (0-based row -> commit hash) and commit
+    metadata (commit hash -> summary text).  Line attributions are only
+    valid for the `change_count` they were computed for; commit metadata is
+    immutable and survives edits.  A file outside of any repository is
+    never blamed again until inline blame is toggled.
+    """
+
+    def __init__(self):
+        self.change_count = None
+        self.lines = {}
+        self.commits = {}
+        self.phantom_set = None
+        self.failed = False
+        self.outside_repo = False
+
+    def reset_lines(self, change_count):
+        self.change_count = change_count
+        self.lines = {}
+        self.failed = False
+
+
+def get_state(view):
+    state = inline_blame_states.get(view.id())
+    if state is None:
+        state = inline_blame_states[view.id()] = InlineBlameState()
+        state.phantom_set = sublime.PhantomSet(view, "git_savvy_inline_blame")
+    return state
+
+
+def is_enabled(view):
+    return bool(view.file_name()) and view.settings().get("git_savvy.inline_blame", False)
+
+
+def watch_viewport(view, last_region=None):
+    """
+    Sublime has no scroll event, so poll the visible region of the view
+    while it is the active view and re-blame whenever it comes to rest on
+    new lines.
+    """
+    window = view.window()
+    if (not view.is_valid() or not is_enabled(view) or
+            not window or window.active_view() != view):
+        watched_views.discard(view.id())
+        return
+
+    region = view.visible_region()
+    if last_region is not None and region != last_region:
+        util.debounce.debounce(
+            ("inline_blame", view.id()),
+            SCROLL_DEBOUNCE_DELAY,
+            lambda: view.run_command("gs_inline_blame_refresh"))
+
+    sublime.set_timeout_async(lambda: watch_viewport(view, region), VIEWPORT_POLL_INTERVAL)
+
+
+def start_watching(view):
+    if view.id() in watched_views:
+        return
+    watched_views.add(view.id())
+    watch_viewport(view)
+
+
+class GsInlineBlameToggleCommand(TextCommand):
+
+    """
+    Toggle inline blame annotations for the current file view.
+    """
+
+    def run(self, edit):
+        settings = self.view.settings()
+        enabled = not settings.get("git_savvy.inline_blame", False)
+        settings.set("git_savvy.inline_blame", enabled)
+
+        if enabled:
+            self.view.run_command("gs_inline_blame_refresh")
+            start_watching(self.view)
+        else:
+            util.debounce.cancel(("inline_blame", self.view.id()))
+            state = inline_blame_states.pop(self.view.id(), None)
+            if state:
+                state.phantom_set.update([])
+
+        self.view.window().status_message(
+            "Inline blame is now {}.".format("on" if enabled else "off"))
+
+    def is_enabled(self):
+        return bool(self.view.file_name())
+
+
+class GsInlineBlameRefreshCommand(TextCommand, GitCommand):
+
+    """
+    Blame the visible lines of the view which are not cached yet and
+    render the annotations.
+    """
+
+    def run(self, edit):
+        sublime.set_timeout_async(self.run_async, 0)
+
+    def run_async(self):
+        view = self.view
+        if not view.is_valid() or not is_enabled(view):
+            return
+
+        state = get_state(view)
+        if state.outside_repo:
+            return
+
+        # Resolve the repo up front: `self.git` would offer to init one and
+        # open the output panel on every activation and edit instead.
+        try:
+            self.repo_path
+        except RuntimeError:
+            return
+        except (ValueError, GitSavvyError):
+            state.outside_repo = True
+            return
+
+        change_count = view.change_count()
+        if state.change_count != change_count:
+            state.reset_lines(change_count)
+
+        if state.failed:
+            return
+
+        first_row, last_row = self.get_rows_to_blame()
+        missing_ranges = self.get_missing_ranges(state, first_row, last_row)
+
+        if missing_ranges:
+            blamed = self.blame_ranges(missing_ranges)
+            if blamed is None:
+                state.failed = True
+                state.phantom_set.update([])
+                return
+
+            # The buffer changed while git was running; line numbers are
+            # stale, the next debounced refresh will try again.
+            if view.change_count() != change_count:
+                return
+
+            blamed_lines, commits = blamed
+            for commit_hash, commit in commits.items():
+                if commit_hash not in state.commits and "summary" in commit:
+                    state.commits[commit_hash] = self.format_commit(commit)
+            for line in blamed_lines:
+                state.lines[line.final_lineno - 1] = line.commit_hash
+
+        self.render(state)
+
+    def get_rows_to_blame(self):
+        """
+        Return the first and last 0-based row to blame, which is the visible
+        region extended by half a screen in both directions.
+        """
+        visible = self.view.visible_region()
+        first_row, _ = self.view.rowcol(visible.begin())
+        last_row, _ = self.view.rowcol(visible.end())
+        margin = (last_row - first_row) // 2
+
+        line_count = self.get_line_count()
+        return max(0, first_row - margin), min(line_count - 1, last_row + margin)
+
+    def get_line_count(self):
+        """
+        Return the number of lines as Git counts them, i.e. a trailing
+        newline does not start a new line.
+        """
+        size = self.view.size()
+        last_row, _ = self.view.rowcol(size)
+        if size and self.view.substr(size - 1) == "\n":
+            return last_row
+        return last_row + 1
+
+    @staticmethod
+    def get_missing_ranges(state, first_row, last_row):
+        """
+        Return a list of (first_row, last_row) tuples covering the rows in the
+        given range which have not been blamed yet.
+        """
+        ranges = []
+        start = None
+        for row in range(first_row, last_row + 1):
+            if row in state.lines:
+                if start is not None:
+                    ranges.append((start, row - 1))
+                    start = None
+            elif start is None:
+                start = row
+        if start is not None:
+            ranges.append((start, last_row))
+        return ranges
+
+    def blame_ranges(self, ranges):
+        """
+        Blame the given row ranges in one `git blame` call.  If the buffer has
+        unsaved changes, its content is handed to Git with `--contents` so
+        that line numbers match what the user sees.
+        """
+        line_args = []
+        for first_row, last_row in ranges:
+            line_args += ["-L", "{},{}".format(first_row + 1, last_row + 1)]
+
+        dirty = self.view.is_dirty()
+        stdin = self.view.substr(sublime.Region(0, self.view.size())) if dirty else None
+
+        args = ["blame", "--porcelain"] + line_args
+        if dirty:
+            args += ["--contents", "-"]
+        args += ["--", self.file_path]
+
+        stdout = self.git(*args, stdin=stdin, throw_on_stderr=False, decode=False)
+        if not stdout:
+            return None
+
+        return util.parse_blame(stdout)
+
+    @staticmethod
+    def format_commit(commit):
+        if commit["long_hash"] == NOT_COMMITED_HASH:
+            return "Not committed yet"
+
+        summary = commit["summary"]
+        if len(summary) > 50:
+            summary = summary[:46] + " ..."
+        time_stamp = util.dates.fuzzy(commit["author-time"]) if commit["author-time"] else ""
+        return "{}, {} • {}".format(commit["author"], time_stamp, summary)
+
+    def render(self, state):
+        """
+        Annotate the first line of every blame chunk which is in view.
+        """
+        first_row, last_row = self.get_rows_to_blame()
+        phantoms = []
+        previous_hash = None
+
+        for row in range(first_row, last_row + 1):
+            commit_hash = state.lines.get(row)
+            if commit_hash is None or commit_hash == previous_hash:
+                previous_hash = commit_hash
+                continue
+            previous_hash = commit_hash
+
+            text = state.commits.get(commit_hash)
+            if not text:
+                continue
+
+            line = self.view.line(self.view.text_point(row, 0))
+            phantoms.append(sublime.Phantom(
+                sublime.Region(line.end()),
+                INLINE_BLAME_TEMPLATE.format(text=escape(text)),
+                sublime.LAYOUT_INLINE
+            ))
+
+        state.phantom_set.update(phantoms)
+
+
+class GsInlineBlameEventListener(EventListener, SettingsMixin):
+
+    """
+    Keep inline blame annotations up to date: re-blame after edits (debounced)
+    and when the view is activated, and start watching its viewport.
+    """
+
+    def on_activated_async(self, view):
+        if not view.file_name():
+            return
+
+        settings = view.settings()
+        if settings.get("git_savvy.inline_blame") is None:
+            if not self.savvy_settings.get("inline_blame"):
+                return
+            settings.set("git_savvy.inline_blame", True)
+
+        if not is_enabled(view):
+            return
+
+        # Commits may have been made in the meantime.
+        state = inline_blame_states.get(view.id())
+        if state:
+            state.reset_lines(None)
+
+        view.run_command("gs_inline_blame_refresh")
+        start_watching(view)
+
+    def on_modified_async(self, view):
+        if not is_enabled(view):
+            return
+
+        delay = self.savvy_settings.get("inline_blame_debounce_delay", 500)
+        util.debounce.debounce(
+            ("inline_blame", view.id()),
+            delay,
+            lambda: view.run_command("gs_inline_blame_refresh"))
+
+    def on_close(self, view):
+        util.debounce.cancel(("inline_blame", view.id()))
+        inline_blame_states.pop(view.id(), None)
+        watched_views.discard(view.id())
@@ -1,5 +1,7 @@
 import os
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
+import json
+import threading
 
 import sublime
 from sublime_plugin import WindowCommand, TextCommand, EventListener
@@ -10,6 +12,7 @@ from ...common.theme_generator import XMLThemeGenerator, JSONThemeGenerator
 from ..git_command import GitCommand
 from ..constants import MERGE_CONFLICT_PORCELAIN_STATUSES
 from ...common.util import debug
+from ...common.util.parse_diff import build_partial_patch
 
 HunkReference = namedtuple("HunkReference", ("section_start", "section_end", "hunk", "line_types", "lines"))
 
@@ -24,6 +27,11 @@ DIFF_HEADER = """diff --git a/{path} b/{path}
 
 inline_diff_views = {}
 diff_view_hunks = {}
+# color scheme name -> ((original color scheme, colors), color scheme path)
+generated_color_schemes = {}
+# view id -> [(hunks, reset, selected lines), ...]
+pending_stages = {}
+pending_stages_lock = threading.Lock()
 
 
 class GsInlineDiffCommand(WindowCommand, GitCommand):
@@ -90,10 +98,21 @@ class GsInlineDiffCommand(WindowCommand, GitCommand):
         Given a target view, generate a new color scheme from the original with
         additional inline-diff-related style rules added.  Save this color scheme
         to disk and set it as the target view's active color scheme.
+
+        A color scheme is only generated once per session for every original
+        color scheme, `colors` setting and file extension.
         """
         colors = self.savvy_settings.get("colors")
 
         original_color_scheme = target_view.settings().get("color_scheme")
+        theme_name = "active-diff-view." + file_ext
+        key = (original_color_scheme, json.dumps(colors["inline_diff"], sort_keys=True))
+        cached = generated_color_schemes.get(theme_name)
+        if cached and cached[0] == key and os.path.exists(
+                os.path.join(os.path.dirname(sublime.packages_path()), cached[1])):
+            target_view.settings().set("color_scheme", cached[1])
+            return
+
         if original_color_scheme.endswith(".tmTheme"):
             themeGenerator = XMLThemeGenerator(original_color_scheme)
         else:
@@ -122,7 +141,8 @@ class GsInlineDiffCommand(WindowCommand, GitCommand):
             background=colors["inline_diff"]["remove_background_bold"],
             foreground=colors["inline_diff"]["remove_foreground_bold"]
         )
-        themeGenerator.apply_new_theme("active-diff-view." + file_ext, target_view)
+        theme_path = themeGenerator.apply_new_theme(theme_name, target_view)
+        generated_color_schemes[theme_name] = (key, theme_path)
 
 
 class GsInlineDiffRefreshCommand(TextCommand, GitCommand):
@@ -349,29 +369,55 @@ class GsInlineDiffStageOrResetBase(TextCommand, GitCommand):
 
     """
     Base class for any stage or reset operation in the inline-diff view.
-    Determine the line number of the current cursor location, and use that
-    to determine what diff to apply to the file (implemented in subclass).
+    Determine the line numbers covered by the cursors and selections, and
+    use them to determine which changes to apply (implemented in subclass).
+
+    Stage and reset requests are queued and applied in the background; all
+    requests queued by then are combined into a single patch, so that they
+    are applied with one `git apply`, followed by one refresh, and undone
+    as one.
     """
 
-    def run(self, edit, **kwargs):
-        sublime.set_timeout_async(lambda: self.run_async(**kwargs), 0)
+    def run(self, edit, reset=False):
+        hunks = diff_view_hunks.get(self.view.id())
+        if not hunks:
+            return
+
+        line_numbers = set()
+        for region in self.view.sel():
+            first_row = self.view.rowcol(region.begin())[0]
+            last_row, last_col = self.view.rowcol(region.end())
+            # A selection of whole lines ends at the start of the next one.
+            if not region.empty() and last_col == 0 and last_row > first_row:
+                last_row -= 1
+            # Git lines are 1-indexed; Sublime rows are 0-indexed.
+            line_numbers.update(range(first_row + 1, last_row + 2))
+
+        selected = self.get_selected_lines(hunks, line_numbers)
+        if not selected:
+            return
+
+        with pending_stages_lock:
+            pending_stages.setdefault(self.view.id(), []).append((hunks, reset, selected))
+        sublime.set_timeout_async(self.apply_pending_stages, 0)
+
+    def apply_pending_stages(self):
+        with pending_stages_lock:
+            batches = pending_stages.pop(self.view.id(), [])
+        hunks = diff_view_hunks.get(self.view.id())
+        # Requests made against an older rendering of the diff would point
+        # at the wrong lines.
+        batches = [batch for batch in batches if batch[0] is hunks]
+        if not batches:
+            return
 
-    def run_async(self, reset=False):
         in_cached_mode = self.view.settings().get("git_savvy.inline_diff_view.in_cached_mode")
         ignore_ws = (
             "--ignore-whitespace"
             if self.savvy_settings.get("inline_diff_ignore_eol_whitespaces", True)
             else None
         )
-        selections = self.view.sel()
-        region = selections[0]
-        # For now, only support staging selections of length 0.
-        if len(selections) > 1 or not region.empty():
-            return
-
-        # Git lines are 1-indexed; Sublime rows are 0-indexed.
-        line_number = self.view.rowcol(region.begin())[0] + 1
-        diff_lines = self.get_diff_from_line(line_number, reset)
+        encoding = self.view.settings().get('git_savvy.inline_diff.encoding', 'UTF-8')
 
         rel_path = self.get_rel_path()
         if os.name == "nt":
@@ -379,185 +425,102 @@ class GsInlineDiffStageOrResetBase(TextCommand, GitCommand):
             rel_path = rel_path.replace("\\", "/")
         header = DIFF_HEADER.format(path=rel_path)
 
-        full_diff = header + diff_lines + "\n"
-
-        # The three argument combinations below result from the following
-        # three scenarios:
-        #
-        # 1) The user is in non-cached mode and wants to stage a line/hunk, so
-        #    do NOT apply the patch in reverse, but do apply it only against
-        #    the cached/indexed file (not the working tree).
-        # 2) The user is in non-cached mode and wants to undo a line/hunk, so
-        #    DO apply the patch in reverse, and do apply it both against the
-        #    index and the working tree.
-        # 3) The user is in cached mode and wants to undo a line/hunk, so DO
-        #    apply the patch in reverse, but only apply it against the cached/
-        #    indexed file.
-        #
-        # NOTE: When in cached mode, the action taken will always be to apply
-        #       the patch in reverse only to the index.
-
-        args = [
-            "apply",
-            "--unidiff-zero",
-            "--reverse" if (reset or in_cached_mode) else None,
-            "--cached" if (not reset or in_cached_mode) else None,
-            ignore_ws,
-            "-"
-        ]
-        encoding = self.view.settings().get('git_savvy.inline_diff.encoding', 'UTF-8')
+        # In cached mode, every action unstages.  Otherwise, staging changes
+        # only the index and resetting only the working tree, so both can be
+        # applied against the same diff.
+        selected_by_reset = OrderedDict()
+        for _, reset, selected in batches:
+            selected_by_reset.setdefault(bool(reset and not in_cached_mode), set()).update(selected)
+
+        # Further requests have to wait for the refreshed diff.
+        diff_view_hunks[self.view.id()] = list(hunks)
+
+        # The patches applied, recorded for undo even if a later one fails.
+        applied = []
+        try:
+            for reset, selected in selected_by_reset.items():
+                reverse = bool(reset or in_cached_mode)
+                patch = build_partial_patch(
+                    [hunk_ref.hunk for hunk_ref in hunks], selected, reverse)
+                if not patch:
+                    continue
+                full_diff = header + patch + "\n"
+
+                # The three argument combinations below result from the following
+                # three scenarios:
+                #
+                # 1) The user is in non-cached mode and wants to stage lines/hunks,
+                #    so do NOT apply the patch in reverse, but do apply it only
+                #    against the cached/indexed file (not the working tree).
+                # 2) The user is in non-cached mode and wants to undo lines/hunks,
+                #    so DO apply the patch in reverse, and apply it only against
+                #    the working tree.
+                # 3) The user is in cached mode and wants to undo lines/hunks, so
+                #    DO apply the patch in reverse, but only apply it against the
+                #    cached/indexed file.
+                #
+                # NOTE: When in cached mode, the action taken will always be to apply
+                #       the patch in reverse only to the index.
+
+                args = [
+                    "apply",
+                    "--unidiff-zero",
+                    "--reverse" if reverse else None,
+                    "--cached" if (not reset or in_cached_mode) else None,
+                    ignore_ws,
+                    "-"
+                ]
+
+                self.git(*args, stdin=full_diff, stdin_encoding=encoding)
+                applied.append((args, full_diff, encoding))
+        finally:
+            if applied:
+                self.save_to_history(applied)
 
-        self.git(*args, stdin=full_diff, stdin_encoding=encoding)
-        self.save_to_history(args, full_diff, encoding)
         self.view.run_command("gs_inline_diff_refresh")
 
-    def save_to_history(self, args, full_diff, encoding):
+    def save_to_history(self, applied):
         """
-        After successful `git apply`, save the apply-data into history
-        attached to the view, for later Undo.
+        After successful `git apply`s, save the apply-data into history
+        attached to the view, for later Undo.  The patches of one batch
+        make up a single entry, undone together.
         """
         history = self.view.settings().get("git_savvy.inline_diff.history") or []
-        history.append((args, full_diff, encoding))
+        history.append(applied)
         self.view.settings().set("git_savvy.inline_diff.history", history)
 
 
 class GsInlineDiffStageOrResetLineCommand(GsInlineDiffStageOrResetBase):
 
     """
-    Given a line number, generate a diff of that single line in the active
-    file, and apply that diff to the file.  If the `reset` flag is set to
-    `True`, apply the patch in reverse (reverting that line to the version
-    in HEAD).
+    Stage the changed lines under the cursors or selections.  If the `reset`
+    flag is set to `True`, apply the patch in reverse (reverting those lines
+    to the version in the index).
     """
 
-    def get_diff_from_line(self, line_no, reset):
-        hunks = diff_view_hunks[self.view.id()]
-        add_length_earlier_in_diff = 0
-        cur_hunk_begin_on_minus = 0
-        cur_hunk_begin_on_plus = 0
-
-        # Find the correct hunk.
-        for hunk_ref in hunks:
-            if hunk_ref.section_start <= line_no and hunk_ref.section_end >= line_no:
-                break
-            else:
-                # we loop through all hooks before selected hunk.
-                # used create a correct diff when stage, unstage
-                # need to make undo work properly.
-                for type in hunk_ref.line_types:
-                    if type == "+":
-                        add_length_earlier_in_diff += 1
-                    elif type == "-":
-                        add_length_earlier_in_diff -= 1
-                    else:
-                        # should never happen that it will raise.
-                        raise ValueError('type have to be eather "+" or "-"')
-
-        # Correct hunk not found.
-        else:
-            return
-
-        section_start = hunk_ref.section_start + 1
-
-        # Determine head/staged starting line.
-        index_in_hunk = line_no - section_start
-        line = hunk_ref.lines[index_in_hunk]
-        line_type = hunk_ref.line_types[index_in_hunk]
-
-        # need to make undo work properly when undoing
-        # a specific line.
-        for type in hunk_ref.line_types[:index_in_hunk]:
-            if type == "-":
-                cur_hunk_begin_on_minus += 1
-            else:
-                # type will be +
-                cur_hunk_begin_on_plus += 1
-
-        # Removed lines are always first with `git diff -U0 ...`. Therefore, the
-        # line to remove will be the Nth line, where N is the line index in the hunk.
-        head_start = hunk_ref.hunk.head_start if line_type == "+" else hunk_ref.hunk.head_start + index_in_hunk
-
-        if reset:
-            xhead_start = head_start - index_in_hunk + (0 if line_type == "+" else add_length_earlier_in_diff)
-            xnew_start = head_start - cur_hunk_begin_on_minus + index_in_hunk + add_length_earlier_in_diff - 1
-
-            return (
-                "@@ -{head_start},{head_length} +{new_start},{new_length} @@\n"
-                "{line_type}{line}").format(
-                head_start=(xhead_start if xhead_start >= 0 else cur_hunk_begin_on_plus),
-                head_length="0" if line_type == "+" else "1",
-                # If head_length is zero, diff will report original start position
-                # as one less than where the content is inserted, for example:
-                #   @@ -75,0 +76,3 @@
-                new_start=xhead_start + (1 if line_type == "+" else 0),
-
-                new_length="1" if line_type == "+" else "0",
-                line_type=line_type,
-                line=line
-            )
-
-        else:
-            head_start += 1
-            return (
-                "@@ -{head_start},{head_length} +{new_start},{new_length} @@\n"
-                "{line_type}{line}").format(
-                head_start=head_start + (-1 if line_type == "-" else 0),
-                head_length="0" if line_type == "+" else "1",
-                # If head_length is zero, diff will report original start position
-                # as one less than where the content is inserted, for example:
-                #   @@ -75,0 +76,3 @@
-                new_start=head_start + (-1 if line_type == "-" else 0),
-                new_length="1" if line_type == "+" else "0",
-                line_type=line_type,
-                line=line
-            )
+    def get_selected_lines(self, hunks, line_numbers):
+        selected = set()
+        for hunk_idx, hunk_ref in enumerate(hunks):
+            for line_no in range(hunk_ref.section_start + 1, hunk_ref.section_end + 1):
+                if line_no in line_numbers:
+                    selected.add((hunk_idx, line_no - hunk_ref.section_start - 1))
+        return selected
 
 
 class GsInlineDiffStageOrResetHunkCommand(GsInlineDiffStageOrResetBase):
 
     """
-    Given a line number, generate a diff of the hunk containing that line,
-    and apply that diff to the file.  If the `reset` flag is set to `True`,
-    apply the patch in reverse (reverting that hunk to the version in HEAD).
+    Stage the hunks containing the cursors or touched by the selections.  If
+    the `reset` flag is set to `True`, apply the patch in reverse (reverting
+    those hunks to the version in the index).
     """
 
-    def get_diff_from_line(self, line_no, reset):
-        hunks = diff_view_hunks[self.view.id()]
-        add_length_earlier_in_diff = 0
-
-        # Find the correct hunk.
-        for hunk_ref in hunks:
-            if hunk_ref.section_start <= line_no and hunk_ref.section_end >= line_no:
-                break
-            else:
-                # we loop through all hooks before selected hunk.
-                # used create a correct diff when stage, unstage
-                # need to make undo work properly.
-                for type in hunk_ref.line_types:
-                    if type == "+":
-                        add_length_earlier_in_diff += 1
-                    elif type == "-":
-                        add_length_earlier_in_diff -= 1
-                    else:
-                        # should never happen that it will raise.
-                        raise ValueError('type have to be eather "+" or "-"')
-
-        # Correct hunk not found.
-        else:
-            return
-
-        stand_alone_header = \
-            "@@ -{head_start},{head_length} +{new_start},{new_length} @@".format(
-                head_start=hunk_ref.hunk.head_start + (add_length_earlier_in_diff if reset else 0),
-                head_length=hunk_ref.hunk.head_length,
-                # If head_length is zero, diff will report original start position
-                # as one less than where the content is inserted, for example:
-                #   @@ -75,0 +76,3 @@
-                new_start=hunk_ref.hunk.head_start + (0 if hunk_ref.hunk.head_length else 1),
-                new_length=hunk_ref.hunk.saved_length
-            )
-
-        return "\n".join([stand_alone_header] + hunk_ref.hunk.raw_lines[1:])
+    def get_selected_lines(self, hunks, line_numbers):
+        selected = set()
+        for hunk_idx, hunk_ref in enumerate(hunks):
+            if any(hunk_ref.section_start <= line_no <= hunk_ref.section_end for line_no in line_numbers):
+                selected.update((hunk_idx, line_idx) for line_idx in range(len(hunk_ref.line_types)))
+        return selected
 
 
 class GsInlineDiffOpenFile(TextCommand):
@@ -649,11 +612,11 @@ class GsInlineDiffUndo(TextCommand, GitCommand):
         if not history:
             return
 
-        last_args, last_stdin, encoding = history.pop()
-        # Toggle the `--reverse` flag.
-        last_args[2] = "--reverse" if not last_args[2] else None
-
-        self.git(*last_args, stdin=last_stdin, stdin_encoding=encoding)
+        # Undo the patches of the last batch in the opposite order.
+        for last_args, last_stdin, encoding in reversed(history.pop()):
+            # Toggle the `--reverse` flag.
+            last_args[2] = "--reverse" if not last_args[2] else None
+            self.git(*last_args, stdin=last_stdin, stdin_encoding=encoding)
         self.view.settings().set("git_savvy.inline_diff.history", history)
 
         self.view.run_command("gs_inline_diff_refresh")
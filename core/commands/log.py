@@ -1,5 +1,4 @@
 from copy import deepcopy
-import re
 
 from sublime_plugin import WindowCommand
 import sublime
@@ -7,7 +6,13 @@ import sublime
 from ...common import util
 from ..git_command import GitCommand
 from ..ui_mixins.quick_panel import PanelActionMixin, PanelCommandMixin
-from ..ui_mixins.quick_panel import show_log_panel, show_branch_panel
+from ..ui_mixins.quick_panel import show_log_panel, show_branch_panel, show_author_panel
+from .show_commit_info import cancel_commit_info
+
+
+# Number of commits above and below the highlighted one whose info is
+# loaded in the background.
+PREFETCH_COMMIT_COUNT = 2
 
 
 class LogMixin(object):
@@ -28,7 +33,7 @@ class LogMixin(object):
 
     def run_async(self, file_path=None, **kwargs):
         follow = self.savvy_settings.get("log_follow_rename") if file_path else False
-        show_log_panel(
+        self._log_panel = show_log_panel(
             self.log_generator(file_path=file_path, follow=follow, **kwargs),
             lambda commit: self.on_done(commit, file_path=file_path, **kwargs),
             selected_index=self.selected_index,
@@ -36,7 +41,10 @@ class LogMixin(object):
         )
 
     def on_done(self, commit, **kwargs):
-        sublime.active_window().run_command("hide_panel", {"panel": "output.show_commit_info"})
+        window = sublime.active_window()
+        util.debounce.cancel(("log_commit_info", window.id()))
+        cancel_commit_info(window)
+        window.run_command("hide_panel", {"panel": "output.show_commit_info"})
         if commit:
             self.do_action(commit, **kwargs)
 
@@ -49,8 +57,34 @@ class LogMixin(object):
             window = self.window
         else:
             window = self.view.window()
-        window.run_command(
-            "gs_show_commit_info", {"commit_hash": commit, "file_path": file_path})
+
+        args = {
+            "commit_hash": commit,
+            "file_path": file_path,
+            "prefetch": self.get_neighbor_commits(commit)
+        }
+        util.debounce.debounce(
+            ("log_commit_info", window.id()),
+            self.savvy_settings.get("log_commit_info_delay", 100),
+            lambda: window.run_command("gs_show_commit_info", args))
+
+    def get_neighbor_commits(self, commit):
+        """
+        Return the commits next to `commit` in the log panel, closest first.
+        """
+        log_panel = getattr(self, "_log_panel", None)
+        commits = log_panel.ret_list if log_panel else []
+        try:
+            index = commits.index(commit)
+        except ValueError:
+            return []
+
+        neighbors = []
+        for distance in range(1, PREFETCH_COMMIT_COUNT + 1):
+            for neighbor_index in (index + distance, index - distance):
+                if 0 <= neighbor_index < len(commits):
+                    neighbors.append(commits[neighbor_index])
+        return neighbors
 
     def do_action(self, commit_hash, **kwargs):
         if hasattr(self, 'window'):
@@ -83,34 +117,12 @@ class GsLogByAuthorCommand(LogMixin, WindowCommand, GitCommand):
     """
 
     def run_async(self, **kwargs):
-        email = self.git("config", "user.email").strip()
-        self._entries = []
-
-        commiter_str = self.git("shortlog", "-sne", "HEAD")
-        for line in commiter_str.split('\n'):
-            m = re.search(r'\s*(\d*)\s*(.*)\s<(.*)>', line)
-            if m is None:
-                continue
-            commit_count, author_name, author_email = m.groups()
-            author_text = "{} <{}>".format(author_name, author_email)
-            self._entries.append((commit_count, author_name, author_email, author_text))
-
-        try:
-            selected_index = (list(line[2] for line in self._entries)).index(email)
-        except ValueError:
-            selected_index = 0
-
-        self.window.show_quick_panel(
-            [entry[3] for entry in self._entries],
-            lambda index: self.on_author_selection(index, **kwargs),
-            flags=sublime.MONOSPACE_FONT,
-            selected_index=selected_index
-        )
+        show_author_panel(lambda author: self.on_author_selection(author, **kwargs))
 
-    def on_author_selection(self, index, **kwargs):
-        if index == -1:
+    def on_author_selection(self, author, **kwargs):
+        if not author:
             return
-        self._selected_author = self._entries[index][3]
+        self._selected_author = author
         super().run_async(**kwargs)
 
     def log(self, **kwargs):
@@ -1,11 +1,13 @@
+from collections import OrderedDict
 import sublime
-from sublime_plugin import WindowCommand, TextCommand
+from sublime_plugin import WindowCommand, TextCommand, EventListener
 import re
+import threading
 from ..git_command import GitCommand
 from .log import GsLogActionCommand, GsLogCommand
 from .navigate import GsNavigate
 from ...common import util
-from ..ui_mixins.quick_panel import show_branch_panel
+from ..ui_mixins.quick_panel import show_branch_panel, show_author_panel
 
 
 COMMIT_NODE_CHAR = "●"
@@ -14,6 +16,304 @@ GRAPH_CHAR_OPTIONS = r" /_\|\-."
 COMMIT_LINE = re.compile(
     "^[{graph_chars}]*[{node_chars}][{graph_chars}]* (?P<commit_hash>[a-f0-9]{{5,40}})".format(
         graph_chars=GRAPH_CHAR_OPTIONS, node_chars=COMMIT_NODE_CHAR_OPTIONS))
+COMMIT_NODE = re.compile(r"^([{}]*)\*".format(GRAPH_CHAR_OPTIONS))
+
+# How often (ms) the viewport of a graph view which is still loading is
+# checked for being close to the end of the loaded commits.
+VIEWPORT_POLL_INTERVAL = 250
+
+# view id -> GraphLoader or LayoutGraphLoader
+graph_loaders = {}
+
+# Number of commit graph layouts kept in memory.
+COMMIT_GRAPH_CACHE_SIZE = 4
+# Authors are mailmapped like in the author panel, whose selection is
+# compared against them.
+COMMIT_GRAPH_FORMAT = "--format=%H%x00%P%x00%h%x00%s%x00%aN%x00%aE%x00%at"
+
+# (repo path, tips, filters) -> CommitGraph
+commit_graphs = OrderedDict()
+commit_graphs_lock = threading.Lock()
+
+
+class GraphLoader:
+
+    """
+    Read the output of a running `git log --graph` process in chunks of
+    commits, so the graph can be shown before the whole history is read.
+    """
+
+    def __init__(self, process, fallback_decode):
+        self.process = process
+        self.fallback_decode = fallback_decode
+        self.commit_count = 0
+        self.done = False
+        self.lock = threading.Lock()
+        # Held while a chunk is read and appended to the view, so that
+        # chunks are appended in the order they were read.
+        self.append_lock = threading.Lock()
+
+    def read_commits(self, count):
+        """
+        Return the next `count` commits (including the graph lines in between)
+        as text, with the commit nodes replaced by `COMMIT_NODE_CHAR`.
+        """
+        lines = []
+        read = 0
+        with self.lock:
+            if self.done:
+                return ""
+
+            for line in iter(self.process.stdout.readline, b""):
+                line, replaced = COMMIT_NODE.subn(r"\1" + COMMIT_NODE_CHAR, self.decode(line))
+                lines.append(line)
+                read += replaced
+                if read >= count:
+                    break
+            else:
+                self._close()
+
+            self.commit_count += read
+        return "".join(lines)
+
+    def decode(self, line):
+        try:
+            return line.decode()
+        except UnicodeDecodeError:
+            return self.fallback_decode(line)
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+    def _close(self):
+        self.done = True
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.stdout.close()
+        self.process.wait()
+
+
+class CommitGraph:
+
+    """
+    The layout and commit info of a history, read incrementally from a
+    `git log --topo-order` process.  Commits are immutable, so for the same
+    tips and filters the layout can be shared by all views and reused on
+    refresh, however it is decorated and filtered.
+    """
+
+    def __init__(self, process, fallback_decode):
+        self.process = process
+        self.fallback_decode = fallback_decode
+        self.layout = util.graph_layout.GraphLayout()
+        # commit hash -> (short hash, subject, author, email, author time)
+        self.commits = {}
+        self.done = False
+        self.lock = threading.Lock()
+        # Number of loaders reading from the graph, and whether it was
+        # dropped from the cache; the process is only closed once both
+        # hold.  Guarded by `commit_graphs_lock`.
+        self.users = 0
+        self.evicted = False
+
+    def ensure(self, count):
+        """
+        Read commits until at least `count` have been laid out, or the
+        history is exhausted.
+        """
+        with self.lock:
+            if self.done or len(self.layout) >= count:
+                return
+
+            for line in iter(self.process.stdout.readline, b""):
+                try:
+                    line = line.decode()
+                except UnicodeDecodeError:
+                    line = self.fallback_decode(line)
+                commit_hash, parents, *info = line.rstrip("\n").split("\x00")
+                self.commits[commit_hash] = tuple(info)
+                self.layout.add(commit_hash, parents.split())
+                if len(self.layout) >= count:
+                    break
+            else:
+                self._close()
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+    def _close(self):
+        self.done = True
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.stdout.close()
+        self.process.wait()
+
+
+def get_commit_graph(key, start_process, fallback_decode):
+    """
+    Return the cached `CommitGraph` for `key`, or start a new one.  The
+    caller must hand it back with `release_commit_graph` when done.
+    """
+    with commit_graphs_lock:
+        graph = commit_graphs.get(key)
+        if graph:
+            commit_graphs.move_to_end(key)
+        else:
+            graph = commit_graphs[key] = CommitGraph(start_process(), fallback_decode)
+            while len(commit_graphs) > COMMIT_GRAPH_CACHE_SIZE:
+                _, evicted = commit_graphs.popitem(last=False)
+                evicted.evicted = True
+                if not evicted.users:
+                    evicted.close()
+        graph.users += 1
+        return graph
+
+
+def release_commit_graph(graph):
+    with commit_graphs_lock:
+        graph.users -= 1
+        if graph.evicted and not graph.users:
+            graph.close()
+
+
+class LayoutGraphLoader:
+
+    """
+    Same interface as `GraphLoader`, but renders the graph from a (cached)
+    `CommitGraph` instead of parsing `git log --graph`.  Refs are decorated
+    and commits filtered by author at render time.
+    """
+
+    def __init__(self, cmd, filters):
+        self.decorations, tips = self.get_refs(cmd)
+        if filters.get("branch"):
+            tips = [cmd.git("rev-parse", filters["branch"]).strip()]
+        elif not filters.get("all_branches"):
+            tips = [tips[0]] if tips else []
+
+        # Show parents as rewritten by path limiting.
+        args = ["log", "--topo-order", "--parents", COMMIT_GRAPH_FORMAT]
+        args += ["--all"] if filters.get("all_branches") else tips
+        file_path = filters.get("file_path")
+        if file_path:
+            args += ["--", file_path]
+
+        key = (cmd.repo_path, tuple(sorted(set(tips))), file_path)
+        self.graph = get_commit_graph(
+            key, lambda: cmd.git_streaming(*args), cmd.decode_stdout)
+        self.commits = self.graph.commits
+
+        author = filters.get("author")
+        self.predicate = (
+            (lambda commit_hash: self.format_author(commit_hash) == author)
+            if author else None)
+        self.commit_count = 0
+        self.done = False
+        self.append_lock = threading.Lock()
+
+    @staticmethod
+    def get_refs(cmd):
+        """
+        Return a dict mapping commit hashes to their decoration, like `%d`,
+        and a list of all commits pointed to by a ref, HEAD first.
+        """
+        head = cmd.git("rev-parse", "-q", "--verify", "HEAD", throw_on_stderr=False).strip()
+        names = {}
+        current_branch = None
+        refs = cmd.git(
+            "for-each-ref", "--format=%(HEAD)%00%(objectname)%00%(*objectname)%00%(refname)")
+        for line in refs.splitlines():
+            is_head, object_hash, peeled_hash, ref = line.split("\x00")
+            commit_hash = peeled_hash or object_hash
+            if ref.startswith("refs/heads/"):
+                name = ref[len("refs/heads/"):]
+                if is_head == "*":
+                    current_branch = name
+                    continue
+            elif ref.startswith("refs/remotes/"):
+                name = ref[len("refs/remotes/"):]
+            elif ref.startswith("refs/tags/"):
+                name = "tag: " + ref[len("refs/tags/"):]
+            else:
+                name = ref
+            names.setdefault(commit_hash, []).append(name)
+
+        if head:
+            names.setdefault(head, []).insert(
+                0, "HEAD -> " + current_branch if current_branch else "HEAD")
+
+        decorations = {
+            commit_hash: " ({})".format(", ".join(ref_names))
+            for commit_hash, ref_names in names.items()
+        }
+        tips = [head] if head else []
+        tips += [commit_hash for commit_hash in names if commit_hash != head]
+        return decorations, tips
+
+    def format_author(self, commit_hash):
+        _, _, author, email, _ = self.commits[commit_hash]
+        return "{} <{}>".format(author, email)
+
+    def format_commit(self, commit_hash):
+        short_hash, subject, author, _, timestamp = self.commits[commit_hash]
+        return "{}{} {} ({}) <{}>".format(
+            short_hash, self.decorations.get(commit_hash, ""), subject,
+            util.dates.fuzzy(timestamp), author)
+
+    def read_commits(self, count):
+        graph = self.graph
+        if self.done or graph is None:
+            return ""
+
+        start = self.commit_count
+        graph.ensure(start + count)
+        stop = min(start + count, len(graph.layout))
+        lines = graph.layout.render(start, stop, self.format_commit, self.predicate)
+        self.commit_count = stop
+        self.done = graph.done and stop == len(graph.layout)
+        return "".join(line + "\n" for line in lines)
+
+    def close(self):
+        # The process belongs to the cached `CommitGraph`, which may still
+        # be used by other views.
+        if self.graph is not None:
+            release_commit_graph(self.graph)
+            self.graph = None
+        self.done = True
+
+
+def close_graph_loader(view_id):
+    loader = graph_loaders.pop(view_id, None)
+    if loader:
+        loader.close()
+
+
+def watch_graph_viewport(view, loader):
+    """
+    Sublime has no scroll event, so poll the visible region of the view
+    while the graph is loading, and load more commits whenever the end of
+    the loaded content comes into (or close to) view.
+    """
+    if graph_loaders.get(view.id()) is not loader or loader.done:
+        return
+    if not view.is_valid():
+        close_graph_loader(view.id())
+        return
+
+    visible = view.visible_region()
+    # Load more once less than a screen of content is left below the viewport.
+    if view.size() - visible.end() <= visible.size():
+        view.run_command("gs_log_graph_load_more")
+
+    sublime.set_timeout_async(lambda: watch_graph_viewport(view, loader), VIEWPORT_POLL_INTERVAL)
+
+
+class GsLogGraphEventListener(EventListener):
+
+    def on_close(self, view):
+        close_graph_loader(view.id())
 
 
 class LogGraphMixin(object):
@@ -36,6 +336,7 @@ class LogGraphMixin(object):
         settings.set("git_savvy.repo_path", repo_path)
         settings.set("git_savvy.file_path", self._file_path)
         settings.set("git_savvy.git_graph_args", self.get_graph_args())
+        settings.set("git_savvy.log_graph_filters", self.get_graph_filters())
         view.set_syntax_file("Packages/GitSavvy/syntax/graph.sublime-syntax")
         view.set_name(self.title)
         view.sel().clear()
@@ -52,11 +353,23 @@ class LogGraphMixin(object):
             args = args + ["--", file_path]
         return args
 
+    def get_graph_filters(self):
+        """
+        Return the filters of `get_graph_args` in a structured form, used
+        when the graph is laid out by GitSavvy itself.
+        """
+        return {
+            "file_path": self.get_rel_path(self._file_path) if self._file_path else None,
+            "follow": bool(self._file_path and self.savvy_settings.get("log_follow_rename"))
+        }
+
 
 class GsLogGraphRefreshCommand(TextCommand, GitCommand):
 
     """
-    Refresh the current graph view with the latest commits.
+    Refresh the current graph view with the latest commits.  Only the first
+    chunk of commits is loaded right away, further chunks are appended by
+    `gs_log_graph_load_more` while the user scrolls down.
     """
 
     def run(self, edit):
@@ -66,12 +379,23 @@ class GsLogGraphRefreshCommand(TextCommand, GitCommand):
         else:
             graph_content = ""
 
-        args = self.view.settings().get("git_savvy.git_graph_args")
-        graph_content += self.git(*args)
-        graph_content = re.sub(
-            r'(^[{}]*)\*'.format(GRAPH_CHAR_OPTIONS),
-            r'\1' + COMMIT_NODE_CHAR, graph_content,
-            flags=re.MULTILINE)
+        # Load at least as many commits as were shown before the refresh.
+        previous_loader = graph_loaders.get(self.view.id())
+        chunk_size = self.savvy_settings.get("graph_commits_per_chunk", 1000)
+        count = max(chunk_size, previous_loader.commit_count if previous_loader else 0)
+        close_graph_loader(self.view.id())
+
+        settings = self.view.settings()
+        filters = settings.get("git_savvy.log_graph_filters")
+        # The layout engine cannot follow renames.
+        if (self.savvy_settings.get("graph_layout_engine") and
+                filters is not None and not filters.get("follow")):
+            loader = LayoutGraphLoader(self, filters)
+        else:
+            args = settings.get("git_savvy.git_graph_args")
+            loader = GraphLoader(self.git_streaming(*args), self.decode_stdout)
+        graph_loaders[self.view.id()] = loader
+        graph_content += loader.read_commits(count)
 
         self.view.run_command("gs_replace_view_text", {"text": graph_content})
         self.view.run_command("gs_log_graph_more_info")
@@ -79,6 +403,38 @@ class GsLogGraphRefreshCommand(TextCommand, GitCommand):
         self.view.run_command("gs_handle_vintageous")
         self.view.run_command("gs_handle_arrow_keys")
 
+        if not loader.done:
+            sublime.set_timeout_async(lambda: watch_graph_viewport(self.view, loader))
+
+
+class GsLogGraphLoadMoreCommand(TextCommand, GitCommand):
+
+    """
+    Append the next chunk of commits to a graph view which has not been
+    loaded completely.  This is the only place chunks are appended after
+    the first one, always on the async thread.  If `navigate` is set, move
+    to the next commit afterwards.
+    """
+
+    def run(self, edit, navigate=False):
+        sublime.set_timeout_async(lambda: self.run_async(navigate))
+
+    def run_async(self, navigate):
+        loader = graph_loaders.get(self.view.id())
+        if not loader:
+            return
+
+        with loader.append_lock:
+            # The graph may have been refreshed in the meantime.
+            if not loader.done and graph_loaders.get(self.view.id()) is loader:
+                text = loader.read_commits(self.savvy_settings.get("graph_commits_per_chunk", 1000))
+                if text:
+                    size = self.view.size()
+                    self.view.run_command("gs_replace_region", {"text": text, "begin": size, "end": size})
+
+        if navigate:
+            self.view.run_command("gs_log_graph_navigate", {"forward": True})
+
 
 class GsLogGraphCurrentBranch(LogGraphMixin, WindowCommand, GitCommand):
     pass
@@ -91,6 +447,11 @@ class GsLogGraphAllBranches(LogGraphMixin, WindowCommand, GitCommand):
         args.append("--all")
         return args
 
+    def get_graph_filters(self):
+        filters = super().get_graph_filters()
+        filters["all_branches"] = True
+        return filters
+
 
 class GsLogGraphByAuthorCommand(LogGraphMixin, WindowCommand, GitCommand):
 
@@ -102,29 +463,12 @@ class GsLogGraphByAuthorCommand(LogGraphMixin, WindowCommand, GitCommand):
     """
 
     def run_async(self):
-        email = self.git("config", "user.email").strip()
-        self._entries = []
-
-        commiter_str = self.git("shortlog", "-sne", "HEAD")
-        for line in commiter_str.split('\n'):
-            m = re.search(r'\s*(\d*)\s*(.*)\s<(.*)>', line)
-            if m is None:
-                continue
-            commit_count, author_name, author_email = m.groups()
-            author_text = "{} <{}>".format(author_name, author_email)
-            self._entries.append((commit_count, author_name, author_email, author_text))
-
-        self.window.show_quick_panel(
-            [entry[3] for entry in self._entries],
-            self.on_author_selection,
-            flags=sublime.MONOSPACE_FONT,
-            selected_index=(list(line[2] for line in self._entries)).index(email)
-        )
-
-    def on_author_selection(self, index):
-        if index == -1:
+        show_author_panel(self.on_author_selection)
+
+    def on_author_selection(self, author):
+        if not author:
             return
-        self._selected_author = self._entries[index][3]
+        self._selected_author = author
         super().run_async()
 
     def get_graph_args(self):
@@ -132,6 +476,11 @@ class GsLogGraphByAuthorCommand(LogGraphMixin, WindowCommand, GitCommand):
         args.insert(1, "--author={}".format(self._selected_author))
         return args
 
+    def get_graph_filters(self):
+        filters = super().get_graph_filters()
+        filters["author"] = self._selected_author
+        return filters
+
 
 class GsLogGraphByBranchCommand(LogGraphMixin, WindowCommand, GitCommand):
 
@@ -148,6 +497,11 @@ class GsLogGraphByBranchCommand(LogGraphMixin, WindowCommand, GitCommand):
         args.append(self._selected_branch)
         return args
 
+    def get_graph_filters(self):
+        filters = super().get_graph_filters()
+        filters["branch"] = self._selected_branch
+        return filters
+
 
 class GsLogGraphCommand(GsLogCommand):
     default_actions = [
@@ -215,10 +569,28 @@ class GsLogGraphNavigateCommand(GsNavigate):
     """
     offset = 0
 
-    def run(self, edit, **kwargs):
-        super().run(edit, **kwargs)
+    def run(self, edit, forward=True, **kwargs):
+        if forward and self.is_at_loaded_end():
+            # Load the next chunk in the background and move on once it is
+            # there, instead of wrapping around.
+            self.view.run_command("gs_log_graph_load_more", {"navigate": True})
+            return
+        super().run(edit, forward=forward, **kwargs)
         self.view.window().run_command("gs_log_graph_more_info")
 
+    def is_at_loaded_end(self):
+        """
+        Return whether the cursor is on the last loaded commit of a graph
+        which has not been loaded completely.
+        """
+        loader = graph_loaders.get(self.view.id())
+        sel = self.view.sel()
+        if not loader or loader.done or not sel:
+            return False
+
+        regions = self.get_available_regions()
+        return not regions or regions[-1].a <= sel[0].a
+
     def get_available_regions(self):
         return self.view.find_by_selector("constant.numeric.graph.commit-hash.git-savvy")
 
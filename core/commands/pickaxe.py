@@ -0,0 +1,223 @@
+import re
+import threading
+import time
+
+import sublime
+from sublime_plugin import WindowCommand, TextCommand
+
+from ..git_command import GitCommand
+from ..ui_mixins.input_panel import show_single_line_input_panel
+from ...common import util
+
+
+PICKAXE_PROMPT = "Search changes for (regex):"
+PICKAXE_TITLE = "PICKAXE: {}"
+PICKAXE_FORMAT = "--format=%H%x00%h%x00%ct%x00%an%x00%s"
+COMMIT_HASH_AT_LINE_START = re.compile(r"^([0-9a-f]{5,40}) ")
+
+# How often (ms) found commits are appended to the results view.
+FLUSH_INTERVAL = 200
+
+# view id -> PickaxeSearch
+pickaxe_searches = {}
+
+
+def format_date(timestamp):
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+
+
+class PickaxeSearch:
+
+    """
+    A running `git log -G` search, possibly split into several processes
+    searching distinct date ranges.  Reader threads collect the matches, which
+    are periodically flushed into the results view.
+    """
+
+    def __init__(self, view, regexp, processes):
+        self.view = view
+        self.regexp = regexp
+        self.processes = processes
+        self.lock = threading.Lock()
+        self.pending = []
+        self.results = []
+        self.running = len(processes)
+        # oldest commit date seen, per process
+        self.progress = [None] * len(processes)
+        self.cancelled = False
+        self.start_time = time.time()
+
+    def start(self):
+        self.replace(0, self.view.size(), self.header(False, []))
+        for idx, process in enumerate(self.processes):
+            threading.Thread(target=lambda idx=idx, process=process: self.read(idx, process)).start()
+        sublime.set_timeout_async(self.flush, FLUSH_INTERVAL)
+
+    def read(self, idx, process):
+        try:
+            for line in iter(process.stdout.readline, b""):
+                if self.cancelled:
+                    break
+                long_hash, short_hash, timestamp, author, subject = \
+                    line.decode("utf-8", "replace").rstrip("\n").split("\x00")
+                timestamp = int(timestamp)
+                with self.lock:
+                    self.pending.append((timestamp, long_hash, short_hash, author, subject))
+                    self.progress[idx] = timestamp
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            process.wait()
+            with self.lock:
+                self.running -= 1
+
+    def cancel(self):
+        self.cancelled = True
+        for process in self.processes:
+            if process.poll() is None:
+                process.kill()
+
+    def flush(self):
+        if not self.view.is_valid():
+            self.cancel()
+            pickaxe_searches.pop(self.view.id(), None)
+            return
+
+        with self.lock:
+            pending, self.pending = self.pending, []
+            running = self.running
+            progress = [timestamp for timestamp in self.progress if timestamp is not None]
+
+        self.results.extend(pending)
+        done = running == 0
+        if done:
+            # Date ranges share their bounds and finish in any order, so
+            # drop duplicates and show the final list newest first.
+            unique = {}
+            for result in self.results:
+                unique.setdefault(result[1], result)
+            self.results = sorted(unique.values(), reverse=True)
+            body = "".join(self.format_result(result) for result in self.results)
+            self.replace(0, self.view.size(), self.header(done, progress) + body)
+            pickaxe_searches.pop(self.view.id(), None)
+            return
+
+        self.replace(0, self.view.line(0).end(), self.header(done, progress).rstrip("\n"))
+        if pending:
+            size = self.view.size()
+            self.replace(size, size, "".join(self.format_result(result) for result in pending))
+        sublime.set_timeout_async(self.flush, FLUSH_INTERVAL)
+
+    def header(self, done, progress):
+        if self.cancelled:
+            state = "cancelled"
+        elif done:
+            state = "done in {:.1f}s".format(time.time() - self.start_time)
+        elif len(self.processes) > 1:
+            state = "searching, {} of {} date ranges done".format(
+                len(self.processes) - self.running, len(self.processes))
+        elif progress:
+            state = "searching, at commits from {}".format(format_date(min(progress)))
+        else:
+            state = "searching"
+        return "Commits changing lines matching /{}/ ({}, {} found)\n\n".format(
+            self.regexp, state, len(self.results))
+
+    @staticmethod
+    def format_result(result):
+        timestamp, _, short_hash, author, subject = result
+        return "{} {} ({}) <{}>\n".format(short_hash, subject, format_date(timestamp), author)
+
+    def replace(self, begin, end, text):
+        self.view.run_command("gs_replace_region", {"text": text, "begin": begin, "end": end})
+
+
+class GsPickaxeSearchCommand(WindowCommand, GitCommand):
+
+    """
+    Search the history of the current branch for commits adding or removing
+    lines matching a regular expression (`git log -G`).  Matches are listed
+    in a results view while the search is running.
+    """
+
+    def run(self, file_path=None, current_file=False):
+        self._file_path = self.file_path if current_file else file_path
+        show_single_line_input_panel(PICKAXE_PROMPT, "", self.on_done)
+
+    def on_done(self, regexp):
+        if regexp:
+            sublime.set_timeout_async(lambda: self.run_async(regexp))
+
+    def run_async(self, regexp):
+        repo_path = self.repo_path
+        view = util.view.get_scratch_view(self, "pickaxe", read_only=True)
+        view.settings().set("git_savvy.repo_path", repo_path)
+        view.set_syntax_file("Packages/GitSavvy/syntax/graph.sublime-syntax")
+        view.set_name(PICKAXE_TITLE.format(regexp))
+
+        processes = [
+            self.git_streaming(
+                "log",
+                "-G", regexp,
+                PICKAXE_FORMAT,
+                "--since=@{}".format(since) if since else None,
+                "--until=@{}".format(until) if until else None,
+                "--" if self._file_path else None,
+                self._file_path)
+            for since, until in self.get_date_ranges()
+        ]
+
+        search = pickaxe_searches[view.id()] = PickaxeSearch(view, regexp, processes)
+        search.start()
+
+    def get_date_ranges(self):
+        """
+        Split the history into `pickaxe_parallel_searches` date ranges of
+        equal length, which are searched in parallel.
+        """
+        count = self.savvy_settings.get("pickaxe_parallel_searches", 1)
+        if count <= 1:
+            return [(None, None)]
+
+        first_commit_dates = self.git(
+            "log", "--max-parents=0", "--format=%ct", "HEAD", throw_on_stderr=False).split()
+        if not first_commit_dates:
+            return [(None, None)]
+
+        first = min(int(timestamp) for timestamp in first_commit_dates)
+        now = int(time.time())
+        step = max(1, (now - first) // count + 1)
+        bounds = [first + idx * step for idx in range(1, count)]
+        # The first and last ranges are open, so no commit falls through.
+        return list(zip([None] + bounds, bounds + [None]))
+
+
+class GsPickaxeCancelCommand(TextCommand):
+
+    """
+    Stop the search running in the current results view.
+    """
+
+    def run(self, edit):
+        search = pickaxe_searches.get(self.view.id())
+        if search:
+            search.cancel()
+
+    def is_enabled(self):
+        return self.view.id() in pickaxe_searches
+
+
+class GsPickaxeShowCommitCommand(TextCommand):
+
+    """
+    Show the commit on the current line of the results view.
+    """
+
+    def run(self, edit):
+        sel = self.view.sel()
+        if not sel:
+            return
+        m = COMMIT_HASH_AT_LINE_START.match(self.view.substr(self.view.line(sel[0].begin())))
+        if m:
+            self.view.window().run_command("gs_show_commit", {"commit_hash": m.group(1)})
@@ -0,0 +1,157 @@
+import threading
+
+import sublime
+from sublime_plugin import WindowCommand
+
+from ..git_command import GitCommand
+from ..git_mixins.history import LogEntry
+from ..commit_search import get_commit_search_index, CommitSearchIndex
+from ..ui_mixins.input_panel import show_single_line_input_panel
+from ..ui_mixins.quick_panel import show_log_panel
+from ...common import util
+
+
+SEARCH_PROMPT = "Search commits:"
+SEARCH_LOG_FORMAT = "--format=%H%x00%aN%x00%aE%x00%at%x00%s%x00%b%x1e"
+MAX_LIVE_RESULTS = 100
+MAX_RESULTS = 1000
+
+
+class GsSearchCommitsCommand(WindowCommand, GitCommand):
+
+    """
+    Search the commit messages and authors of the current branch.  With the
+    `commit_search_index` setting enabled, a local index is used (and kept
+    up to date in the background), which allows showing results while the
+    query is typed; otherwise `git log --grep` is used, which matches the
+    query as a regular expression against the messages only.
+    """
+
+    def run(self):
+        sublime.set_timeout_async(self.run_async)
+
+    def run_async(self):
+        self.index = None
+        if self.savvy_settings.get("commit_search_index"):
+            self.index = self.update_index()
+
+        show_single_line_input_panel(
+            SEARCH_PROMPT, "", self.on_done, on_change=self.on_change, on_cancel=self.on_cancel)
+
+    def update_index(self):
+        """
+        Bring the index up to date with HEAD in a background thread.  Only new
+        commits are added if HEAD moved forward; otherwise the index is
+        rebuilt, while queries are still served from the old one.
+        """
+        index = get_commit_search_index(self.repo_path)
+        with index.lock:
+            if index.updating:
+                return index
+            index.updating = True
+
+        threading.Thread(target=lambda: self._update_index(index)).start()
+        return index
+
+    def _update_index(self, index):
+        try:
+            with index.lock:
+                index.load()
+                old_head = index.head
+
+            head = self.git("rev-parse", "-q", "--verify", "HEAD", throw_on_stderr=False).strip()
+            if not head or head == old_head:
+                return
+
+            if old_head and self.git(
+                    "merge-base", old_head, head, throw_on_stderr=False).strip() == old_head:
+                commits = self.read_commits("{}..{}".format(old_head, head))
+                with index.lock:
+                    index.add_commits(commits)
+                    index.head = head
+            else:
+                util.debug.add_to_log(util.debug.make_log_message(
+                    "info", commit_search="rebuilding index for {}".format(self.repo_path)))
+                fresh = CommitSearchIndex()
+                fresh.add_commits(self.read_commits(head))
+                with index.lock:
+                    index.replace(fresh)
+                    index.head = head
+
+            with index.lock:
+                index.save()
+        finally:
+            index.updating = False
+
+    def read_commits(self, rev_range):
+        """
+        Return the commits in `rev_range`, oldest first.
+        """
+        output = self.git("log", "--reverse", SEARCH_LOG_FORMAT, rev_range)
+        commits = []
+        for record in output.split("\x1e"):
+            record = record.lstrip("\n")
+            if record:
+                commits.append(record.split("\x00"))
+        return commits
+
+    def search(self, query, limit):
+        with self.index.lock:
+            if self.index.head is None:
+                return None
+            return self.index.search(query, limit)
+
+    def on_change(self, query):
+        if not self.index:
+            return
+        util.debounce.debounce(
+            ("search_commits", self.window.id()), 50, lambda: self.show_live_results(query))
+
+    def show_live_results(self, query):
+        results = self.search(query, MAX_LIVE_RESULTS)
+        if results is None:
+            text = "Building the search index..."
+        elif not query.strip():
+            text = ""
+        elif not results:
+            text = "No commits found."
+        else:
+            text = "\n".join(
+                "{} {} ({}) <{}>".format(
+                    result.long_hash[:7], result.summary,
+                    util.dates.fuzzy(result.datetime), result.author)
+                for result in results)
+
+        output_view = self.window.create_output_panel("search_commits")
+        output_view.set_read_only(False)
+        output_view.run_command("gs_replace_view_text", {"text": text, "nuke_cursors": True})
+        output_view.set_syntax_file("Packages/GitSavvy/syntax/graph.sublime-syntax")
+        output_view.set_read_only(True)
+        self.window.run_command("show_panel", {"panel": "output.search_commits"})
+
+    def on_cancel(self):
+        util.debounce.cancel(("search_commits", self.window.id()))
+        self.window.run_command("hide_panel", {"panel": "output.search_commits"})
+
+    def on_done(self, query):
+        self.on_cancel()
+        if not query.strip():
+            return
+        sublime.set_timeout_async(lambda: self.on_done_async(query))
+
+    def on_done_async(self, query):
+        results = self.search(query, MAX_RESULTS) if self.index else None
+        if results is None:
+            entries = self.log_generator(msg_regexp=query)
+        else:
+            entries = [
+                LogEntry(result.long_hash[:7], result.long_hash, result.summary, "",
+                         result.author, result.email, str(result.datetime))
+                for result in results
+            ]
+
+        show_log_panel(entries, self.on_commit_selection)
+
+    def on_commit_selection(self, commit):
+        if commit:
+            self.window.run_command("gs_log_action", {"commit_hash": commit})
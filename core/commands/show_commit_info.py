@@ -1,31 +1,88 @@
+from collections import OrderedDict
+import re
+import threading
+
 import sublime
 from sublime_plugin import WindowCommand
 
 from ..git_command import GitCommand
 
 
+COMMIT_INFO_CACHE_SIZE = 200
+COMMIT_HASH = re.compile(r"^[0-9a-f]{4,40}$")
+
+commit_info_cache = OrderedDict()
+commit_info_cache_lock = threading.Lock()
+
+# window id -> token of the latest request, used to drop stale results
+latest_requests = {}
+
+
+def cancel_commit_info(window):
+    """
+    Drop any pending commit info request for the window, e.g. because the
+    panel it would be shown in has been closed.
+    """
+    latest_requests.pop(window.id(), None)
+
+
 class GsShowCommitInfoCommand(WindowCommand, GitCommand):
-    def run(self, commit_hash, file_path=None):
-        self._commit_hash = commit_hash
-        self._file_path = file_path
-        sublime.set_timeout_async(self.run_async)
 
-    def run_async(self):
+    """
+    Show the commit info panel.  Since the output for a commit hash never
+    changes, it is cached; the commits in `prefetch` are loaded into the
+    cache in the background afterwards.
+    """
+
+    def run(self, commit_hash, file_path=None, prefetch=None):
+        prefetch = prefetch or []
+        token = latest_requests[self.window.id()] = object()
+        sublime.set_timeout_async(lambda: self.run_async(token, commit_hash, file_path, prefetch))
+
+    def run_async(self, token, commit_hash, file_path, prefetch):
+        text = self.get_commit_info(commit_hash, file_path)
+        if latest_requests.get(self.window.id()) is not token:
+            return
+
+        output_view = self.window.create_output_panel("show_commit_info")
+        output_view.set_read_only(False)
+        output_view.run_command("gs_replace_view_text", {"text": text, "nuke_cursors": True})
+        output_view.set_syntax_file("Packages/GitSavvy/syntax/show_commit.sublime-syntax")
+        output_view.set_read_only(True)
+        self.window.run_command("show_panel", {"panel": "output.show_commit_info"})
+
+        for neighbor in prefetch:
+            if latest_requests.get(self.window.id()) is not token:
+                break
+            self.get_commit_info(neighbor, file_path)
+
+    def get_commit_info(self, commit_hash, file_path):
         show_full = self.savvy_settings.get("show_full_commit_info")
         show_diffstat = self.savvy_settings.get("show_diffstat")
+
+        # Refs may move, only commit hashes can be cached.
+        key = None
+        if COMMIT_HASH.match(commit_hash):
+            key = (self.repo_path, commit_hash, file_path, show_diffstat, show_full)
+            with commit_info_cache_lock:
+                if key in commit_info_cache:
+                    commit_info_cache.move_to_end(key)
+                    return commit_info_cache[key]
+
         text = self.git(
             "show",
             "--no-color",
             "--format=fuller",
             "--stat" if show_diffstat else None,
             "--patch" if show_full else None,
-            self._commit_hash,
-            "--" if self._file_path else None,
-            self._file_path if self._file_path else None
+            commit_hash,
+            "--" if file_path else None,
+            file_path if file_path else None
         )
-        output_view = self.window.create_output_panel("show_commit_info")
-        output_view.set_read_only(False)
-        output_view.run_command("gs_replace_view_text", {"text": text, "nuke_cursors": True})
-        output_view.set_syntax_file("Packages/GitSavvy/syntax/show_commit.sublime-syntax")
-        output_view.set_read_only(True)
-        self.window.run_command("show_panel", {"panel": "output.show_commit_info"})
+
+        if key:
+            with commit_info_cache_lock:
+                commit_info_cache[key] = text
+                while len(commit_info_cache) > COMMIT_INFO_CACHE_SIZE:
+                    commit_info_cache.popitem(last=False)
+        return text
@@ -39,7 +39,10 @@ class GsStageDiffCommand(WindowCommand, GitCommand):
 class GsStageDiffRefreshCommand(TextCommand, GitCommand):
 
     """
-    Refresh the view with the latest unstaged changes.
+    Refresh the view with the latest unstaged changes.  Unlike the diff
+    view, large diffs are not collapsed: the view is an editable patch
+    applied as it is, and re-rendering it to expand a file would discard
+    the user's edits.
     """
 
     def run(self, edit, cursors=None):
@@ -0,0 +1,222 @@
+"""
+Persistent, per-repository inverted index of commit messages, authors
+and trailers, for searching the history without rescanning it.
+
+The index is stored as a JSON lines file: a record per commit with its
+words, followed by a `{"head": ...}` record after each update.  Updates
+only append their new commits; the file is rewritten after the index was
+rebuilt, or once it holds `MAX_UPDATE_RECORDS` head records.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+import heapq
+import os
+import re
+import threading
+
+from ..common import util
+
+
+SearchResult = namedtuple("SearchResult", ("long_hash", "summary", "author", "email", "datetime"))
+
+TOKEN = re.compile(r"\w+")
+# Shorter prefixes would match most of the index.
+MIN_PREFIX_LENGTH = 2
+# Prefixes matching more commit ids than this (summed over all matching
+# words) are only matched as whole words, to keep queries fast.
+MAX_PREFIX_POSTINGS = 200000
+# Appended head records after which the file is compacted.
+MAX_UPDATE_RECORDS = 100
+
+indexes = {}
+indexes_lock = threading.Lock()
+
+
+def get_commit_search_index(repo_path):
+    with indexes_lock:
+        index = indexes.get(repo_path)
+        if index is None:
+            try:
+                path = os.path.join(
+                    util.cache.cache_dir("search"), util.cache.repo_key(repo_path) + ".jsonl")
+            except OSError:
+                path = None
+            index = indexes[repo_path] = CommitSearchIndex(path)
+        return index
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+class CommitSearchIndex:
+
+    """
+    Map every word of the commits' subjects, bodies (including trailers)
+    and authors to the ids of the commits it occurs in.  Commits are added
+    oldest first, so a higher id means a newer commit.  `head` is the commit
+    the index has been built up to, or None if it is not usable yet.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.updating = False
+        self.loaded = False
+        self.head = None
+        # commit id -> [hash, subject, author, email, timestamp]
+        self.commits = []
+        # token -> array of commit ids
+        self.postings = {}
+        self._sorted_tokens = None
+        # Records of the commits added since the last save.
+        self.unsaved = []
+        # Head records in the file, and whether it has to be rewritten.
+        self.update_records = 0
+        self.rewrite = False
+
+    def load(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        if not self.path:
+            return
+
+        # Commits only count once the head record following them was
+        # written; the last update may have been interrupted.
+        pending = []
+        try:
+            for record in util.cache.read_json_lines(self.path):
+                if isinstance(record, dict) and "head" in record:
+                    self._add_records(pending)
+                    pending = []
+                    self.head = record["head"]
+                    self.update_records += 1
+                elif isinstance(record, list) and len(record) == 6:
+                    pending.append(record)
+                else:
+                    self.rewrite = True
+        except (TypeError, ValueError, OverflowError):
+            self.reset()
+            return
+        if pending:
+            self.rewrite = True
+
+    def save(self):
+        """
+        Append the commits added since the last save and the head, or write
+        the whole index if it was rebuilt or has grown many head records.
+        """
+        if not self.path:
+            return
+        try:
+            if self.rewrite or self.update_records >= MAX_UPDATE_RECORDS:
+                util.cache.write_json_lines(self.path, self._all_records() + [{"head": self.head}])
+                self.update_records = 1
+                self.rewrite = False
+            else:
+                util.cache.append_json_lines(self.path, self.unsaved + [{"head": self.head}])
+                self.update_records += 1
+            self.unsaved = []
+        except OSError as e:
+            util.debug.add_to_log(util.debug.make_log_message("error", commit_search=str(e)))
+
+    def reset(self):
+        self.head = None
+        self.commits = []
+        self.postings = {}
+        self._sorted_tokens = None
+        self.unsaved = []
+        self.rewrite = True
+
+    def replace(self, other):
+        """
+        Take over the commits of a freshly built index.
+        """
+        self.commits = other.commits
+        self.postings = other.postings
+        self._sorted_tokens = None
+        self.unsaved = []
+        self.rewrite = True
+
+    def add_commits(self, commits):
+        """
+        Add `(hash, author, email, timestamp, subject, body)` tuples, oldest
+        first.
+        """
+        records = [
+            [commit_hash, subject, author, email, int(timestamp),
+             sorted(set(tokenize(" ".join((author, email, subject, body)))))]
+            for commit_hash, author, email, timestamp, subject, body in commits]
+        self._add_records(records)
+        self.unsaved.extend(records)
+
+    def _add_records(self, records):
+        postings = self.postings
+        for record in records:
+            commit_id = len(self.commits)
+            self.commits.append(record[:5])
+            for token in record[5]:
+                ids = postings.get(token)
+                if ids is None:
+                    ids = postings[token] = array("I")
+                ids.append(commit_id)
+        self._sorted_tokens = None
+
+    def _all_records(self):
+        tokens = [[] for _ in self.commits]
+        for token, ids in self.postings.items():
+            for commit_id in ids:
+                tokens[commit_id].append(token)
+        return [commit + [sorted(words)] for commit, words in zip(self.commits, tokens)]
+
+    def search(self, query, limit=100):
+        """
+        Return the newest `limit` commits containing all words of `query`.
+        Unless the query ends with a space, its last word is treated as a
+        prefix, so results can be shown while the user is typing.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        prefix_ids = None
+        if not query[-1].isspace() and len(terms[-1]) >= MIN_PREFIX_LENGTH:
+            prefix_ids = self._prefix_ids(terms[-1])
+
+        postings = [self.postings.get(term, ()) for term in terms]
+        if prefix_ids is not None:
+            postings[-1] = prefix_ids
+
+        postings.sort(key=len)
+        ids = set(postings[0])
+        for other in postings[1:]:
+            if not ids:
+                break
+            ids.intersection_update(other)
+
+        return [SearchResult(*self.commits[commit_id]) for commit_id in heapq.nlargest(limit, ids)]
+
+    def _prefix_ids(self, prefix):
+        """
+        Return the ids of all commits containing a word starting with
+        `prefix`, or None if there are too many.
+        """
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self.postings)
+        tokens = self._sorted_tokens
+
+        matches = []
+        total = 0
+        idx = bisect_left(tokens, prefix)
+        while idx < len(tokens) and tokens[idx].startswith(prefix):
+            ids = self.postings[tokens[idx]]
+            total += len(ids)
+            if total > MAX_PREFIX_POSTINGS:
+                return None
+            matches.append(ids)
+            idx += 1
+
+        return set().union(*matches)
@@ -0,0 +1,115 @@
+"""
+Persistent, per-repository store of commit metadata.
+
+Commits are immutable, so everything `git log` tells us about a commit
+can be kept forever.  The store is an append-only JSON lines file in
+Sublime's cache directory, loaded lazily once per session.  Dates are
+stored as Unix timestamps, and only formatted when they are shown, so
+that they do not depend on the user's Git config.
+"""
+
+from collections import namedtuple
+import os
+import threading
+
+from ..common import util
+
+
+# Above this many commits the store is dropped and filled up again from
+# scratch, which keeps commits of rewritten history from piling up.
+MAX_STORED_COMMITS = 250000
+
+StoredCommit = namedtuple("StoredCommit", (
+    "short_hash",
+    "long_hash",
+    "parents",
+    "summary",
+    "raw_body",
+    "author",
+    "email",
+    "datetime",
+    "committer",
+    "committer_email",
+    "committer_datetime"
+))
+
+stores = {}
+stores_lock = threading.Lock()
+
+
+def get_commit_store(repo_path):
+    """
+    Return the store of the repository at `repo_path`, or None if the cache
+    directory is not writable.
+    """
+    with stores_lock:
+        store = stores.get(repo_path)
+        if store is None:
+            try:
+                store = stores[repo_path] = CommitStore(repo_path)
+            except OSError:
+                return None
+        return store
+
+
+class CommitStore:
+
+    def __init__(self, repo_path):
+        self.path = os.path.join(
+            util.cache.cache_dir("commits"), util.cache.repo_key(repo_path) + ".jsonl")
+        self._commits = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._commits is None:
+            commits = {}
+            outdated = False
+            for record in util.cache.read_json_lines(self.path):
+                if isinstance(record, list) and len(record) == len(StoredCommit._fields):
+                    commits[record[1]] = StoredCommit(*record)
+                else:
+                    outdated = True
+            # Drop the records written in an older format for good.
+            if outdated:
+                try:
+                    util.cache.write_json_lines(self.path, commits.values())
+                except OSError as e:
+                    util.debug.add_to_log(util.debug.make_log_message("error", commit_store=str(e)))
+            self._commits = commits
+        return self._commits
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+    def __contains__(self, commit_hash):
+        with self._lock:
+            return commit_hash in self._load()
+
+    def get(self, commit_hash):
+        with self._lock:
+            return self._load().get(commit_hash)
+
+    def add(self, commits):
+        """
+        Add the given `StoredCommit`s, persisting those not known yet.
+        """
+        with self._lock:
+            known = self._load()
+            new = [commit for commit in commits if commit.long_hash not in known]
+            if not new:
+                return
+
+            if len(known) + len(new) > MAX_STORED_COMMITS:
+                known.clear()
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+
+            for commit in new:
+                known[commit.long_hash] = commit
+            try:
+                util.cache.append_json_lines(self.path, new)
+            except OSError as e:
+                util.debug.add_to_log(util.debug.make_log_message("error", commit_store=str(e)))
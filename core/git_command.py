@@ -26,6 +26,7 @@ from .git_mixins.remotes import RemotesMixin
 from .git_mixins.ignore import IgnoreMixin
 from .git_mixins.tags import TagsMixin
 from .git_mixins.history import HistoryMixin
+from .git_mixins.line_mapping import LineMappingMixin
 from .git_mixins.rewrite import RewriteMixin
 from .git_mixins.merge import MergeMixin
 from .exceptions import GitSavvyError
@@ -117,6 +118,7 @@ class GitCommand(StatusMixin,
                  IgnoreMixin,
                  TagsMixin,
                  HistoryMixin,
+                 LineMappingMixin,
                  RewriteMixin,
                  MergeMixin,
                  SettingsMixin
@@ -229,21 +231,17 @@ class GitCommand(StatusMixin,
 
         finally:
             end = time.time()
-            if decode:
-                util.debug.log_git(args, stdin, stdout, stderr, end - start)
-            else:
-                util.debug.log_git(
-                    args,
-                    stdin,
-                    self.decode_stdout(stdout),
-                    self.decode_stdout(stderr),
-                    end - start
-                )
+            # Undecoded output is only decoded by the debug log if logging is enabled.
+            util.debug.log_git(args, stdin, stdout, stderr, end - start)
 
             if show_panel and self.savvy_settings.get("show_time_elapsed_in_output", True):
                 util.log.panel_append("\n[Done in {:.2f}s]".format(end - start))
 
         if throw_on_stderr and not p.returncode == 0:
+            if not decode:
+                stdout = stdout.decode("utf-8", "replace")
+                stderr = stderr.decode("utf-8", "replace")
+
             sublime.active_window().status_message(
                 "Failed to run `git {}`. See log for details.".format(command[1])
             )
@@ -261,6 +259,33 @@ class GitCommand(StatusMixin,
 
         return stdout
 
+    def git_streaming(self, *args, working_dir=None):
+        """
+        Start the git command specified in `*args` and return the running
+        process, so that its stdout can be consumed incrementally.  The
+        caller must read stdout until EOF or kill the process.  Stderr is
+        discarded.
+        """
+        args = self._include_global_flags(args)
+        command = (self.git_binary_path, ) + tuple(arg for arg in args if arg)
+
+        if not working_dir:
+            working_dir = self.repo_path
+
+        startupinfo = None
+        if os.name == "nt":
+            startupinfo = subprocess.STARTUPINFO()
+            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+
+        util.debug.log_git(args, None, "<streamed>", "", 0)
+        return subprocess.Popen(command,
+                                stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL,
+                                cwd=working_dir,
+                                env=os.environ.copy(),
+                                startupinfo=startupinfo)
+
     def decode_stdout(self, stdout):
         fallback_encoding = self.savvy_settings.get("fallback_encoding")
         silent_fallback = self.savvy_settings.get("silent_fallback")
@@ -1,7 +1,11 @@
+import os
 import re
 import string
 
 
+HEX_HASH = re.compile(r"^[0-9a-f]{40}$")
+
+
 class ActiveBranchMixin():
 
     def get_current_branch_name(self):
@@ -131,6 +135,56 @@ class ActiveBranchMixin():
         """
         return self.git("rev-parse", "HEAD").strip()
 
+    def read_git_dirs(self):
+        """
+        Return the git directory of the repo and the directory holding the
+        refs shared by all its worktrees, which are the same unless the repo
+        is a linked worktree.  Raises `OSError` if they cannot be read.
+        """
+        git_dir = os.path.join(self.repo_path, ".git")
+        if os.path.isfile(git_dir):
+            # Worktrees and submodules point to their git directory.
+            with open(git_dir) as f:
+                git_dir = os.path.join(self.repo_path, f.read().strip()[len("gitdir: "):])
+        common_dir = git_dir
+        if os.path.isfile(os.path.join(git_dir, "commondir")):
+            with open(os.path.join(git_dir, "commondir")) as f:
+                common_dir = os.path.join(git_dir, f.read().strip())
+        return git_dir, common_dir
+
+    def read_head_commit(self):
+        """
+        Return the SHA1 commit hash for the commit at HEAD, or None if there
+        is none.  HEAD is resolved by reading the files in the `.git`
+        directory, which is much cheaper than asking Git; `rev-parse` is only
+        used if that fails.
+        """
+        try:
+            git_dir, common_dir = self.read_git_dirs()
+            with open(os.path.join(git_dir, "HEAD")) as f:
+                head = f.read().strip()
+            if not head.startswith("ref: "):
+                return head if HEX_HASH.match(head) else None
+
+            ref = head[len("ref: "):]
+            for directory in (git_dir, common_dir):
+                if os.path.isfile(os.path.join(directory, ref)):
+                    with open(os.path.join(directory, ref)) as f:
+                        commit_hash = f.read().strip()
+                    if HEX_HASH.match(commit_hash):
+                        return commit_hash
+
+            if os.path.isfile(os.path.join(common_dir, "packed-refs")):
+                with open(os.path.join(common_dir, "packed-refs")) as f:
+                    for line in f:
+                        commit_hash, _, name = line.rstrip("\n").partition(" ")
+                        if name == ref and HEX_HASH.match(commit_hash):
+                            return commit_hash
+        except (OSError, UnicodeDecodeError):
+            pass
+
+        return self.git("rev-parse", "-q", "--verify", "HEAD", throw_on_stderr=False).strip() or None
+
     def get_latest_commit_msg_for_head(self):
         """
         Get last commit msg for the commit at HEAD.
@@ -1,8 +1,18 @@
 from collections import namedtuple
 from ...common import util
+from ..commit_store import get_commit_store, StoredCommit
+from ..author_index import get_author_index
+from ..exceptions import GitSavvyError
+from ..path_history import (
+    get_file_history, set_file_history, FileCommits, PathHistory, PATH_HISTORY_FORMAT)
+import threading
 import sublime
 
 
+LOG_FORMAT = "--format=%h%n%H%n%P%n%s%n%an%n%ae%n%at%n%cn%n%ce%n%ct%x00%B%x00%x00%n"
+AUTHOR_LOG_FORMAT = "--format=%aN%x00%aE%x00%at"
+
+
 LogEntry = namedtuple("LogEntry", (
     "short_hash",
     "long_hash",
@@ -32,16 +42,14 @@ class HistoryMixin():
             diff_regexp=None, first_parent=False, merges=False, no_merges=False, topo_order=False,
             follow=False):
 
-        log_output = self.git(
-            "log",
+        args = (
             "--max-count={}".format(limit) if limit else None,
             "--skip={}".format(skip) if skip else None,
             "--reverse" if reverse else None,
-            '--format=%h%n%H%n%s%n%an%n%ae%n%at%x00%B%x00%x00%n',
             "--author={}".format(author) if author else None,
             "--grep={}".format(msg_regexp) if msg_regexp else None,
             "--cherry" if cherry else None,
-            "--G" if diff_regexp else None,
+            "-G" if diff_regexp else None,
             diff_regexp if diff_regexp else None,
             "--first-parent" if first_parent else None,
             "--no-merges" if no_merges else None,
@@ -51,21 +59,95 @@ class HistoryMixin():
             "--all" if all_branches else None,
             "{}..{}".format(*start_end) if start_end else None,
             branch if branch else None,
+            # Unlike `log`, `rev-list` does not default to HEAD.
+            "HEAD" if not (start_end or branch or all_branches) else None,
             "--" if file_path else None,
             file_path if file_path else None
-        ).strip("\x00")
-
-        entries = []
-        for entry in log_output.split("\x00\x00\n"):
+        )
+
+        store = self.commit_store
+        # `rev-list` yields the same commits in the same order as `log`, so
+        # once the store knows most commits, it is much cheaper to only ask
+        # Git for the hashes.  It does not know `--follow`, and `--cherry`
+        # changes its output format, hence these always go through `log`.
+        if store and not (follow or cherry or diff_regexp):
+            hashes = self.git("rev-list", *args).split()
+            missing = [commit_hash for commit_hash in hashes if commit_hash not in store]
+            if missing:
+                self.log_commits(missing)
+            return [
+                self._log_entry(commit)
+                for commit in (store.get(commit_hash) for commit_hash in hashes)
+                if commit
+            ]
+
+        commits = self._parse_log(self.git("log", LOG_FORMAT, *args))
+        if store is not None:
+            store.add(commits)
+        return [self._log_entry(commit) for commit in commits]
+
+    def log_commits(self, commit_hashes):
+        """
+        Return a `StoredCommit` for each of the given commits, in the order
+        given, adding them to the commit store.
+        """
+        commits = self._parse_log(self.git(
+            "log", "--no-walk=unsorted", "--stdin", LOG_FORMAT, stdin="\n".join(commit_hashes)))
+        store = self.commit_store
+        if store is not None:
+            store.add(commits)
+        return commits
+
+    def stored_commit(self, commit_hash):
+        """
+        Return the `StoredCommit` for a full commit hash, asking Git only if
+        it is not in the commit store yet.
+        """
+        store = self.commit_store
+        commit = store.get(commit_hash) if store and len(commit_hash) == 40 else None
+        if commit is None:
+            commits = self.log_commits([commit_hash])
+            commit = commits[0] if commits else None
+        return commit
+
+    def require_commit(self, commit_hash):
+        """
+        Like `stored_commit`, but raise a `GitSavvyError` if the commit is
+        unknown, like the Git command looking it up would.
+        """
+        commit = self.stored_commit(commit_hash)
+        if commit is None:
+            raise GitSavvyError("Commit `{}` not found.".format(commit_hash))
+        return commit
+
+    @property
+    def commit_store(self):
+        if not self.savvy_settings.get("persistent_commit_store", True):
+            return None
+        return get_commit_store(self.repo_path)
+
+    @staticmethod
+    def _parse_log(log_output):
+        commits = []
+        for entry in log_output.strip("\x00").split("\x00\x00\n"):
             entry = entry.strip()
             if not entry:
                 continue
             entry, raw_body = entry.split("\x00")
 
-            short_hash, long_hash, summary, author, email, datetime = entry.split("\n")
-            entries.append(LogEntry(short_hash, long_hash, summary, raw_body, author, email, datetime))
+            (short_hash, long_hash, parents, summary, author, email, datetime,
+             committer, committer_email, committer_datetime) = entry.split("\n")
+            commits.append(StoredCommit(
+                short_hash, long_hash, parents.split(), summary, raw_body, author, email,
+                datetime, committer, committer_email, committer_datetime))
 
-        return entries
+        return commits
+
+    @staticmethod
+    def _log_entry(commit):
+        return LogEntry(
+            commit.short_hash, commit.long_hash, commit.summary, commit.raw_body,
+            commit.author, commit.email, commit.datetime)
 
     def log_generator(self, limit=6000, **kwargs):
         # Generator for show_log_panel
@@ -80,6 +162,53 @@ class HistoryMixin():
                 break
             skip = skip + limit
 
+    def get_authors(self):
+        """
+        Return the authors of the commits reachable from HEAD as `Author`s,
+        most commits first.  The result is served from a per-repo index
+        which only counts the new commits if HEAD moved forward.  If HEAD
+        was moved elsewhere, the stale index is returned while it is being
+        rebuilt in the background.
+        """
+        head = self.git("rev-parse", "-q", "--verify", "HEAD", throw_on_stderr=False).strip()
+        if not head:
+            return []
+
+        index = get_author_index(self.repo_path)
+        with index.lock:
+            if index.head == head or index.rebuilding:
+                return index.sorted_authors()
+            old_head = index.head
+
+        if old_head:
+            merge_base = self.git("merge-base", old_head, head, throw_on_stderr=False).strip()
+            if merge_base == old_head:
+                new_commits = self.git("log", AUTHOR_LOG_FORMAT, "{}..{}".format(old_head, head))
+                with index.lock:
+                    if index.head == old_head:
+                        index.count(new_commits, index.authors)
+                        index.head = head
+                        index.save()
+                    return index.sorted_authors()
+
+            with index.lock:
+                index.rebuilding = True
+            threading.Thread(target=lambda: self._rebuild_author_index(index, head)).start()
+            return index.sorted_authors()
+
+        self._rebuild_author_index(index, head)
+        return index.sorted_authors()
+
+    def _rebuild_author_index(self, index, head):
+        try:
+            authors = index.count(self.git("log", AUTHOR_LOG_FORMAT, head))
+            with index.lock:
+                index.authors = authors
+                index.head = head
+                index.save()
+        finally:
+            index.rebuilding = False
+
     def reflog(self, limit=6000, skip=None, all_branches=False):
         log_output = self.git(
             "reflog",
@@ -118,7 +247,7 @@ class HistoryMixin():
         """
         Return a single LogEntry of a commit.
         """
-        return self.log(start_end=("{0}~1".format(commit_hash), commit_hash), limit=1)[0]
+        return self._log_entry(self.require_commit(commit_hash))
 
     def log_merge(self, merge_hash):
         """
@@ -139,82 +268,73 @@ class HistoryMixin():
         """
         Return parents of a commit.
         """
-        return self.git("rev-list", "-1", "--parents", commit_hash).strip().split(" ")[1:]
+        return list(self.require_commit(commit_hash).parents)
 
     def commit_is_merge(self, commit_hash):
-        sha = self.git("rev-list", "--merges", "-1", "{0}~1..{0}".format(commit_hash)).strip()
-        return sha is not ""
+        return len(self.require_commit(commit_hash).parents) > 1
 
     def get_short_hash(self, commit_hash):
         return self.git("rev-parse", "--short", commit_hash).strip()
 
     def filename_at_commit(self, filename, commit_hash, follow=False):
-        commit_len = len(commit_hash)
-        lines = self.git(
-            "log",
-            "--pretty=oneline",
-            "--follow" if follow else None,
-            "--name-status",
-            "{}..{}".format(commit_hash, "HEAD"),
-            "--", filename
-        ).split("\n")
-
-        for i in range(0, len(lines), 2):
-            if lines[i].split(" ")[0][:commit_len] == commit_hash:
-                if lines[i + 1][0] == 'R':
-                    return lines[i + 1].split("\t")[2]
-                else:
-                    return lines[i + 1].split("\t")[1]
-
-        # If the commit hash is not for this file.
-        return filename
-
-    def get_file_content_at_commit(self, filename, commit_hash):
-        filename = self.get_rel_path(filename)
-        filename = filename.replace('\\', '/')
-        filename = self.filename_at_commit(filename, commit_hash)
-        return self.git("show", commit_hash + ':' + filename)
-
-    def find_matching_lineno(self, base_commit, target_commit, line, file_path=None):
         """
-        Return the matching line of the target_commit given the line number of the base_commit.
+        Return the path `filename` had at `commit_hash`.  Without `follow`
+        renames are not tracked, so that is always `filename`.  Otherwise
+        the renames are looked up in a path history of the file, which is
+        built with a single `git log --follow` and kept until HEAD moves.
+        For commits not touching the file, its paths are looked up in the
+        commit's tree once.
         """
-        if not file_path:
-            file_path = self.file_path
+        if not follow:
+            return filename
 
-        if base_commit:
-            base_object = self.get_commit_file_object(base_commit, file_path)
-        else:
-            base_file_contents = util.file.get_file_contents_binary(self.repo_path, file_path)
-            base_object = self.get_object_from_string(base_file_contents)
+        head = self.read_head_commit()
+        if not head:
+            return filename
 
-        target_object = self.get_commit_file_object(target_commit, file_path)
+        key = ("paths", self.repo_path, filename)
+        history = get_file_history(key, head)
+        if history is None:
+            history = PathHistory(head, self.git(
+                "log", PATH_HISTORY_FORMAT, "--follow", "--name-status", head, "--", filename))
+            set_file_history(key, history)
 
-        stdout = self.git(
-            "diff", "--no-color", "-U0", base_object, target_object)
-        diff = util.parse_diff(stdout)
+        path = history.lookup(commit_hash)
+        if path is None:
+            path = history.path_in_tree(commit_hash, self.list_tree_paths)
 
-        if not diff:
-            return line
+        # If the file did not exist at that commit.
+        return path or filename
 
-        for hunk in reversed(diff):
-            head_start = hunk.head_start if hunk.head_length else hunk.head_start + 1
-            saved_start = hunk.saved_start if hunk.saved_length else hunk.saved_start + 1
-            head_end = head_start + hunk.head_length
-            saved_end = saved_start + hunk.saved_length
-
-            if head_end <= line:
-                return saved_end + line - head_end
-            elif head_start <= line:
-                return saved_start
+    def list_tree_paths(self, commit_hash, paths):
+        """
+        Return which of `paths`, relative to the repository root, exist in
+        the tree of `commit_hash`.
+        """
+        return self.git(
+            "ls-tree", "-z", "--name-only", "--full-tree", commit_hash, "--", *paths,
+            throw_on_stderr=False).split("\x00")
 
-        # fails to find matching
-        return line
+    def get_file_content_at_commit(self, filename, commit_hash):
+        filename = self.get_rel_path(filename)
+        filename = filename.replace('\\', '/')
+        filename = self.filename_at_commit(filename, commit_hash)
+        return self.git("show", commit_hash + ':' + filename)
 
     def neighbor_commit(self, commit_hash, position, follow=False):
         """
         Get the commit before or after a specific commit
         """
+        file_commits = self.file_commits(self.file_path, follow) if commit_hash else None
+        if file_commits:
+            neighbor = (
+                file_commits.older(commit_hash) if position == "older"
+                else file_commits.newer(commit_hash))
+            if neighbor is not None:
+                return neighbor
+
+        # The commit does not change the file, so its position in the
+        # file's history is unknown.
         if position == "older":
             return self.git(
                 "log",
@@ -234,6 +354,24 @@ class HistoryMixin():
                 "--", self.file_path
             ).strip().split("\n", 1)[0]
 
+    def file_commits(self, file_path, follow=False):
+        """
+        Return the `FileCommits` of a file, which are read once and kept in
+        memory until HEAD moves.
+        """
+        head = self.read_head_commit()
+        if not head:
+            return None
+
+        key = ("commits", self.repo_path, file_path, bool(follow))
+        file_commits = get_file_history(key, head)
+        if file_commits is None:
+            file_commits = FileCommits(head, self.git(
+                "log", "--format=%H", "--follow" if follow else None, head, "--", file_path
+            ).split())
+            set_file_history(key, file_commits)
+        return file_commits
+
     def newest_commit_for_file(self, file_path, follow=False):
         """
         Get the newest commit for a given file.
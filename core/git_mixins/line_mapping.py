@@ -0,0 +1,300 @@
+"""
+Map line numbers between versions of a file.  The `-U0` hunks between two
+blobs are cached, so moving back and forth between revisions does not diff
+the same pair twice, and mappings between blobs which have never been
+diffed directly are composed from the cached ones.
+"""
+
+from collections import OrderedDict, deque
+import hashlib
+import os
+import re
+import threading
+
+from ...common import util
+
+
+HEX_HASH = re.compile(r"^[0-9a-f]{40}$")
+BLOB_ID_CACHE_SIZE = 1000
+HUNK_CACHE_SIZE = 500
+# How many cached diffs may be chained to map a line between two blobs.
+MAX_COMPOSED_DIFFS = 8
+# Changed windows with more (head lines × saved lines) than this are diffed
+# by Git: the time difflib takes grows with that product.
+MAX_DIFFLIB_COMPARISONS = 4000000
+
+# (repo path, commit, path) -> blob id, for full commit hashes only
+blob_ids = OrderedDict()
+# (blob id, blob id) -> ((head_start, head_length, saved_start, saved_length), ...)
+hunk_cache = OrderedDict()
+# blob id -> set of blob ids it has cached hunks to
+hunk_neighbors = {}
+cache_lock = threading.Lock()
+
+
+def blob_id(content):
+    """
+    Return the id Git would give a blob with the given (bytes) content.
+    """
+    return hashlib.sha1(b"blob " + str(len(content)).encode() + b"\x00" + content).hexdigest()
+
+
+def changed_window(head_lines, saved_lines):
+    """
+    Return the number of lines the two lists have in common at their start,
+    and the lists without those and the lines they have in common at their
+    end.  Only this window has to be diffed.
+    """
+    limit = min(len(head_lines), len(saved_lines))
+    start = 0
+    while start < limit and head_lines[start] == saved_lines[start]:
+        start += 1
+    end = 0
+    while end < limit - start and head_lines[-1 - end] == saved_lines[-1 - end]:
+        end += 1
+    return (
+        start,
+        head_lines[start:len(head_lines) - end],
+        saved_lines[start:len(saved_lines) - end])
+
+
+def is_small_window(head_lines, saved_lines):
+    """
+    Return whether the window returned by `changed_window` can be diffed
+    with `diff_hunks` quickly.
+    """
+    return len(head_lines) * len(saved_lines) <= MAX_DIFFLIB_COMPARISONS
+
+
+def offset_hunks(hunks, offset):
+    return tuple(
+        (head_start + offset, head_length, saved_start + offset, saved_length)
+        for head_start, head_length, saved_start, saved_length in hunks)
+
+
+def diff_hunks(head_lines, saved_lines):
+    """
+    Return the hunks of a `-U0` diff between two lists of lines, numbered
+    like `git diff` numbers them.  Only the lines between the common start
+    and end are compared.
+    """
+    import difflib
+
+    start, head_lines, saved_lines = changed_window(head_lines, saved_lines)
+    hunks = []
+    matcher = difflib.SequenceMatcher(None, head_lines, saved_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            hunks.append((
+                i1 + 1 if i2 > i1 else i1, i2 - i1,
+                j1 + 1 if j2 > j1 else j1, j2 - j1))
+    return offset_hunks(hunks, start)
+
+
+def map_line(hunks, line):
+    """
+    Return the line matching `line` on the "saved" side of `hunks`.  Lines
+    within a changed region map to its start.
+    """
+    for head_start, head_length, saved_start, saved_length in reversed(hunks):
+        head_start = head_start if head_length else head_start + 1
+        saved_start = saved_start if saved_length else saved_start + 1
+        head_end = head_start + head_length
+        saved_end = saved_start + saved_length
+
+        if head_end <= line:
+            return saved_end + line - head_end
+        elif head_start <= line:
+            return saved_start
+
+    return line
+
+
+def change_markers(hunks):
+    """
+    Return the 0-based rows on the "saved" side of `hunks` to mark as
+    added, modified and removed.  Removals are marked on the line before
+    them, or on the first line if the file's start was removed.
+    """
+    added = []
+    modified = []
+    removed = []
+    for head_start, head_length, saved_start, saved_length in hunks:
+        if not saved_length:
+            removed.append(max(saved_start - 1, 0))
+        else:
+            rows = range(saved_start - 1, saved_start - 1 + saved_length)
+            (modified if head_length else added).extend(rows)
+    return added, modified, removed
+
+
+def _cache_get(cache, key):
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _cache_put(cache, key, value, size, on_evict=None):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > size:
+        evicted, _ = cache.popitem(last=False)
+        if on_evict:
+            on_evict(evicted)
+
+
+def _forget_neighbor(pair):
+    neighbors = hunk_neighbors.get(pair[0])
+    if neighbors is not None:
+        neighbors.discard(pair[1])
+        if not neighbors:
+            del hunk_neighbors[pair[0]]
+
+
+def cache_hunks(blob_a, blob_b, hunks):
+    """
+    Remember the hunks between two blobs, and the inverted hunks of the
+    reverse direction.
+    """
+    inverted = tuple(
+        (saved_start, saved_length, head_start, head_length)
+        for head_start, head_length, saved_start, saved_length in hunks)
+    with cache_lock:
+        for pair, value in (((blob_a, blob_b), hunks), ((blob_b, blob_a), inverted)):
+            _cache_put(hunk_cache, pair, value, HUNK_CACHE_SIZE, _forget_neighbor)
+            hunk_neighbors.setdefault(pair[0], set()).add(pair[1])
+
+
+def composed_hunks(blob_a, blob_b):
+    """
+    Return the chain of cached hunks leading from `blob_a` to `blob_b`, or
+    None if the two are not connected by cached diffs.
+    """
+    with cache_lock:
+        direct = _cache_get(hunk_cache, (blob_a, blob_b))
+        if direct is not None:
+            return [direct]
+
+        previous = {blob_a: None}
+        queue = deque([(blob_a, 0)])
+        while queue:
+            blob, depth = queue.popleft()
+            if blob == blob_b:
+                chain = []
+                while previous[blob] is not None:
+                    chain.append(hunk_cache[(previous[blob], blob)])
+                    blob = previous[blob]
+                return chain[::-1]
+            if depth == MAX_COMPOSED_DIFFS:
+                continue
+            for neighbor in hunk_neighbors.get(blob, ()):
+                if neighbor not in previous:
+                    previous[neighbor] = blob
+                    queue.append((neighbor, depth + 1))
+        return None
+
+
+class LineMappingMixin():
+
+    def find_matching_lineno(self, base_commit, target_commit, line, file_path=None):
+        """
+        Return the matching line of the target_commit given the line number of the base_commit.
+        If `base_commit` is None, `line` is a line of the file in the working tree.
+        """
+        if not file_path:
+            file_path = self.file_path
+        rel_path = self.get_rel_path(file_path).replace("\\", "/")
+
+        base_content = None
+        if base_commit:
+            base_blob, target_blob = self.commit_blob_ids((base_commit, target_commit), rel_path)
+        else:
+            base_content = util.file.get_file_contents_binary(self.repo_path, file_path)
+            base_blob = blob_id(base_content)
+            target_blob, = self.commit_blob_ids((target_commit, ), rel_path)
+
+        if not base_blob or not target_blob or base_blob == target_blob:
+            return line
+
+        chain = composed_hunks(base_blob, target_blob)
+        if chain is None:
+            # Both are diffed by Git, so that a line maps the same way
+            # whether it is read from the working tree or a commit.
+            if base_content is None:
+                hunks = self.blob_hunks(base_blob, target_blob)
+            else:
+                target_content = self.git("cat-file", "blob", target_blob, decode=False)
+                hunks = self.content_hunks(base_content, target_content)
+            cache_hunks(base_blob, target_blob, hunks)
+            chain = [hunks]
+
+        for hunks in chain:
+            line = map_line(hunks, line)
+        return line
+
+    def commit_blob_ids(self, commits, rel_path):
+        """
+        Return the blob ids of the file at `rel_path` in each of the given
+        commits, or None for commits where the file does not exist.
+        """
+        keys = [(self.repo_path, commit, rel_path) for commit in commits]
+        with cache_lock:
+            ids = [_cache_get(blob_ids, key) for key in keys]
+
+        missing = [idx for idx, blob in enumerate(ids) if blob is None]
+        if missing:
+            # `rev-parse` echoes the first object it cannot resolve and stops,
+            # so the output lines are aligned with the requested objects.
+            output = self.git(
+                "rev-parse", *["{}:{}".format(commits[idx], rel_path) for idx in missing],
+                throw_on_stderr=False).splitlines()
+            for idx, blob in zip(missing, output):
+                if HEX_HASH.match(blob):
+                    ids[idx] = blob
+                    if HEX_HASH.match(commits[idx]):
+                        with cache_lock:
+                            _cache_put(blob_ids, keys[idx], blob, BLOB_ID_CACHE_SIZE)
+
+        return ids
+
+    def line_hunks(self, head_lines, saved_lines):
+        """
+        Like `diff_hunks`, but let `git diff --no-index` compare the changed
+        window of the two lists if it is too large for difflib.
+        """
+        start, head_window, saved_window = changed_window(head_lines, saved_lines)
+        if is_small_window(head_window, saved_window):
+            return diff_hunks(head_lines, saved_lines)
+
+        hunks = self.content_hunks(
+            "".join(line + "\n" for line in head_window).encode("utf-8"),
+            "".join(line + "\n" for line in saved_window).encode("utf-8"))
+        return offset_hunks(hunks, start)
+
+    def content_hunks(self, head_content, saved_content):
+        """
+        Return the hunks of `git diff --no-index -U0` between two (bytes)
+        contents, which are not blobs in the repository.
+        """
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = []
+            for name, content in (("head", head_content), ("saved", saved_content)):
+                path = os.path.join(tmp_dir, name)
+                with open(path, "wb") as f:
+                    f.write(content)
+                paths.append(path)
+            # Exits with 1 if the files differ.
+            stdout = self.git(
+                "diff", "--no-index", "--no-color", "-U0", "--", *paths, throw_on_stderr=False)
+        return self.parse_hunks(stdout)
+
+    def parse_hunks(self, stdout):
+        return tuple(
+            (hunk.head_start, hunk.head_length, hunk.saved_start, hunk.saved_length)
+            for hunk in util.parse_diff(stdout))
+
+    def blob_hunks(self, blob_a, blob_b):
+        stdout = self.git("diff", "--no-color", "-U0", blob_a, blob_b)
+        return self.parse_hunks(stdout)
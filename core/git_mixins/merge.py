@@ -1,8 +1,6 @@
 import os
-import tempfile
 import subprocess
 import shlex
-import filecmp
 from shutil import rmtree, copyfile
 
 import sublime
@@ -18,6 +16,9 @@ class MergeMixin():
         launch the configured merge tool against the four versions of that
         file (our version, their version, common ancestor, merged version).
         """
+        import filecmp
+        import tempfile
+
         tool = self.get_configured_tool()
         if not tool:
             sublime.error_message("You have not configured a merge tool for Git.")
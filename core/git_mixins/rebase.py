@@ -1,4 +1,3 @@
-import difflib
 import re
 import time
 
@@ -31,6 +30,7 @@ class NearestBranchMixin(object):
         Find the nearest branch from the "branch-out nodes" of all relatives.
         """
         util.debug.add_to_log('nearest_branch: filtering branches that share branch-out nodes')
+        import difflib
         diff = difflib.Differ()
         max_revisions = 100
         branch_commits = self.git(
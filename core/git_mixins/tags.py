@@ -1,6 +1,5 @@
 import re
 from collections import namedtuple
-from distutils.version import LooseVersion
 
 
 TagDetails = namedtuple("TagDetails", ("sha", "tag"))
@@ -42,6 +41,8 @@ class TagsMixin():
         Sorts tags using LooseVersion if there's a tag matching the semver format.
         """
 
+        from distutils.version import LooseVersion
+
         semver_test = re.compile(r'\d+\.\d+\.?\d*')
 
         semver_entries, regular_entries = [], []
@@ -0,0 +1,147 @@
+"""
+In-memory histories of single files over the commits reachable from HEAD:
+the paths a file had, as reported by `git log --follow --name-status`, and
+the list of commits changing it.  They are read with a single `git log`
+and kept until HEAD moves, so looking up the commits changing the file
+costs no further Git calls.
+"""
+
+from bisect import bisect_left
+from collections import OrderedDict
+import threading
+
+
+PATH_HISTORY_FORMAT = "--format=%x00%H%x00%ct"
+FILE_HISTORY_CACHE_SIZE = 16
+
+# (kind, repo path, file path, ...) -> PathHistory or FileCommits
+file_histories = OrderedDict()
+file_histories_lock = threading.Lock()
+
+
+def get_file_history(key, head):
+    """
+    Return the cached history for `key` if it was built for `head`,
+    otherwise None.
+    """
+    with file_histories_lock:
+        history = file_histories.get(key)
+        if history is None or history.head != head:
+            return None
+        file_histories.move_to_end(key)
+        return history
+
+
+def set_file_history(key, history):
+    with file_histories_lock:
+        file_histories[key] = history
+        file_histories.move_to_end(key)
+        while len(file_histories) > FILE_HISTORY_CACHE_SIZE:
+            file_histories.popitem(last=False)
+
+
+class PathHistory:
+
+    """
+    The commits touching a file, each with the path the file had after it,
+    parsed from the output of `git log --follow --name-status` using
+    `PATH_HISTORY_FORMAT`.  `head` is the commit the log was started from.
+    """
+
+    def __init__(self, head, log_output):
+        self.head = head
+        # full hash -> path
+        self.paths = {}
+        # The paths the file had, newest first.
+        self.known_paths = []
+        # commit hash -> path, for commits not touching the file
+        self.resolved = {}
+
+        fields = log_output.split("\x00")
+        for commit_hash, rest in zip(fields[1::2], fields[2::2]):
+            _, _, name_status = rest.partition("\n")
+            path = None
+            for line in name_status.splitlines():
+                if line:
+                    # `R100\told\tnew` for renames, `M\tpath` otherwise.
+                    path = line.split("\t")[-1]
+                    break
+            if path is not None:
+                self.paths[commit_hash] = path
+                if path not in self.known_paths:
+                    self.known_paths.append(path)
+
+        self._hashes = sorted(self.paths)
+
+    def lookup(self, commit_hash):
+        """
+        Return the path for a commit touching the file, given its full or
+        abbreviated hash, or None if the file was not changed by it.
+        """
+        path = self.paths.get(commit_hash)
+        if path is not None or len(commit_hash) == 40:
+            return path
+        idx = bisect_left(self._hashes, commit_hash)
+        if idx < len(self._hashes) and self._hashes[idx].startswith(commit_hash):
+            return self.paths[self._hashes[idx]]
+        return None
+
+    def path_in_tree(self, commit_hash, list_tree):
+        """
+        Return the path the file had at a commit which did not touch it, or
+        None if it did not exist then.  That is the newest of its paths
+        found in the commit's tree, as listed by `list_tree(commit_hash,
+        paths)`; the commit's time says nothing about which changes it
+        contains in a non-linear history.  Results are cached.
+        """
+        if commit_hash not in self.resolved:
+            existing = set(list_tree(commit_hash, self.known_paths)) if self.known_paths else ()
+            self.resolved[commit_hash] = next(
+                (path for path in self.known_paths if path in existing), None)
+        return self.resolved[commit_hash]
+
+
+class FileCommits:
+
+    """
+    The hashes of the commits changing a file, newest first, as listed by
+    `git log --format=%H [--follow] HEAD -- <file>`.
+    """
+
+    def __init__(self, head, commit_hashes):
+        self.head = head
+        self.commit_hashes = commit_hashes
+        self._positions = {commit_hash: idx for idx, commit_hash in enumerate(commit_hashes)}
+
+    def position(self, commit_hash):
+        """
+        Return the index of a commit, given its full or abbreviated hash, or
+        None if it does not change the file.
+        """
+        idx = self._positions.get(commit_hash)
+        if idx is not None or len(commit_hash) == 40:
+            return idx
+        return next(
+            (idx for idx, full_hash in enumerate(self.commit_hashes)
+             if full_hash.startswith(commit_hash)),
+            None)
+
+    def older(self, commit_hash):
+        """
+        Return the commit changing the file before `commit_hash`, "" if
+        there is none, or None if `commit_hash` does not change the file.
+        """
+        idx = self.position(commit_hash)
+        if idx is None:
+            return None
+        return self.commit_hashes[idx + 1] if idx + 1 < len(self.commit_hashes) else ""
+
+    def newer(self, commit_hash):
+        """
+        Return the commit changing the file after `commit_hash`, like
+        `older`.
+        """
+        idx = self.position(commit_hash)
+        if idx is None:
+            return None
+        return self.commit_hashes[idx - 1] if idx else ""
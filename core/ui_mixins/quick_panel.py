@@ -296,6 +296,52 @@ class BranchPanel(GitCommand):
         self.on_done(self.branch)
 
 
+def show_author_panel(on_done):
+    """
+    Show a quick panel with the authors of the current branch, most commits
+    first and the current user preselected.  The callback `on_done(author)`
+    is called with "name <email>" when an author is selected, or `None` if
+    the panel is cancelled.
+    """
+    ap = AuthorPanel(on_done)
+    ap.show()
+    return ap
+
+
+class AuthorPanel(GitCommand):
+
+    def __init__(self, on_done):
+        self.window = sublime.active_window()
+        self.on_done = on_done
+
+    def show(self):
+        email = self.git("config", "user.email", throw_on_stderr=False).strip()
+        self.authors = self.get_authors()
+        if not self.authors:
+            self.window.show_quick_panel(["There are no authors available."], None)
+            return
+
+        selected_index = next(
+            (idx for idx, author in enumerate(self.authors) if author.email == email), 0)
+
+        self.window.show_quick_panel(
+            [["{} <{}>".format(author.name, author.email),
+              "{} commits, the last one {}".format(
+                  author.commit_count, util.dates.fuzzy(author.last_commit_time))]
+             for author in self.authors],
+            self.on_author_selection,
+            flags=sublime.MONOSPACE_FONT,
+            selected_index=selected_index
+        )
+
+    def on_author_selection(self, index):
+        if index == -1:
+            self.on_done(None)
+            return
+        author = self.authors[index]
+        self.on_done("{} <{}>".format(author.name, author.email))
+
+
 def show_paginated_panel(items, on_done, **kwargs):
 
     """
@@ -7,6 +7,10 @@ if sys.version_info[0] == 2:
 else:
     def plugin_loaded():
         from .common import util
+        util.debug.log_startup(util.debug.make_log_message(
+            "startup",
+            seconds=startup_profile.load_time,
+            slowest_imports=startup_profile.get_slowest_imports()))
         sublime.set_timeout_async(util.file.determine_syntax_files)
 
         # Ensure all interfaces are ready.
@@ -32,10 +36,13 @@ else:
                 "you don't have the Codecs33 package installed, or you've "
                 "entered an unsupported encoding.")
 
-    from .common.commands import *
-    from .common.ui import *
-    from .common.global_events import *
-    from .core.commands import *
-    from .core.interfaces import *
-    from .github.commands import *
-    from .gitlab.commands import *
+    from .common import startup_profile
+
+    with startup_profile.profile_imports():
+        from .common.commands import *
+        from .common.ui import *
+        from .common.global_events import *
+        from .core.commands import *
+        from .core.interfaces import *
+        from .github.commands import *
+        from .gitlab.commands import *
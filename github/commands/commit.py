@@ -11,7 +11,9 @@ from ...core.git_command import GitCommand
 from ...core.ui_mixins.quick_panel import show_paginated_panel
 from .. import github
 from .. import git_mixins
+from .. import issue_cache
 from ...common import util
+from ...core.exceptions import FailedGithubRequest
 
 
 class GsGithubShowIssuesCommand(TextCommand, GitCommand, git_mixins.GithubRemotesMixin):
@@ -24,7 +26,8 @@ class GsGithubShowIssuesCommand(TextCommand, GitCommand, git_mixins.GithubRemote
            is False.
 
     After the user makes their selection, insert the issue
-    number at the current cursor position.
+    number at the current cursor position.  The issues are listed from a
+    local cache, which is synced in the background.
     """
 
     def run(self, edit, default_repo=True):
@@ -51,36 +54,77 @@ class GsGithubShowIssuesCommand(TextCommand, GitCommand, git_mixins.GithubRemote
                 token=remote.token
             )
 
-        issues = github.get_issues(remote)
+        # The panel is shown from the cache and shown again if the sync
+        # changed any issue while it is open.  Only the latest panel
+        # reacts to a selection or being closed.  On first use, the first
+        # page of issues is shown while the others are fetched.
+        cache = issue_cache.get_issue_cache(remote)
+        if not cache.is_synced:
+            first_panel_ids = []
+
+            def on_first_page(issues):
+                self.show_panel(issues)
+                first_panel_ids.append(self.panel_id)
+
+            self.view.window().status_message("Getting issues...")
+            try:
+                issue_cache.sync(remote, on_first_page=on_first_page)
+            finally:
+                self.view.window().status_message("")
+            if not first_panel_ids or self.open_panel_id == first_panel_ids[0]:
+                self.show_cached_issues(cache)
+            return
+
+        self.show_cached_issues(cache)
+        panel_id = self.panel_id
+        try:
+            changed = issue_cache.sync(remote)
+        except (FailedGithubRequest, OSError) as e:
+            util.debug.add_to_log(util.debug.make_log_message("error", issue_sync=str(e)))
+            return
+        if changed and self.open_panel_id == panel_id:
+            self.show_cached_issues(cache)
+
+    def show_cached_issues(self, cache):
+        with cache.lock:
+            issues = cache.open_issues()
+        self.show_panel(issues)
+
+    def show_panel(self, issues):
+        self.panel_id = panel_id = getattr(self, "panel_id", 0) + 1
+        self.open_panel_id = panel_id
         pp = show_paginated_panel(
             issues,
-            self.on_done,
+            lambda issue: self.on_done(panel_id, issue),
             format_item=self.format_item,
-            limit=self.savvy_settings.get("github_per_page_max", 100),
-            status_message="Getting issues..."
+            limit=self.savvy_settings.get("github_per_page_max", 100)
         )
         if pp.is_empty():
+            self.open_panel_id = None
             self.view.window().status_message("No issues found.")
 
     def format_item(self, issue):
         return (
             [
-                "{number}: {title}".format(number=issue["number"], title=issue["title"]),
+                "{number}: {title}".format(number=issue.number, title=issue.title),
                 "{issue_type} created by {user}, {time_stamp}.".format(
-                    issue_type="Pull request" if "pull_request" in issue else "Issue",
-                    user=issue["user"]["login"],
-                    time_stamp=util.dates.fuzzy(issue["created_at"],
+                    issue_type="Pull request" if issue.type == "pull_request" else "Issue",
+                    user=issue.author,
+                    time_stamp=util.dates.fuzzy(issue.created_at,
                                                 date_format="%Y-%m-%dT%H:%M:%SZ")
                 )
             ],
             issue
         )
 
-    def on_done(self, issue):
+    def on_done(self, panel_id, issue):
+        if panel_id != self.panel_id:
+            return
+        self.open_panel_id = None
         if not issue:
             return
 
-        self.view.run_command("gs_insert_text_at_cursor", {"text": str(issue["number"])})
+        self.view.run_command("gs_insert_text_at_cursor", {"text": str(issue.number)})
 
 
 class GsGithubShowContributorsCommand(TextCommand, GitCommand):
@@ -1,6 +1,7 @@
+import time
+
 import sublime
-from sublime_plugin import WindowCommand
-from webbrowser import open as open_in_browser
+from sublime_plugin import WindowCommand, EventListener
 import urllib
 
 from ...core.git_command import GitCommand
@@ -10,14 +11,106 @@ from .. import github
 from .. import git_mixins
 from ...common import interwebs
 from ...common import util
+from ...common.util import open_in_browser
 from ...core.commands.push import GsPushToBranchNameCommand
+from ...core.exceptions import GitSavvyError
+from ...core.settings import SettingsMixin
 
 
 PUSH_PROMPT = ("You have not set an upstream for the active branch.  "
                "Would you like to push to a remote?")
+# Refspecs per `git fetch`, to stay below the command line length limit.
+PR_REFSPECS_PER_FETCH = 200
+
+# repo path -> time of the last fetch of the pull request heads
+last_pr_fetches = {}
+
+
+def pr_ref(remote_name, number):
+    return "refs/remotes/{}/pr/{}".format(remote_name, number)
+
 
+def pr_refspec(remote_name, number):
+    return "+refs/pull/{}/head:{}".format(number, pr_ref(remote_name, number))
 
-class GsGithubPullRequestCommand(WindowCommand, GitCommand, git_mixins.GithubRemotesMixin):
+
+class PullRequestRefsMixin:
+
+    """
+    Keep the heads of the open pull requests of the integrated remote in
+    `refs/remotes/<remote>/pr/<number>`.
+    """
+
+    def fetch_pull_request_heads(self, numbers, throw_on_stderr=True):
+        """
+        Fetch the heads of the given pull requests from the integrated
+        remote, and delete the refs of pull requests not among them.  Only
+        refs named by a number are deleted; others track branches of the
+        remote which happen to start with `pr/`.
+        """
+        remote_name = self.get_integrated_remote_name()
+        refspecs = [pr_refspec(remote_name, number) for number in numbers]
+        for start in range(0, len(refspecs), PR_REFSPECS_PER_FETCH):
+            self.git(
+                "fetch", "--no-tags", remote_name, *refspecs[start:start + PR_REFSPECS_PER_FETCH],
+                throw_on_stderr=throw_on_stderr)
+
+        wanted = {pr_ref(remote_name, number) for number in numbers}
+        prefix = "refs/remotes/{}/pr/".format(remote_name)
+        stale = [
+            ref for ref in self.git("for-each-ref", "--format=%(refname)", prefix).splitlines()
+            if ref[len(prefix):].isdigit() and ref not in wanted
+        ]
+        if stale:
+            self.git("update-ref", "--stdin", stdin="".join("delete {}\n".format(ref) for ref in stale))
+
+        last_pr_fetches[self.repo_path] = time.time()
+
+    def get_local_pr_head(self, pr):
+        """
+        Return the ref of the fetched head of the pull request, or None if it
+        was not fetched or the pull request was updated since.
+        """
+        ref = pr_ref(self.get_integrated_remote_name(), pr["number"])
+        local_sha = self.git("rev-parse", "-q", "--verify", ref, throw_on_stderr=False).strip()
+        return ref if local_sha == pr["head"]["sha"] else None
+
+    def fetch_pull_request_head(self, pr):
+        """
+        Fetch the head of a single pull request, unless it is up to date.
+        """
+        if not self.get_local_pr_head(pr):
+            remote_name = self.get_integrated_remote_name()
+            self.window.status_message("Fetching PR commit...")
+            self.git("fetch", "--no-tags", remote_name, pr_refspec(remote_name, pr["number"]))
+
+
+CHECK_STATES = {
+    "SUCCESS": "checks passed",
+    "FAILURE": "checks failed",
+    "ERROR": "checks failed",
+    "PENDING": "checks pending",
+    "EXPECTED": "checks pending",
+}
+REVIEW_DECISIONS = {
+    "APPROVED": "approved",
+    "CHANGES_REQUESTED": "changes requested",
+    "REVIEW_REQUIRED": "review required",
+}
+
+
+def format_pr_status(pr):
+    parts = [
+        "draft" if pr["draft"] else None,
+        CHECK_STATES.get(pr["status"], "no checks"),
+        REVIEW_DECISIONS.get(pr["review_decision"]),
+        "has conflicts" if pr["mergeable"] == "CONFLICTING" else None,
+    ]
+    return ", ".join(part for part in parts if part).capitalize() + "."
+
+
+class GsGithubPullRequestCommand(WindowCommand, GitCommand, git_mixins.GithubRemotesMixin,
+                                 PullRequestRefsMixin):
 
     """
     Display open pull requests on the base repo.  When a pull request is selected,
@@ -30,7 +123,8 @@ class GsGithubPullRequestCommand(WindowCommand, GitCommand, git_mixins.GithubRem
 
     def run_async(self):
         base_remote = github.parse_remote(self.get_integrated_remote_url())
-        self.pull_requests = github.get_pull_requests(base_remote)
+        self.window.status_message("Getting pull requests...")
+        self.pull_requests = github.get_pull_requests_with_status(base_remote)
 
         pp = show_paginated_panel(
             self.pull_requests,
@@ -43,17 +137,18 @@ class GsGithubPullRequestCommand(WindowCommand, GitCommand, git_mixins.GithubRem
             self.window.status_message("No pull requests found.")
 
     def format_item(self, issue):
-        return (
-            [
-                "{number}: {title}".format(number=issue["number"], title=issue["title"]),
-                "Pull request created by {user}, {time_stamp}.".format(
-                    user=issue["user"]["login"],
-                    time_stamp=util.dates.fuzzy(issue["created_at"],
-                                                date_format="%Y-%m-%dT%H:%M:%SZ")
-                )
-            ],
-            issue
-        )
+        lines = [
+            "{number}: {title}".format(number=issue["number"], title=issue["title"]),
+            "Pull request created by {user}, {time_stamp}.".format(
+                user=issue["user"]["login"],
+                time_stamp=util.dates.fuzzy(issue["created_at"],
+                                            date_format="%Y-%m-%dT%H:%M:%SZ")
+            )
+        ]
+        # Only pull requests fetched with GraphQL carry their status.
+        if "status" in issue:
+            lines.append(format_pr_status(issue))
+        return (lines, issue)
 
     def on_select_pr(self, pr):
         if not pr:
@@ -93,12 +188,7 @@ class GsGithubPullRequestCommand(WindowCommand, GitCommand, git_mixins.GithubRem
             self.open_pr_in_browser()
 
     def fetch_and_checkout_pr(self, branch_name=None):
-        self.window.status_message("Fetching PR commit...")
-        self.git(
-            "fetch",
-            self.pr["head"]["repo"]["clone_url"],
-            self.pr["head"]["ref"]
-        )
+        self.fetch_pull_request_head(self.pr)
 
         if branch_name:
             self.window.status_message("Creating local branch for PR...")
@@ -112,12 +202,7 @@ class GsGithubPullRequestCommand(WindowCommand, GitCommand, git_mixins.GithubRem
         self.checkout_ref(branch_name or self.pr["head"]["sha"])
 
     def create_branch_for_pr(self, branch_name):
-        self.window.status_message("Fetching PR commit...")
-        self.git(
-            "fetch",
-            self.pr["head"]["repo"]["clone_url"],
-            self.pr["head"]["ref"]
-        )
+        self.fetch_pull_request_head(self.pr)
 
         self.window.status_message("Creating local branch for PR...")
         self.git(
@@ -127,7 +212,9 @@ class GsGithubPullRequestCommand(WindowCommand, GitCommand, git_mixins.GithubRem
         )
 
     def view_diff_for_pr(self):
-        response = interwebs.get_url(self.pr["diff_url"])
+        diff = self.get_local_pr_diff()
+        if diff is None:
+            diff = interwebs.get_url(self.pr["diff_url"]).payload.decode("utf-8")
 
         diff_view = util.view.get_scratch_view(self, "pr_diff", read_only=True)
         diff_view.set_name("PR #{}".format(self.pr["number"]))
@@ -136,13 +223,89 @@ class GsGithubPullRequestCommand(WindowCommand, GitCommand, git_mixins.GithubRem
         self.window.focus_view(diff_view)
         diff_view.sel().clear()
         diff_view.run_command("gs_replace_view_text", {
-            "text": response.payload.decode("utf-8")
+            "text": diff
         })
 
+    def get_local_pr_diff(self):
+        """
+        Return the diff of the PR against the merge base with its base
+        branch, like GitHub shows it, if both were fetched; otherwise None.
+        """
+        head_ref = self.get_local_pr_head(self.pr)
+        if not head_ref:
+            return None
+        base_ref = "refs/remotes/{}/{}".format(self.get_integrated_remote_name(), self.pr["base"]["ref"])
+        if not self.git("rev-parse", "-q", "--verify", base_ref, throw_on_stderr=False).strip():
+            return None
+        return self.git("diff", "--no-color", "{}...{}".format(base_ref, head_ref))
+
     def open_pr_in_browser(self):
         open_in_browser(self.pr["html_url"])
 
 
+class GsGithubFetchPullRequestsCommand(WindowCommand, GitCommand, git_mixins.GithubRemotesMixin,
+                                       PullRequestRefsMixin):
+
+    """
+    Fetch the heads of all open pull requests on the base repo with a single
+    `git fetch`, so that they can be checked out and diffed without waiting
+    for the network.  If `scheduled` is set, only fetch if the last fetch is
+    older than the `github_prefetch_pull_requests` interval.
+    """
+
+    def run(self, scheduled=False):
+        sublime.set_timeout_async(lambda: self.run_async(scheduled), 0)
+
+    def run_async(self, scheduled):
+        if not scheduled:
+            base_remote = github.parse_remote(self.get_integrated_remote_url())
+            if not base_remote:
+                self.window.status_message("The integrated remote is not on GitHub.")
+                return
+            self.window.status_message("Fetching pull requests...")
+            count = self.fetch_open_pull_requests(base_remote)
+            self.window.status_message("Fetched {} pull requests.".format(count))
+            return
+
+        interval = self.savvy_settings.get("github_prefetch_pull_requests")
+        try:
+            repo_path = self.repo_path
+        except (ValueError, RuntimeError):
+            return
+        if not interval or time.time() - last_pr_fetches.get(repo_path, 0) < interval * 60:
+            return
+        # Don't try again right away if the fetch fails, or the repo is not
+        # on GitHub at all.
+        last_pr_fetches[repo_path] = time.time()
+        try:
+            base_remote = github.parse_remote(self.get_integrated_remote_url())
+            if base_remote and github.is_known_github_host(base_remote):
+                self.fetch_open_pull_requests(base_remote, show_errors=False)
+        except (ValueError, OSError, GitSavvyError) as e:
+            util.debug.add_to_log(util.debug.make_log_message("error", pr_prefetch=str(e)))
+
+    def fetch_open_pull_requests(self, base_remote, show_errors=True):
+        numbers = github.get_open_pull_request_numbers(base_remote, show_panel=show_errors)
+        self.fetch_pull_request_heads(numbers, throw_on_stderr=show_errors)
+        return len(numbers)
+
+
+class GsGithubPrefetchPullRequestsEventListener(EventListener, SettingsMixin):
+
+    """
+    Fetch the heads of the open pull requests periodically, if enabled with
+    the `github_prefetch_pull_requests` setting.
+    """
+
+    def on_activated_async(self, view):
+        window = view.window()
+        if not window or not self.savvy_settings.get("github_prefetch_pull_requests"):
+            return
+        if not view.settings().get("git_savvy.repo_path") and not view.file_name():
+            return
+        window.run_command("gs_github_fetch_pull_requests", {"scheduled": True})
+
+
 class GsGithubCreatePullRequestCommand(WindowCommand, GitCommand, git_mixins.GithubRemotesMixin):
     """
     Create pull request of the current commit on the current repo.
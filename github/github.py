@@ -2,18 +2,30 @@
 GitHub methods that are functionally separate from anything Sublime-related.
 """
 
+import json
 import re
-from collections import namedtuple
-from webbrowser import open as open_in_browser
+import time
+from collections import deque, namedtuple
 from functools import partial
+from itertools import islice
 
 from ..common import interwebs, util
+from ..common.util import open_in_browser
 from ..core.exceptions import FailedGithubRequest
 from ..core.settings import GitSavvySettings
 
 
 GITHUB_PER_PAGE_MAX = 100
+# Pages of a listing which are requested at the same time.
+GITHUB_MAX_CONCURRENT_REQUESTS = 4
+# Requests refused by a rate limit are sent again up to this many times, if
+# the limit resets within `RATE_LIMIT_MAX_WAIT` seconds.  Pages are waited
+# for on Sublime's shared async thread, so only short waits are taken;
+# otherwise the request fails with `RATE_LIMIT_ERROR_TEMPLATE`.
+RATE_LIMIT_RETRIES = 1
+RATE_LIMIT_MAX_WAIT = 5
 GITHUB_ERROR_TEMPLATE = "Error {action} Github: {payload}"
+RATE_LIMIT_ERROR_TEMPLATE = "Error {action} Github: the API rate limit resets in {seconds} seconds."
 AUTH_ERROR_TEMPLATE = """Error {action} Github, access was denied!
 
 Please ensure you have created a Github API token and added it to
@@ -22,6 +34,8 @@ your settings, as described in the documentation:
 https://github.com/divmain/GitSavvy/blob/master/docs/github.md#setup
 """
 
+re_link = re.compile(r'<([^>]+)>;\s*rel="([^"]+)"')
+
 GitHubRepo = namedtuple("GitHubRepo", ("url", "fqdn", "owner", "repo", "token"))
 
 
@@ -49,7 +63,7 @@ def remote_to_url(remote):
     elif remote.startswith("http"):
         return remote
     else:
-        util.log_error('Cannot parse remote "%s" to url' % remote)
+        util.debug.log_error('Cannot parse remote "%s" to url' % remote)
         return None
 
 
@@ -66,7 +80,7 @@ def parse_remote(remote):
     match = re.match(r"https?://([a-zA-Z-\.0-9]+)/([a-zA-Z-\._0-9]+)/([a-zA-Z-\._0-9]+)/?", url)
 
     if not match:
-        util.log_error('Invalid github url: %s' % url)
+        util.debug.log_error('Invalid github url: %s' % url)
         return None
 
     fqdn, owner, repo = match.groups()
@@ -128,6 +142,16 @@ def get_api_fqdn(github_repo):
     return True, github_repo.fqdn
 
 
+def is_known_github_host(github_repo):
+    """
+    Return whether the repo is hosted on GitHub.com, or on a GitHub
+    Enterprise instance an API token is configured for.  `parse_remote`
+    accepts any host, and takes other ones, like GitLab, for Enterprise.
+    """
+    is_enterprise, _ = get_api_fqdn(github_repo)
+    return not is_enterprise or bool(github_repo.token)
+
+
 def github_api_url(api_url_template, repository, **kwargs):
     """
     Construct a github URL to query using the given url template string,
@@ -148,15 +172,20 @@ def github_api_url(api_url_template, repository, **kwargs):
         query_params=interwebs.urlencode(kwargs))
 
 
-def validate_response(response, method="GET"):
+def validate_response(response, method="GET", show_panel=True):
     action = {"GET": 'querying', "POST": 'posting to'}[method]
 
+    wait = get_rate_limit_wait(response)
+    if wait is not None:
+        raise FailedGithubRequest(
+            RATE_LIMIT_ERROR_TEMPLATE.format(action=action, seconds=int(wait)), show_panel=show_panel)
+
     if response.status in [401, 403]:
-        raise FailedGithubRequest(AUTH_ERROR_TEMPLATE.format(action=action))
+        raise FailedGithubRequest(AUTH_ERROR_TEMPLATE.format(action=action), show_panel=show_panel)
 
     if response.status < 200 or response.status > 299 or not response.is_json:
         raise FailedGithubRequest(GITHUB_ERROR_TEMPLATE.format(
-            action=action, payload=response.payload))
+            action=action, payload=response.payload), show_panel=show_panel)
 
 
 def query_github(api_url_template, github_repo):
@@ -177,39 +206,156 @@ def query_github(api_url_template, github_repo):
 get_repo_data = partial(query_github, "/repos/{owner}/{repo}")
 
 
-def iteratively_query_github(api_url_template, github_repo):
+def iteratively_query_github(api_url_template, github_repo, show_panel=True, **query_params):
     """
     Like `query_github` but return a generator by repeatedly
     iterating until no link to next page.
     """
     fqdn, path = github_api_url(api_url_template, github_repo,
-                                per_page=GITHUB_PER_PAGE_MAX)
+                                per_page=GITHUB_PER_PAGE_MAX, **query_params)
     auth = (github_repo.token, "x-oauth-basic") if github_repo.token else None
 
-    response = None
+    for response in iter_github_pages(fqdn, path, auth, show_panel=show_panel):
+        if not response.payload:
+            break
+        for item in response.payload:
+            yield item
+
 
-    while True:
-        if response is not None:
-            # it means this is not the first iter
-            if "Link" not in response.headers:
-                break
+def iter_github_pages(fqdn, path, auth, show_panel=True):
+    """
+    Yield the responses for all pages of a listing, in order.  If the first
+    response links to the last page, the URLs of all pages are known, and
+    the next ones are fetched concurrently while the current one is
+    consumed; otherwise the `next` links are followed one by one.
+    https://developer.github.com/v3/#pagination
+    """
+    def get_page(path):
+        response = get_with_rate_limit_backoff(fqdn, path, auth)
+        validate_response(response, show_panel=show_panel)
+        return response
+
+    response = get_page(path)
+    yield response
+
+    links = parse_link_header(interwebs.get_header(response.headers, "Link", ""))
+    page_urls = get_page_urls(links)
+    if page_urls is not None:
+        for response in prefetch(get_page, page_urls, GITHUB_MAX_CONCURRENT_REQUESTS):
+            yield response
+        return
+
+    while "next" in links:
+        response = get_page(links["next"])
+        yield response
+        links = parse_link_header(interwebs.get_header(response.headers, "Link", ""))
+
+
+def parse_link_header(link_header):
+    """
+    Parse a `Link` header into a dict from each `rel` to its URL.
+    """
+    return {rel: url for url, rel in re_link.findall(link_header)}
 
-            # following next link
-            # https://developer.github.com/v3/#pagination
-            match = re.match(r'.*<([^>]+)>; rel="next"', response.headers["Link"])
-            if not match:
-                break
 
-            path = match.group(1)
+def get_page_urls(links):
+    """
+    Return the URLs of the pages from `next` to `last`, if the links number
+    their pages; otherwise None.
+    """
+    if "next" not in links or "last" not in links:
+        return None
+
+    next_page = _get_page_number(links["next"])
+    last_page = _get_page_number(links["last"])
+    if next_page is None or last_page is None:
+        return None
 
+    url = interwebs.urlparse(links["last"])
+    query = interwebs.parse_qsl(url.query)
+    return [
+        url._replace(query=interwebs.urlencode([
+            (key, str(page) if key == "page" else value) for key, value in query
+        ])).geturl()
+        for page in range(next_page, last_page + 1)
+    ]
+
+
+def _get_page_number(url):
+    query = dict(interwebs.parse_qsl(interwebs.urlparse(url).query))
+    try:
+        return int(query["page"])
+    except (KeyError, ValueError):
+        return None
+
+
+def prefetch(fn, args, max_workers):
+    """
+    Yield `fn(arg)` for every arg in order, computing up to `max_workers`
+    results ahead in a thread pool.  No more work is started once the
+    generator is closed.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    args = iter(args)
+    pending = deque(executor.submit(fn, arg) for arg in islice(args, max_workers))
+    try:
+        while pending:
+            result = pending.popleft().result()
+            for arg in islice(args, 1):
+                pending.append(executor.submit(fn, arg))
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def get_with_rate_limit_backoff(fqdn, path, auth):
+    """
+    GET a path from the API.  If the request was refused because of a rate
+    limit which resets soon, wait for it and try again.
+    """
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
         response = interwebs.get(fqdn, 443, path, https=True, auth=auth)
-        validate_response(response)
+        delay = get_rate_limit_delay(response)
+        if delay is None or attempt == RATE_LIMIT_RETRIES:
+            return response
+        time.sleep(delay)
+
+
+def get_rate_limit_delay(response, now=None):
+    """
+    Return the seconds to wait before sending a request refused by a rate
+    limit again, or None if it was not refused, or the wait would be longer
+    than `RATE_LIMIT_MAX_WAIT`.
+    """
+    delay = get_rate_limit_wait(response, now)
+    return delay if delay is not None and delay <= RATE_LIMIT_MAX_WAIT else None
+
+
+def get_rate_limit_wait(response, now=None):
+    """
+    Return the seconds until a request refused by a rate limit may be sent
+    again, or None if it was not refused because of one.
+    """
+    if response.status not in (403, 429):
+        return None
 
-        if response.payload:
-            for item in response.payload:
-                yield item
+    retry_after = interwebs.get_header(response.headers, "Retry-After")
+    reset = interwebs.get_header(response.headers, "X-RateLimit-Reset")
+    remaining = interwebs.get_header(response.headers, "X-RateLimit-Remaining")
+    try:
+        if retry_after is not None:
+            delay = int(retry_after)
+        elif remaining == "0" and reset is not None:
+            delay = int(reset) - (time.time() if now is None else now) + 1
         else:
-            break
+            return None
+    except ValueError:
+        return None
+
+    return max(delay, 1)
 
 
 get_issues = partial(iteratively_query_github, "/repos/{owner}/{repo}/issues")
@@ -218,6 +364,154 @@ get_forks = partial(iteratively_query_github, "/repos/{owner}/{repo}/forks")
 get_pull_requests = partial(iteratively_query_github, "/repos/{owner}/{repo}/pulls")
 
 
+PULL_REQUESTS_QUERY = """
+query($owner: String!, $repo: String!, $first: Int!, $cursor: String) {
+  repository(owner: $owner, name: $repo) {
+    pullRequests(states: OPEN, first: $first, after: $cursor,
+                 orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number title url createdAt isDraft mergeable reviewDecision
+        author { login }
+        baseRefName headRefName headRefOid
+        headRepository { url }
+        commits(last: 1) { nodes { commit { statusCheckRollup { state } } } }
+      }
+    }
+  }
+}
+"""
+
+
+PULL_REQUEST_NUMBERS_QUERY = """
+query($owner: String!, $repo: String!, $first: Int!, $cursor: String) {
+  repository(owner: $owner, name: $repo) {
+    pullRequests(states: OPEN, first: $first, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes { number }
+    }
+  }
+}
+"""
+
+
+def graphql_api_url(github_repo):
+    """
+    Return the FQDN and path of the GraphQL endpoint for the given repo.
+    """
+    is_enterprise, fqdn = get_api_fqdn(github_repo)
+    return fqdn, "/api/graphql" if is_enterprise else "/graphql"
+
+
+def query_github_graphql(github_repo, query, variables):
+    """
+    Run a GraphQL query and return its `data`.  Raise `FailedGithubRequest`
+    if the query failed, without showing the error to the user: callers
+    fall back to the REST API.
+    """
+    fqdn, path = graphql_api_url(github_repo)
+    auth = (github_repo.token, "x-oauth-basic") if github_repo.token else None
+    payload = json.dumps({"query": query, "variables": variables}).encode("utf-8")
+
+    response = interwebs.post(
+        fqdn, 443, path, payload=payload, https=True, auth=auth,
+        headers={"Content-Type": "application/json"})
+    if response.status != 200 or not response.is_json or response.payload.get("errors"):
+        raise FailedGithubRequest(
+            GITHUB_ERROR_TEMPLATE.format(action="querying", payload=response.payload),
+            show_panel=False)
+    return response.payload["data"]
+
+
+def get_pull_requests_with_status(github_repo):
+    """
+    Return an iterable of the open pull requests of the repo, including
+    their CI status, review decision and mergeability, as fetched with
+    GraphQL in batches of `GITHUB_PER_PAGE_MAX`.  The pull requests are
+    shaped like those of the REST API, with the additional keys `status`,
+    `review_decision`, `mergeable` and `draft`.
+
+    GraphQL needs a token; without one, or if the first query fails (e.g.
+    on GitHub Enterprise versions without GraphQL), the pull requests are
+    listed with the REST API instead, and lack the additional keys.
+    """
+    if not github_repo.token:
+        return get_pull_requests(github_repo)
+    try:
+        first_page = query_pull_requests_page(github_repo, None)
+    except (FailedGithubRequest, KeyError, TypeError, AttributeError):
+        return get_pull_requests(github_repo)
+    return iter_pull_request_pages(github_repo, first_page)
+
+
+def get_open_pull_request_numbers(github_repo, show_panel=True):
+    """
+    Return the numbers of the open pull requests of the repo.  With a token,
+    only the numbers are queried with GraphQL; otherwise, or if that fails,
+    they are taken from the REST listing.
+    """
+    if github_repo.token:
+        try:
+            numbers = []
+            cursor = None
+            while True:
+                page = query_pull_requests_page(github_repo, cursor, PULL_REQUEST_NUMBERS_QUERY)
+                numbers += [node["number"] for node in page["nodes"]]
+                if not page["pageInfo"]["hasNextPage"]:
+                    return numbers
+                cursor = page["pageInfo"]["endCursor"]
+        except (FailedGithubRequest, KeyError, TypeError, AttributeError):
+            pass
+    return [pr["number"] for pr in get_pull_requests(github_repo, show_panel=show_panel, state="open")]
+
+
+def query_pull_requests_page(github_repo, cursor, query=PULL_REQUESTS_QUERY):
+    data = query_github_graphql(github_repo, query, {
+        "owner": github_repo.owner,
+        "repo": github_repo.repo,
+        "first": GITHUB_PER_PAGE_MAX,
+        "cursor": cursor
+    })
+    return data["repository"]["pullRequests"]
+
+
+def iter_pull_request_pages(github_repo, page):
+    while True:
+        for node in page["nodes"]:
+            yield pull_request_from_graphql(node)
+        if not page["pageInfo"]["hasNextPage"]:
+            break
+        page = query_pull_requests_page(github_repo, page["pageInfo"]["endCursor"])
+
+
+def pull_request_from_graphql(node):
+    """
+    Convert a pull request node of `PULL_REQUESTS_QUERY` into the shape of
+    a pull request of the REST API.
+    """
+    commits = node["commits"]["nodes"]
+    rollup = commits[0]["commit"]["statusCheckRollup"] if commits else None
+    head_repo = node["headRepository"]
+    return {
+        "number": node["number"],
+        "title": node["title"],
+        "created_at": node["createdAt"],
+        "user": {"login": node["author"]["login"] if node["author"] else "ghost"},
+        "html_url": node["url"],
+        "diff_url": node["url"] + ".diff",
+        "base": {"ref": node["baseRefName"]},
+        "head": {
+            "ref": node["headRefName"],
+            "sha": node["headRefOid"],
+            "repo": {"clone_url": head_repo["url"] + ".git"} if head_repo else None
+        },
+        "status": rollup["state"] if rollup else None,
+        "review_decision": node["reviewDecision"],
+        "mergeable": node["mergeable"],
+        "draft": node["isDraft"],
+    }
+
+
 def post_to_github(api_url_template, github_repo):
     """
     Takes a URL template that takes `owner` and `repo` template variables
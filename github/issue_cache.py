@@ -0,0 +1,146 @@
+"""
+Persistent, per-repository cache of the issues and pull requests of a
+GitHub repo, for the issue completion of the commit view.  The first sync
+lists the open issues; later ones only ask for the issues updated since
+the latest update seen so far.
+"""
+
+from collections import namedtuple
+import os
+import threading
+
+from . import github
+from ..common import util
+
+
+Issue = namedtuple("Issue", ("number", "title", "state", "type", "author", "created_at", "updated_at"))
+
+caches = {}
+caches_lock = threading.Lock()
+
+
+def get_issue_cache(github_repo):
+    key = "{}/{}/{}".format(github_repo.fqdn, github_repo.owner, github_repo.repo).lower()
+    with caches_lock:
+        cache = caches.get(key)
+        if cache is None:
+            cache = caches[key] = IssueCache(key)
+        return cache
+
+
+def sync(github_repo, on_first_page=None):
+    """
+    Fetch the issues changed since the last sync into the cache of
+    `github_repo`.  Return whether any issue changed; False also if
+    another sync of the cache is running already.
+
+    The first sync of a cache lists all open issues, which may take many
+    pages.  Once its first page is complete, `on_first_page(issues)` is
+    called with the issues so far, newest first, so that they can be
+    shown while the remaining pages are fetched.
+    """
+    cache = get_issue_cache(github_repo)
+    with cache.lock:
+        if cache.syncing:
+            return False
+        cache.syncing = True
+        params = cache.get_sync_params()
+        was_synced = cache.is_synced
+
+    try:
+        items = []
+        for item in github.get_issues(github_repo, **params):
+            items.append(item)
+            if on_first_page and not was_synced and len(items) == github.GITHUB_PER_PAGE_MAX:
+                on_first_page(newest_first(make_issue(first) for first in items))
+
+        with cache.lock:
+            changed = cache.update(items)
+            if changed or not was_synced:
+                cache.save()
+        return changed
+    finally:
+        cache.syncing = False
+
+
+def make_issue(item):
+    return Issue(
+        item["number"],
+        item["title"],
+        item["state"],
+        "pull_request" if "pull_request" in item else "issue",
+        item["user"]["login"],
+        item["created_at"],
+        item["updated_at"])
+
+
+def newest_first(issues):
+    return sorted(issues, key=lambda issue: -issue.number)
+
+
+class IssueCache:
+
+    def __init__(self, key):
+        try:
+            self.path = os.path.join(
+                util.cache.cache_dir("github_issues"), util.cache.repo_key(key) + ".json")
+        except OSError:
+            self.path = None
+        self.lock = threading.Lock()
+        self.syncing = False
+        self.is_synced = False
+        # The latest `updated_at` of the issues, in GitHub's ISO 8601 format,
+        # which sorts chronologically; None while no issue was seen.
+        self.synced_until = None
+        # number -> Issue
+        self.issues = {}
+        self._load()
+
+    def _load(self):
+        data = util.cache.read_json(self.path) if self.path else None
+        if isinstance(data, dict) and "synced_until" in data and "issues" in data:
+            self.is_synced = True
+            self.synced_until = data["synced_until"]
+            self.issues = {record[0]: Issue(*record) for record in data["issues"]}
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            util.cache.write_json(self.path, {
+                "synced_until": self.synced_until,
+                "issues": [list(issue) for issue in self.issues.values()]
+            })
+        except OSError as e:
+            util.debug.add_to_log(util.debug.make_log_message("error", issue_cache=str(e)))
+
+    def get_sync_params(self):
+        """
+        Return the query parameters of the issues request for the next sync.
+        """
+        if self.synced_until is None:
+            return {"state": "open"}
+        return {"state": "all", "sort": "updated", "direction": "asc", "since": self.synced_until}
+
+    def update(self, items):
+        """
+        Add or update the issues of an API response.  Return whether any
+        issue changed.
+        """
+        changed = False
+        for item in items:
+            issue = make_issue(item)
+            if self.issues.get(issue.number) != issue:
+                self.issues[issue.number] = issue
+                changed = True
+            if self.synced_until is None or issue.updated_at > self.synced_until:
+                self.synced_until = issue.updated_at
+
+        self.is_synced = True
+        return changed
+
+    def open_issues(self):
+        """
+        Return the open issues and pull requests, newest first.
+        """
+        return newest_first(issue for issue in self.issues.values() if issue.state == "open")
@@ -1,6 +1,5 @@
 import sublime
 from sublime_plugin import WindowCommand
-from webbrowser import open as open_in_browser
 # import urllib
 
 from ...core.git_command import GitCommand
@@ -10,6 +9,7 @@ from .. import gitlab
 from .. import git_mixins
 # from ...common import interwebs
 from ...common import util
+from ...common.util import open_in_browser
 # from ...core.commands.push import GsPushToBranchNameCommand
 
 
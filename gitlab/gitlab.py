@@ -5,9 +5,9 @@ GitLab methods that are functionally separate from anything Sublime-related.
 import re
 from collections import namedtuple
 from functools import partial, lru_cache
-from webbrowser import open as open_in_browser
 
 from ..common import interwebs, util
+from ..common.util import open_in_browser
 from ..core.exceptions import FailedGitLabRequest
 from ..core.settings import GitSavvySettings
 
@@ -68,7 +68,7 @@ def parse_remote(remote):
     match = re.match(r"https?://([a-zA-Z-\.0-9]+)/([a-zA-Z-\._0-9]+)/([a-zA-Z-\._0-9]+)/?", url)
 
     if not match:
-        util.log_error('Invalid gitlab url: %s' % url)
+        util.debug.log_error('Invalid gitlab url: %s' % url)
         return None
 
     fqdn, owner, repo = match.groups()
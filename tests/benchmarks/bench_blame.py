@@ -0,0 +1,70 @@
+"""
+Benchmark `git blame --porcelain` on a large file, reporting the time
+spent in Git separately from the time spent parsing and formatting.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from GitSavvy.common.util.parse_blame import parse_blame, commit_cache
+from GitSavvy.core.commands.blame import GsBlameRefreshCommand
+
+import unittest
+
+
+LINE_COUNT = 50000
+COMMIT_COUNT = 10
+
+
+def git(cwd, *args):
+    return subprocess.check_output(
+        ("git", "-c", "user.name=Bench", "-c", "user.email=bench@example.com") + args,
+        cwd=cwd)
+
+
+class BenchBlame(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.repo = tempfile.mkdtemp()
+        git(cls.repo, "init", "-q")
+        path = os.path.join(cls.repo, "big.txt")
+        lines = ["line {} of the original file".format(i) for i in range(LINE_COUNT)]
+        for n in range(COMMIT_COUNT):
+            # Touch every n-th line so that blame has to walk all commits.
+            for i in range(n, LINE_COUNT, COMMIT_COUNT):
+                lines[i] = "line {} changed in commit {}".format(i, n)
+            with open(path, "w") as f:
+                f.write("\n".join(lines) + "\n")
+            git(cls.repo, "add", "big.txt")
+            git(cls.repo, "commit", "-q", "-m", "commit {}".format(n))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.repo, ignore_errors=True)
+
+    def test_blame(self):
+        start = time.perf_counter()
+        stdout = git(self.repo, "blame", "--porcelain", "--", "big.txt")
+        git_time = time.perf_counter() - start
+
+        commit_cache.clear()
+        start = time.perf_counter()
+        blamed_lines, commits = parse_blame(stdout)
+        parse_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parse_blame(stdout)
+        warm_parse_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        GsBlameRefreshCommand.format_blame(blamed_lines, commits)
+        format_time = time.perf_counter() - start
+
+        self.assertEqual(len(blamed_lines), LINE_COUNT)
+        print(
+            "\nblame {} lines: git {:.3f}s, parse {:.3f}s (warm cache {:.3f}s), format {:.3f}s"
+            .format(LINE_COUNT, git_time, parse_time, warm_parse_time, format_time))
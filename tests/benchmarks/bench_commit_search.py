@@ -0,0 +1,38 @@
+"""
+Benchmark queries against a commit search index of a million commits.
+"""
+
+import random
+import time
+
+from GitSavvy.core.commit_search import CommitSearchIndex
+
+import unittest
+
+
+COMMIT_COUNT = 1000000
+WORDS = ["word{}".format(i) for i in range(20000)]
+AUTHORS = [("Author {}".format(i), "author{}@example.com".format(i)) for i in range(500)]
+
+
+class BenchCommitSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rnd = random.Random(0)
+        cls.index = CommitSearchIndex()
+        start = time.perf_counter()
+        cls.index.add_commits(
+            ("{:040x}".format(i),) + rnd.choice(AUTHORS) + (
+                str(i), " ".join(rnd.choice(WORDS) for _ in range(6)),
+                " ".join(rnd.choice(WORDS) for _ in range(20)))
+            for i in range(COMMIT_COUNT))
+        print("\nindexed {} commits in {:.1f}s".format(COMMIT_COUNT, time.perf_counter() - start))
+
+    def test_queries(self):
+        for query in ["word1 ", "author7 word2", "word12 word345 ", "word123", "wo", "nothing "]:
+            start = time.perf_counter()
+            results = self.index.search(query)
+            elapsed = time.perf_counter() - start
+            print("{!r}: {} results in {:.1f} ms".format(query, len(results), elapsed * 1000))
+            self.assertLess(elapsed, 0.1)
@@ -0,0 +1,91 @@
+"""
+Benchmark parsing a large multi-file diff, reporting the parse time and,
+where `tracemalloc` is available, the peak memory relative to the size of
+the diff.
+"""
+
+import io
+import time
+
+from GitSavvy.common.util.parse_diff import parse_diff
+
+import unittest
+
+try:
+    import tracemalloc
+except ImportError:
+    # Not available before Python 3.4.
+    tracemalloc = None
+
+
+FILE_COUNT = 2000
+HUNKS_PER_FILE = 20
+
+
+def make_diff():
+    parts = []
+    for file_no in range(FILE_COUNT):
+        parts.append(
+            "diff --git a/file{0}.txt b/file{0}.txt\n"
+            "index 1111111..2222222 100644\n"
+            "--- a/file{0}.txt\n"
+            "+++ b/file{0}.txt\n".format(file_no))
+        for hunk_no in range(HUNKS_PER_FILE):
+            line = hunk_no * 10 + 1
+            parts.append(
+                "@@ -{0},7 +{0},7 @@\n"
+                " context line one of the hunk\n"
+                " context line two of the hunk\n"
+                " context line three of the hunk\n"
+                "-a line which was removed from file {1}\n"
+                "+a line which was added to file {1}\n"
+                " context line four of the hunk\n"
+                " context line five of the hunk\n"
+                " context line six of the hunk\n".format(line, file_no))
+    return "".join(parts)
+
+
+class BenchParseDiff(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.diff = make_diff()
+
+    def measure(self, parse):
+        if tracemalloc:
+            tracemalloc.start()
+        start = time.perf_counter()
+        hunks = parse()
+        elapsed = time.perf_counter() - start
+        peak = None
+        if tracemalloc:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        self.assertEqual(len(hunks), FILE_COUNT * HUNKS_PER_FILE)
+        return hunks, elapsed, peak
+
+    def report(self, name, elapsed, peak):
+        memory = (
+            ", peak memory {:.1f} MB ({:.2f}x the diff)".format(
+                peak / 1e6, peak / len(self.diff))
+            if peak is not None else "")
+        print("\nparse_diff {} ({:.1f} MB): {:.3f}s{}".format(
+            name, len(self.diff) / 1e6, elapsed, memory))
+
+    def test_parse_string(self):
+        _, elapsed, peak = self.measure(lambda: parse_diff(self.diff))
+        self.report("from string", elapsed, peak)
+
+    def test_parse_lines(self):
+        # Created up front, as it holds a copy of the whole diff.
+        lines = io.StringIO(self.diff)
+        _, elapsed, peak = self.measure(lambda: parse_diff(lines))
+        self.report("from lines", elapsed, peak)
+
+    def test_changes(self):
+        hunks = parse_diff(self.diff)
+        start = time.perf_counter()
+        count = sum(len(hunk.changes) for hunk in hunks)
+        elapsed = time.perf_counter() - start
+        print("\nHunk.changes for all {} hunks ({} lines): {:.3f}s".format(
+            len(hunks), count, elapsed))
@@ -0,0 +1,52 @@
+"""
+Report how long loading the plugin took, as measured by the startup
+profiler, check it against a time budget, and check that features' heavy
+dependencies are not imported when the plugin is loaded.
+"""
+
+from GitSavvy.common import startup_profile
+
+import os
+import unittest
+
+
+# Seconds loading the plugin may take.  Slow machines can raise it with
+# the `GITSAVVY_MAX_LOAD_TIME` environment variable.
+MAX_LOAD_TIME = 0.5
+
+
+# Imported only by the commands which need them.
+LAZY_MODULES = (
+    "concurrent.futures",
+    "difflib",
+    "distutils.version",
+    "filecmp",
+    "gzip",
+    "http.client",
+    "tempfile",
+    "webbrowser",
+    "xml.etree.ElementTree",
+    "yaml",
+)
+
+
+class BenchStartup(unittest.TestCase):
+
+    def setUp(self):
+        if startup_profile.load_time is None:
+            self.skipTest("the plugin was not loaded with the startup profiler")
+
+    def test_load_time(self):
+        print("\nplugin load: {:.3f}s, {} modules imported".format(
+            startup_profile.load_time, len(startup_profile.import_times)))
+        for module_name, elapsed, self_time in startup_profile.get_slowest_imports(10):
+            print("  {:<50} {:.4f}s (with imports {:.4f}s)".format(module_name, self_time, elapsed))
+
+        max_load_time = float(os.environ.get("GITSAVVY_MAX_LOAD_TIME", MAX_LOAD_TIME))
+        self.assertLessEqual(
+            startup_profile.load_time, max_load_time,
+            "loading the plugin took longer than {}s".format(max_load_time))
+
+    def test_heavy_modules_are_imported_lazily(self):
+        imported = {module_name for module_name, _, _ in startup_profile.import_times}
+        self.assertEqual(sorted(imported.intersection(LAZY_MODULES)), [])
@@ -0,0 +1,172 @@
+from GitSavvy.core import author_index
+from GitSavvy.core.author_index import Author, AuthorIndex
+from GitSavvy.core.git_mixins.history import HistoryMixin
+from GitSavvy.core.ui_mixins import quick_panel
+
+import os
+import subprocess
+import tempfile
+import unittest
+
+
+LOG_OUTPUT = (
+    "Bob\x00bob@example.com\x001500000300\n"
+    "Alice\x00alice@example.com\x001500000200\n"
+    "Bob\x00bob@example.com\x001500000100\n"
+)
+
+
+class TestAuthorIndex(unittest.TestCase):
+
+    def test_count(self):
+        self.assertEqual(AuthorIndex.count(LOG_OUTPUT), {
+            ("Bob", "bob@example.com"): [2, 1500000300],
+            ("Alice", "alice@example.com"): [1, 1500000200],
+        })
+
+    def test_count_adds_to_authors(self):
+        authors = AuthorIndex.count(LOG_OUTPUT)
+        AuthorIndex.count("Alice\x00alice@example.com\x001500000400\n", authors)
+        self.assertEqual(authors[("Alice", "alice@example.com")], [2, 1500000400])
+        self.assertEqual(authors[("Bob", "bob@example.com")], [2, 1500000300])
+
+    def test_sorted_authors_most_commits_first(self):
+        index = AuthorIndex("/nonexistent")
+        index.authors = AuthorIndex.count(
+            LOG_OUTPUT + "Carol\x00carol@example.com\x001500000000\n")
+        self.assertEqual(index.sorted_authors(), [
+            Author("Bob", "bob@example.com", 2, 1500000300),
+            Author("Alice", "alice@example.com", 1, 1500000200),
+            Author("Carol", "carol@example.com", 1, 1500000000),
+        ])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            index = AuthorIndex("/nonexistent")
+            index.path = os.path.join(cache_dir, "authors.json")
+            index.head = "a" * 40
+            index.authors = AuthorIndex.count(LOG_OUTPUT)
+            index.save()
+
+            loaded = AuthorIndex("/nonexistent")
+            loaded.path = index.path
+            loaded._load()
+            self.assertEqual(loaded.head, index.head)
+            self.assertEqual(loaded.sorted_authors(), index.sorted_authors())
+
+
+class GitHistory(HistoryMixin):
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.log_ranges = []
+
+    def git(self, *args, throw_on_stderr=True):
+        if args[0] == "log":
+            self.log_ranges.append(args[-1])
+        process = subprocess.Popen(
+            ("git",) + args,
+            cwd=self.repo_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        return process.communicate()[0].decode()
+
+    def commit(self, name, time):
+        env = dict(
+            os.environ,
+            GIT_AUTHOR_NAME=name, GIT_AUTHOR_EMAIL=name.lower() + "@example.com",
+            GIT_COMMITTER_NAME=name, GIT_COMMITTER_EMAIL=name.lower() + "@example.com",
+            GIT_AUTHOR_DATE="{} +0000".format(time), GIT_COMMITTER_DATE="{} +0000".format(time))
+        subprocess.Popen(
+            ("git", "commit", "-q", "--allow-empty", "-m", "Commit by " + name),
+            cwd=self.repo_path, stdout=subprocess.DEVNULL, env=env).communicate()
+        return self.git("rev-parse", "HEAD").strip()
+
+
+class TestGetAuthors(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.repo = GitHistory(self.tmp_dir.name)
+        self.repo.git("init", "-q")
+
+    def tearDown(self):
+        author_index.indexes.pop(self.repo.repo_path, None)
+        self.tmp_dir.cleanup()
+
+    def test_empty_repository(self):
+        self.assertEqual(self.repo.get_authors(), [])
+
+    def test_build_and_update(self):
+        self.repo.commit("Alice", 1500000100)
+        first = self.repo.commit("Bob", 1500000200)
+        self.assertEqual(self.repo.get_authors(), [
+            Author("Alice", "alice@example.com", 1, 1500000100),
+            Author("Bob", "bob@example.com", 1, 1500000200),
+        ])
+
+        # Unchanged HEAD is served from the index.
+        self.repo.log_ranges = []
+        self.repo.get_authors()
+        self.assertEqual(self.repo.log_ranges, [])
+
+        # Only the new commits are counted if HEAD moved forward.
+        head = self.repo.commit("Bob", 1500000300)
+        self.assertEqual(self.repo.get_authors(), [
+            Author("Bob", "bob@example.com", 2, 1500000300),
+            Author("Alice", "alice@example.com", 1, 1500000100),
+        ])
+        self.assertEqual(self.repo.log_ranges, ["{}..{}".format(first, head)])
+        self.assertEqual(author_index.get_author_index(self.repo.repo_path).head, head)
+
+
+class FakeWindow:
+    def show_quick_panel(self, items, on_done, flags=0, selected_index=-1):
+        self.items = items
+        self.on_done = on_done
+        self.selected_index = selected_index
+
+
+class FakeAuthorPanel(quick_panel.AuthorPanel):
+    def __init__(self, authors, email):
+        self.window = FakeWindow()
+        self.selections = []
+        self.on_done = self.selections.append
+        self.authors_to_show = authors
+        self.email = email
+
+    def git(self, *args, throw_on_stderr=True):
+        return self.email + "\n"
+
+    def get_authors(self):
+        return self.authors_to_show
+
+
+class TestAuthorPanel(unittest.TestCase):
+
+    AUTHORS = [
+        Author("Bob", "bob@example.com", 2, 1500000300),
+        Author("Alice", "alice@example.com", 1, 1500000200),
+    ]
+
+    def test_current_user_is_preselected(self):
+        panel = FakeAuthorPanel(self.AUTHORS, "alice@example.com")
+        panel.show()
+        self.assertEqual(panel.window.selected_index, 1)
+        self.assertEqual(panel.window.items[0][0], "Bob <bob@example.com>")
+        self.assertTrue(panel.window.items[0][1].startswith("2 commits, the last one "))
+
+    def test_unknown_user_selects_first_author(self):
+        panel = FakeAuthorPanel(self.AUTHORS, "carol@example.com")
+        panel.show()
+        self.assertEqual(panel.window.selected_index, 0)
+
+    def test_selection(self):
+        panel = FakeAuthorPanel(self.AUTHORS, "")
+        panel.show()
+        panel.window.on_done(1)
+        panel.window.on_done(-1)
+        self.assertEqual(panel.selections, ["Alice <alice@example.com>", None])
+
+    def test_no_authors(self):
+        panel = FakeAuthorPanel([], "")
+        panel.show()
+        self.assertEqual(panel.window.items, ["There are no authors available."])
+        self.assertIsNone(panel.window.on_done)
@@ -0,0 +1,40 @@
+from GitSavvy.common.util.collapsed_diff import (
+    FileStat, changed_lines, file_summary, format_diffstat, parse_numstat, re_file_summary,
+    render_collapsed_diff)
+
+import unittest
+
+
+class TestCollapsedDiff(unittest.TestCase):
+    def test_parse_numstat(self):
+        output = "3\t1\tsrc/a.py\0-\t-\timage.png\0" "0\t0\t\0old name.py\0new name.py\0"
+        self.assertEqual(parse_numstat(output), [
+            FileStat("src/a.py", None, 3, 1),
+            FileStat("image.png", None, None, None),
+            FileStat("new name.py", "old name.py", 0, 0),
+        ])
+
+    def test_changed_lines(self):
+        self.assertEqual(changed_lines(parse_numstat("3\t1\ta\0-\t-\tb\0")), 4)
+
+    def test_file_summary_is_not_part_of_a_patch(self):
+        for expanded in (True, False):
+            line = file_summary(FileStat("diff", None, 1, 2), expanded)
+            self.assertFalse(line.startswith(("diff", "@@", "+++", "---", "+", "-")))
+            self.assertTrue(re_file_summary.match(line))
+
+    def test_file_summary(self):
+        self.assertEqual(file_summary(FileStat("b", "a", 1, 2), False), "▸ a → b (+1 -2)\n")
+        self.assertEqual(file_summary(FileStat("b", None, None, None), True), "▾ b (binary)\n")
+
+    def test_format_diffstat(self):
+        self.assertEqual(
+            format_diffstat([FileStat("a.py", None, 1, 0), FileStat("long.py", None, None, None)]),
+            " a.py    | +1 -0\n"
+            " long.py | binary\n"
+            " 2 files changed, 1 lines changed\n")
+
+    def test_render_collapsed_diff(self):
+        stats = [FileStat("a", None, 1, 0), FileStat("b", None, 0, 1)]
+        text = render_collapsed_diff(stats, {"b"}, False, lambda stat: "patch of {}\n".format(stat.path))
+        self.assertEqual(text, "▸ a (+1 -0)\n▾ b (+0 -1)\npatch of b\n")
@@ -0,0 +1,118 @@
+from GitSavvy.core import commit_search
+from GitSavvy.core.commit_search import CommitSearchIndex
+
+import os
+import tempfile
+import unittest
+
+
+COMMITS = [
+    ("a" * 40, "Jane Doe", "jane@example.com", "100", "Fix crash in blame view",
+     "Signed-off-by: Jane Doe <jane@example.com>\n"),
+    ("b" * 40, "John Roe", "john@example.com", "200", "Add inline blame", ""),
+    ("c" * 40, "Jane Doe", "jane@example.com", "300", "Speed up the graph view", "Fixes #12\n"),
+]
+
+
+class TestCommitSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = CommitSearchIndex()
+        self.index.add_commits(COMMITS)
+
+    def hashes(self, query, limit=100):
+        return [result.long_hash[0] for result in self.index.search(query, limit)]
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.hashes("blame "), ["b", "a"])
+        self.assertEqual(self.hashes("jane blame "), ["a"])
+        self.assertEqual(self.hashes("jane inline "), [])
+
+    def test_last_word_is_a_prefix(self):
+        self.assertEqual(self.hashes("gra"), ["c"])
+        self.assertEqual(self.hashes("gra "), [])
+
+    def test_body_authors_and_trailers(self):
+        self.assertEqual(self.hashes("signed "), ["a"])
+        self.assertEqual(self.hashes("john@example.com "), ["b"])
+        self.assertEqual(self.hashes("12 "), ["c"])
+
+    def test_newest_first_and_limit(self):
+        self.assertEqual(self.hashes("jane "), ["c", "a"])
+        self.assertEqual(self.hashes("jane ", limit=1), ["c"])
+
+    def test_incremental_update(self):
+        self.index.add_commits([
+            ("d" * 40, "John Roe", "john@example.com", "400", "Blame faster", "")])
+        self.assertEqual(self.hashes("blame "), ["d", "b", "a"])
+
+    def test_broad_prefix_falls_back_to_whole_word(self):
+        max_postings = commit_search.MAX_PREFIX_POSTINGS
+        commit_search.MAX_PREFIX_POSTINGS = 1
+        try:
+            self.assertEqual(self.hashes("jane bla"), [])
+            self.assertEqual(self.hashes("jane blame"), ["a"])
+        finally:
+            commit_search.MAX_PREFIX_POSTINGS = max_postings
+
+    def test_empty_query(self):
+        self.assertEqual(self.hashes(""), [])
+        self.assertEqual(self.hashes("  "), [])
+
+
+class TestCommitSearchIndexFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "index.jsonl")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def reload(self):
+        index = CommitSearchIndex(self.path)
+        index.load()
+        return index
+
+    def lines(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def build(self):
+        index = CommitSearchIndex(self.path)
+        index.load()
+        fresh = CommitSearchIndex()
+        fresh.add_commits(COMMITS[:2])
+        index.replace(fresh)
+        index.head = "b" * 40
+        index.save()
+        return index
+
+    def test_updates_are_appended(self):
+        index = self.build()
+        self.assertEqual(len(self.lines()), 3)
+        index.add_commits(COMMITS[2:])
+        index.head = "c" * 40
+        index.save()
+        self.assertEqual(len(self.lines()), 5)
+
+        loaded = self.reload()
+        self.assertEqual(loaded.head, "c" * 40)
+        self.assertEqual([result.long_hash[0] for result in loaded.search("jane ")], ["c", "a"])
+
+    def test_interrupted_update_is_dropped(self):
+        self.build()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('["' + "d" * 40 + '","Lost","X","x@x",400,["lost"]]\n')
+        loaded = self.reload()
+        self.assertEqual(loaded.head, "b" * 40)
+        self.assertEqual(len(loaded.commits), 2)
+        self.assertEqual(loaded.search("lost "), [])
+        # The next save rewrites the file without the dropped commit.
+        loaded.save()
+        self.assertEqual(len(self.lines()), 3)
+
+    def test_file_is_compacted(self):
+        index = self.build()
+        for _ in range(commit_search.MAX_UPDATE_RECORDS):
+            index.save()
+        self.assertEqual(len(self.lines()), 3)
+        self.assertEqual(len(self.reload().commits), 2)
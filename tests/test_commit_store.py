@@ -0,0 +1,48 @@
+from GitSavvy.common import util
+from GitSavvy.core.commit_store import CommitStore
+from GitSavvy.core.git_mixins.history import HistoryMixin
+
+import os
+import tempfile
+import unittest
+
+
+LOG_OUTPUT = (
+    "abc1234\n" + "a" * 40 + "\n\nInitial commit\nAlice\nalice@example.com\n1500000000\n"
+    "Bob\nbob@example.com\n1500000100\x00Initial commit\n\x00\x00\n"
+)
+
+
+class TestCommitStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = CommitStore("/repo")
+        self.store.path = os.path.join(self.tmp_dir.name, "commits.jsonl")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_dates_are_timestamps(self):
+        commit, = HistoryMixin._parse_log(LOG_OUTPUT)
+        self.assertEqual(commit.datetime, "1500000000")
+        self.assertEqual(commit.committer_datetime, "1500000100")
+        self.assertEqual(commit.parents, [])
+
+    def test_add_and_reload(self):
+        commit, = HistoryMixin._parse_log(LOG_OUTPUT)
+        self.store.add([commit])
+
+        reloaded = CommitStore("/repo")
+        reloaded.path = self.store.path
+        self.assertEqual(reloaded.get(commit.long_hash), commit)
+
+    def test_outdated_records_are_dropped(self):
+        commit, = HistoryMixin._parse_log(LOG_OUTPUT)
+        outdated = list(commit._replace(long_hash="b" * 40)) + ["Sat Jul 15 2017"]
+        util.cache.append_json_lines(self.store.path, [outdated, commit])
+
+        self.assertNotIn("b" * 40, self.store)
+        self.assertEqual(self.store.get(commit.long_hash), commit)
+        self.assertEqual(
+            list(util.cache.read_json_lines(self.store.path)), [list(commit)])
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sublime
+from .common import GitRepoTestCase
+from GitSavvy.core import git_command
+from GitSavvy.core.commands.commit import COMMIT_DIFF_REGION
+
+
+class TestCommitViewDiff(GitRepoTestCase, git_command.GitCommand):
+    test_settings = {
+        "show_commit_diff": "full",
+        "show_diffstat": False,
+        "commit_diff_threshold": 5,
+        "commit_on_close": False,
+        "prompt_on_abort_commit": False,
+    }
+
+    def setUp(self):
+        self.settings = sublime.load_settings("GitSavvy.sublime-settings")
+        self.old_settings = {key: self.settings.get(key) for key in self.test_settings}
+        for key, value in self.test_settings.items():
+            self.settings.set(key, value)
+        for name in ("a.txt", "b.txt"):
+            with open(os.path.join(self._temp_dir, name), "w") as f:
+                f.write("1\n2\n3\n4\n5\n")
+        subprocess.check_call(["git", "add", "a.txt", "b.txt"], cwd=self._temp_dir)
+
+    def tearDown(self):
+        for key, value in self.old_settings.items():
+            self.settings.set(key, value)
+        subprocess.check_call(["git", "reset", "-q"], cwd=self._temp_dir)
+        view = getattr(self, "view", None)
+        if view and view.is_valid():
+            view.set_scratch(True)
+            view.close()
+
+    def open_commit_view(self):
+        self.window.run_command("gs_commit", {"repo_path": self._temp_dir})
+        yield lambda: self.window.active_view().settings().get("git_savvy.commit_view")
+        self.view = self.window.active_view()
+        yield lambda: self.has_line("^▸ b.txt")
+
+    def has_line(self, pattern):
+        return not self.view.find(pattern, 0).empty()
+
+    def toggle(self, path):
+        summary = self.view.find("^[▸▾] " + path, 0)
+        self.view.sel().clear()
+        self.view.sel().add(sublime.Region(summary.a))
+        self.view.run_command("gs_commit_view_toggle_file")
+
+    def diff_text(self):
+        return self.view.substr(self.view.get_regions(COMMIT_DIFF_REGION)[0])
+
+    def test_diff_region_spans_the_diff(self):
+        yield from self.open_commit_view()
+        self.assertTrue(self.diff_text().startswith("▸ a.txt"))
+
+    def test_toggle_expands_and_collapses_a_file(self):
+        yield from self.open_commit_view()
+        self.toggle("b.txt")
+        yield lambda: self.has_line("^▾ b.txt")
+        self.assertEqual(len(self.view.find_all("^▸ a.txt")), 1)
+        self.assertIn("\n+5\n", self.diff_text())
+
+        self.toggle("b.txt")
+        yield lambda: self.has_line("^▸ b.txt")
+        self.assertEqual(len(self.view.find_all("^[▸▾] a.txt")), 1)
+        self.assertNotIn("\n+5\n", self.diff_text())
+
+    def test_editing_the_message_keeps_the_diff_in_place(self):
+        yield from self.open_commit_view()
+        self.view.run_command("insert", {"characters": "Message\n\n"})
+        self.toggle("a.txt")
+        yield lambda: self.has_line("^▾ a.txt")
+        self.assertTrue(self.view.substr(self.view.line(0)).startswith("Message"))
+        self.assertTrue(self.diff_text().startswith("▾ a.txt"))
+        self.assertEqual(len(self.view.find_all("^[▸▾] b.txt")), 1)
@@ -0,0 +1,209 @@
+from GitSavvy.common.interwebs import Response
+from GitSavvy.github import github
+
+import threading
+import time
+import unittest
+
+
+LINK_HEADER = (
+    '<https://api.github.com/repositories/1/issues?per_page=100&page=2>; rel="next", '
+    '<https://api.github.com/repositories/1/issues?per_page=100&page=4>; rel="last"')
+
+
+class TestPagination(unittest.TestCase):
+
+    def test_parse_link_header(self):
+        links = github.parse_link_header(LINK_HEADER)
+        self.assertEqual(sorted(links), ["last", "next"])
+        self.assertTrue(links["next"].endswith("page=2"))
+
+    def test_page_urls_from_next_to_last(self):
+        urls = github.get_page_urls(github.parse_link_header(LINK_HEADER))
+        self.assertEqual(urls, [
+            "https://api.github.com/repositories/1/issues?per_page=100&page={}".format(page)
+            for page in (2, 3, 4)])
+
+    def test_no_page_urls_without_last_link(self):
+        links = github.parse_link_header(LINK_HEADER.split(", ")[0])
+        self.assertIsNone(github.get_page_urls(links))
+
+    def test_no_page_urls_for_cursor_links(self):
+        links = {"next": "https://x/issues?after=abc", "last": "https://x/issues?before=def"}
+        self.assertIsNone(github.get_page_urls(links))
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def test_results_are_in_order(self):
+        def slow_square(n):
+            time.sleep(0.01 * (5 - n))
+            return n * n
+        self.assertEqual(list(github.prefetch(slow_square, range(5), 3)), [0, 1, 4, 9, 16])
+
+    def test_concurrency_is_capped(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def work(n):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return n
+
+        self.assertEqual(list(github.prefetch(work, range(10), 2)), list(range(10)))
+        self.assertLessEqual(running[1], 2)
+
+    def test_no_work_is_started_after_close(self):
+        started = []
+        results = github.prefetch(started.append, range(100), 2)
+        next(results)
+        results.close()
+        time.sleep(0.05)
+        self.assertLessEqual(len(started), 3)
+
+
+class TestRateLimit(unittest.TestCase):
+
+    def response(self, status, **headers):
+        return Response({}, {key.replace("_", "-"): value for key, value in headers.items()}, status, True)
+
+    def test_success_is_not_delayed(self):
+        self.assertIsNone(github.get_rate_limit_delay(self.response(200)))
+
+    def test_retry_after(self):
+        self.assertEqual(github.get_rate_limit_delay(self.response(403, Retry_After="5")), 5)
+
+    def test_rate_limit_reset(self):
+        response = self.response(403, **{"x_ratelimit_remaining": "0", "x_ratelimit_reset": "1003"})
+        self.assertEqual(github.get_rate_limit_delay(response, now=1000), 4)
+
+    def test_long_waits_are_not_taken(self):
+        response = self.response(403, X_RateLimit_Remaining="0", X_RateLimit_Reset="5000")
+        self.assertIsNone(github.get_rate_limit_delay(response, now=1000))
+
+    def test_access_denied_is_not_retried(self):
+        self.assertIsNone(github.get_rate_limit_delay(self.response(403, X_RateLimit_Remaining="42")))
+
+    def test_long_waits_are_reported(self):
+        response = self.response(429, Retry_After="600")
+        self.assertIsNone(github.get_rate_limit_delay(response))
+        with self.assertRaisesRegex(github.FailedGithubRequest, "resets in 600 seconds"):
+            github.validate_response(response, show_panel=False)
+
+    def test_backoff_does_not_block_long(self):
+        responses = [self.response(429, Retry_After="600"), self.response(200)]
+        original_get = github.interwebs.get
+        github.interwebs.get = lambda *args, **kwargs: responses.pop(0)
+        try:
+            started = time.time()
+            response = github.get_with_rate_limit_backoff("api.github.com", "/", None)
+        finally:
+            github.interwebs.get = original_get
+        self.assertEqual(response.status, 429)
+        self.assertLess(time.time() - started, 1)
+
+
+PR_NODE = {
+    "number": 7,
+    "title": "Fix it",
+    "url": "https://github.com/owner/repo/pull/7",
+    "createdAt": "2020-01-01T00:00:00Z",
+    "isDraft": False,
+    "mergeable": "MERGEABLE",
+    "reviewDecision": "APPROVED",
+    "author": {"login": "octocat"},
+    "baseRefName": "master",
+    "headRefName": "fix",
+    "headRefOid": "abc123",
+    "headRepository": {"url": "https://github.com/octocat/repo"},
+    "commits": {"nodes": [{"commit": {"statusCheckRollup": {"state": "SUCCESS"}}}]},
+}
+
+
+class TestPullRequestsWithStatus(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = github.GitHubRepo("", "github.com", "owner", "repo", "token")
+        self.original_post = github.interwebs.post
+        self.original_get_pull_requests = github.get_pull_requests
+        github.get_pull_requests = lambda repo: "rest"
+        self.requests = []
+
+    def tearDown(self):
+        github.interwebs.post = self.original_post
+        github.get_pull_requests = self.original_get_pull_requests
+
+    def respond(self, *responses):
+        responses = list(responses)
+
+        def post(fqdn, port, path, **kwargs):
+            self.requests.append((fqdn, path))
+            return responses.pop(0)
+        github.interwebs.post = post
+
+    def page(self, nodes, end_cursor=None):
+        return Response({"data": {"repository": {"pullRequests": {
+            "pageInfo": {"hasNextPage": end_cursor is not None, "endCursor": end_cursor},
+            "nodes": nodes}}}}, {}, 200, True)
+
+    def test_pull_request_in_rest_shape(self):
+        pr = github.pull_request_from_graphql(PR_NODE)
+        self.assertEqual(pr["user"]["login"], "octocat")
+        self.assertEqual(pr["head"], {
+            "ref": "fix", "sha": "abc123", "repo": {"clone_url": "https://github.com/octocat/repo.git"}})
+        self.assertEqual(pr["diff_url"], "https://github.com/owner/repo/pull/7.diff")
+        self.assertEqual((pr["status"], pr["review_decision"]), ("SUCCESS", "APPROVED"))
+
+    def test_pull_request_without_commits_or_fork(self):
+        node = dict(PR_NODE, commits={"nodes": []}, headRepository=None, author=None)
+        pr = github.pull_request_from_graphql(node)
+        self.assertIsNone(pr["status"])
+        self.assertIsNone(pr["head"]["repo"])
+
+    def test_pages_are_followed(self):
+        self.respond(self.page([PR_NODE], "c1"), self.page([dict(PR_NODE, number=6)]))
+        prs = list(github.get_pull_requests_with_status(self.repo))
+        self.assertEqual([pr["number"] for pr in prs], [7, 6])
+        self.assertEqual(self.requests, [("api.github.com", "/graphql")] * 2)
+
+    def test_enterprise_endpoint(self):
+        self.respond(self.page([]))
+        list(github.get_pull_requests_with_status(self.repo._replace(fqdn="git.example.com")))
+        self.assertEqual(self.requests, [("git.example.com", "/api/graphql")])
+
+    def test_rest_fallback_on_errors(self):
+        self.respond(Response({"errors": [{"message": "no"}]}, {}, 200, True))
+        self.assertEqual(github.get_pull_requests_with_status(self.repo), "rest")
+        self.respond(Response(b"Not Found", {}, 404, False))
+        self.assertEqual(github.get_pull_requests_with_status(self.repo), "rest")
+
+    def test_rest_fallback_without_token(self):
+        self.assertEqual(github.get_pull_requests_with_status(self.repo._replace(token=None)), "rest")
+
+    def test_numbers_only_are_queried(self):
+        self.respond(self.page([{"number": 7}], "c1"), self.page([{"number": 6}]))
+        self.assertEqual(github.get_open_pull_request_numbers(self.repo), [7, 6])
+        self.assertEqual(len(self.requests), 2)
+
+    def test_numbers_from_rest_without_token(self):
+        listings = []
+        github.get_pull_requests = lambda repo, **kwargs: listings.append(kwargs) or [{"number": 3}]
+        numbers = github.get_open_pull_request_numbers(self.repo._replace(token=None), show_panel=False)
+        self.assertEqual(numbers, [3])
+        self.assertEqual(listings, [{"show_panel": False, "state": "open"}])
+
+
+class TestKnownGithubHost(unittest.TestCase):
+
+    def test_known_hosts(self):
+        repo = github.GitHubRepo("", "github.com", "owner", "repo", None)
+        self.assertTrue(github.is_known_github_host(repo))
+        self.assertTrue(github.is_known_github_host(repo._replace(fqdn="git.example.com", token="t")))
+        self.assertFalse(github.is_known_github_host(repo._replace(fqdn="gitlab.com")))
+
+    def test_remotes_which_are_no_urls(self):
+        self.assertIsNone(github.parse_remote("/srv/git/repo.git"))
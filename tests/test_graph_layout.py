@@ -0,0 +1,92 @@
+from GitSavvy.common.util.graph_layout import GraphLayout
+
+import unittest
+
+
+def render(commits):
+    layout = GraphLayout()
+    for commit, parents in commits:
+        layout.add(commit, parents)
+    return layout.render(0, len(layout), lambda commit: commit)
+
+
+class TestGraphLayout(unittest.TestCase):
+    def test_linear_history(self):
+        self.assertEqual(
+            render([("c", ["b"]), ("b", ["a"]), ("a", [])]),
+            ["● c", "● b", "● a"])
+
+    def test_merge(self):
+        self.assertEqual(
+            render([
+                ("m", ["b", "f"]),
+                ("f", ["a"]),
+                ("b", ["a"]),
+                ("a", []),
+            ]),
+            [
+                "● m",
+                "|\\",
+                "| ● f",
+                "● | b",
+                "|/",
+                "● a",
+            ])
+
+    def test_two_tips(self):
+        self.assertEqual(
+            render([
+                ("x", ["a"]),
+                ("y", ["b"]),
+                ("b", ["a"]),
+                ("a", []),
+            ]),
+            [
+                "● x",
+                "| ● y",
+                "| ● b",
+                "|/",
+                "● a",
+            ])
+
+    def test_lanes_shift_left(self):
+        self.assertEqual(
+            render([
+                ("x", ["a"]),
+                ("y", ["a"]),
+                ("z", ["a"]),
+                ("a", []),
+            ]),
+            [
+                "● x",
+                "| ● y",
+                "|/",
+                "| ● z",
+                "|/",
+                "● a",
+            ])
+
+    def test_render_window_and_filter(self):
+        layout = GraphLayout()
+        for commit, parents in [("m", ["b", "f"]), ("f", ["a"]), ("b", ["a"]), ("a", [])]:
+            layout.add(commit, parents)
+
+        self.assertEqual(layout.render(2, 4, lambda commit: commit), ["● | b", "|/", "● a"])
+        self.assertEqual(
+            layout.render(0, 4, lambda commit: commit, lambda commit: commit != "f"),
+            ["● m", "|\\", "● | b", "|/", "● a"])
+
+    def test_crossing_edges_do_not_share_a_cell(self):
+        lines = render([
+            ("c0", ["c2", "c6"]),
+            ("c1", ["c4", "c6"]),
+            ("c2", ["c4"]),
+            ("c3", []),
+            ("c4", []),
+            ("c5", ["c6"]),
+            ("c6", ["c7"]),
+            ("c7", []),
+        ])
+        # c2 moves right into the lane of c4 while the lane of c6 moves left;
+        # the latter waits a line instead of overwriting the `\`.
+        self.assertEqual(lines[4:7], ["● | | c2", " \\|/", " /|"])
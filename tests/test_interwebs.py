@@ -0,0 +1,99 @@
+from GitSavvy.common import interwebs
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import gzip
+import json
+import threading
+import unittest
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    payload = json.dumps([{"number": 1}]).encode("utf-8")
+    etag = '"v1"'
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.client_address, dict(self.headers)))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("X-RateLimit-Remaining", "4999")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        payload = self.payload
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if self.path != "/no-etag":
+            self.send_header("ETag", self.etag)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            payload = gzip.compress(payload)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestInterwebs(unittest.TestCase):
+
+    def setUp(self):
+        interwebs.close_connections()
+        interwebs.clear_cache()
+        self.server = HTTPServer(("127.0.0.1", 0), StubApiHandler)
+        self.server.requests = []
+        self.port = self.server.server_address[1]
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def tearDown(self):
+        interwebs.close_connections()
+        interwebs.clear_cache()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, path):
+        return interwebs.get("127.0.0.1", self.port, path)
+
+    def test_gzipped_json_response(self):
+        response = self.get("/issues")
+        self.assertEqual(response.status, 200)
+        self.assertTrue(response.is_json)
+        self.assertEqual(response.payload, [{"number": 1}])
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(self.server.requests[0][2]["Accept-Encoding"], "gzip")
+
+    def test_connection_is_reused(self):
+        for path in ("/no-etag", "/no-etag", "/other"):
+            self.get(path)
+        client_addresses = {address for _, address, _ in self.server.requests}
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(client_addresses), 1)
+
+    def test_not_modified_response_is_served_from_cache(self):
+        first = self.get("/issues")
+        second = self.get("/issues")
+        self.assertEqual(second.status, 200)
+        self.assertEqual(second.payload, first.payload)
+        self.assertEqual(second.headers["X-RateLimit-Remaining"], "4999")
+        self.assertEqual(self.server.requests[1][2]["If-None-Match"], '"v1"')
+
+    def test_cache_is_separate_per_credentials(self):
+        self.get("/issues")
+        interwebs.get("127.0.0.1", self.port, "/issues", auth=("token", "x-oauth-basic"))
+        self.assertNotIn("If-None-Match", self.server.requests[1][2])
+
+    def test_closed_connection_is_replaced(self):
+        self.get("/no-etag")
+        # Drop the kept-alive connection on the server's side.
+        for connection in interwebs.idle_connections[(False, "127.0.0.1", self.port)]:
+            connection.sock.shutdown(2)
+        response = self.get("/no-etag")
+        self.assertEqual(response.payload, [{"number": 1}])
+
+    def test_get_url_keeps_query(self):
+        interwebs.get_url("http://127.0.0.1:{}/issues?page=2".format(self.port))
+        self.assertEqual(self.server.requests[0][0], "/issues?page=2")
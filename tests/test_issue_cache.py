@@ -0,0 +1,105 @@
+from GitSavvy.github import github, issue_cache
+from GitSavvy.github.issue_cache import IssueCache
+
+import unittest
+
+
+def api_issue(number, state="open", updated_at="2020-01-01T00:00:00Z", **extra):
+    issue = {
+        "number": number,
+        "title": "Issue {}".format(number),
+        "state": state,
+        "user": {"login": "octocat"},
+        "created_at": "2020-01-01T00:00:00Z",
+        "updated_at": updated_at,
+    }
+    issue.update(extra)
+    return issue
+
+
+class TestIssueCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = IssueCache("github.com/owner/repo")
+        self.cache.path = None
+        self.cache.issues = {}
+        self.cache.synced_until = None
+        self.cache.is_synced = False
+
+    def test_first_sync_lists_open_issues(self):
+        self.assertEqual(self.cache.get_sync_params(), {"state": "open"})
+
+    def test_later_syncs_ask_for_updates_since_the_latest_one(self):
+        self.cache.update([
+            api_issue(1, updated_at="2020-03-01T00:00:00Z"),
+            api_issue(2, updated_at="2020-02-01T00:00:00Z"),
+        ])
+        self.assertEqual(self.cache.get_sync_params(), {
+            "state": "all", "sort": "updated", "direction": "asc", "since": "2020-03-01T00:00:00Z"})
+
+    def test_update_reports_changes(self):
+        self.assertTrue(self.cache.update([api_issue(1)]))
+        self.assertFalse(self.cache.update([api_issue(1)]))
+        self.assertTrue(self.cache.update([api_issue(1, state="closed", updated_at="2020-01-02T00:00:00Z")]))
+
+    def test_empty_first_sync_counts_as_synced(self):
+        self.assertFalse(self.cache.update([]))
+        self.assertTrue(self.cache.is_synced)
+        self.assertEqual(self.cache.get_sync_params(), {"state": "open"})
+
+    def test_open_issues_newest_first(self):
+        self.cache.update([
+            api_issue(1),
+            api_issue(3, pull_request={}),
+            api_issue(2, state="closed"),
+        ])
+        issues = self.cache.open_issues()
+        self.assertEqual([issue.number for issue in issues], [3, 1])
+        self.assertEqual(issues[0].type, "pull_request")
+        self.assertEqual(issues[1].author, "octocat")
+
+
+class TestFirstSync(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = github.GitHubRepo("", "github.com", "owner", "first-sync", None)
+        self.original_get_issues = github.get_issues
+        self.first_pages = []
+
+    def tearDown(self):
+        github.get_issues = self.original_get_issues
+        issue_cache.caches.clear()
+
+    def sync(self, issue_count):
+        def get_issues(repo, **params):
+            for number in range(1, issue_count + 1):
+                if number == github.GITHUB_PER_PAGE_MAX + 1:
+                    # Before the second page is consumed.
+                    self.assertEqual(len(self.first_pages), 1)
+                yield api_issue(number)
+
+        github.get_issues = get_issues
+        cache = issue_cache.get_issue_cache(self.repo)
+        cache.path = None
+        issue_cache.sync(self.repo, on_first_page=self.first_pages.append)
+        return cache
+
+    def test_first_page_is_passed_on_while_fetching(self):
+        cache = self.sync(github.GITHUB_PER_PAGE_MAX + 50)
+        self.assertEqual(len(self.first_pages), 1)
+        self.assertEqual(
+            [issue.number for issue in self.first_pages[0]],
+            list(range(github.GITHUB_PER_PAGE_MAX, 0, -1)))
+        self.assertEqual(len(cache.open_issues()), github.GITHUB_PER_PAGE_MAX + 50)
+
+    def test_single_page(self):
+        self.sync(3)
+        self.assertEqual(self.first_pages, [])
+
+    def test_later_syncs_do_not_pass_on_pages(self):
+        self.sync(github.GITHUB_PER_PAGE_MAX)
+        self.first_pages = []
+        github.get_issues = lambda repo, **params: iter(
+            [api_issue(number) for number in range(1, github.GITHUB_PER_PAGE_MAX + 1)])
+        issue_cache.sync(self.repo, on_first_page=self.first_pages.append)
+        self.assertEqual(self.first_pages, [])
@@ -0,0 +1,117 @@
+from GitSavvy.core.git_mixins import line_mapping
+from GitSavvy.core.git_mixins.line_mapping import (
+    LineMappingMixin, blob_id, cache_hunks, change_markers, changed_window, composed_hunks,
+    diff_hunks, map_line)
+
+import os
+import subprocess
+import tempfile
+import unittest
+
+
+class GitLineMapping(LineMappingMixin):
+    def __init__(self, repo_path=None):
+        self.repo_path = repo_path
+        self.file_path = os.path.join(repo_path, "file") if repo_path else None
+
+    def get_rel_path(self, file_path):
+        return os.path.relpath(file_path, self.repo_path)
+
+    def git(self, *args, stdin=None, throw_on_stderr=True, decode=True):
+        process = subprocess.Popen(
+            ("git", ) + args, cwd=self.repo_path, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        stdout, _ = process.communicate(stdin.encode() if stdin else None)
+        return stdout.decode() if decode else stdout
+
+
+class TestLineMapping(unittest.TestCase):
+    def setUp(self):
+        line_mapping.hunk_cache.clear()
+        line_mapping.hunk_neighbors.clear()
+
+    def test_blob_id_matches_git(self):
+        # `printf 'hello\n' | git hash-object --stdin`
+        self.assertEqual(blob_id(b"hello\n"), "ce013625030ba8dba906f756967f9e9ca394464a")
+
+    def test_diff_hunks_are_numbered_like_git(self):
+        # Inserting after line 1 is `@@ -1,0 +2 @@` in `git diff -U0`.
+        self.assertEqual(diff_hunks(["a", "b"], ["a", "x", "b"]), ((1, 0, 2, 1), ))
+        # Deleting line 2 is `@@ -2 +1,0 @@`.
+        self.assertEqual(diff_hunks(["a", "b", "c"], ["a", "c"]), ((2, 1, 1, 0), ))
+
+    def test_map_line(self):
+        hunks = diff_hunks(["a", "b", "c", "d"], ["x", "y", "a", "c", "d"])
+        self.assertEqual(map_line(hunks, 1), 3)
+        self.assertEqual(map_line(hunks, 3), 4)
+        self.assertEqual(map_line(hunks, 4), 5)
+
+    def test_change_markers(self):
+        hunks = diff_hunks(["a", "b", "c", "d", "e", "f"], ["a", "new", "b", "C", "d", "f"])
+        self.assertEqual(change_markers(hunks), ([1], [3], [4]))
+        # Removing the first line marks the (new) first line.
+        self.assertEqual(change_markers(diff_hunks(["a", "b"], ["b"])), ([], [], [0]))
+
+    def test_compose_cached_diffs(self):
+        cache_hunks("a", "b", diff_hunks(["1", "2"], ["0", "1", "2"]))
+        cache_hunks("b", "c", diff_hunks(["0", "1", "2"], ["0", "0", "1", "2"]))
+        chain = composed_hunks("a", "c")
+        self.assertEqual(len(chain), 2)
+        line = 2
+        for hunks in chain:
+            line = map_line(hunks, line)
+        self.assertEqual(line, 4)
+
+        # The reverse direction is known as well.
+        line = 4
+        for hunks in composed_hunks("c", "a"):
+            line = map_line(hunks, line)
+        self.assertEqual(line, 2)
+
+    def test_unconnected_blobs(self):
+        cache_hunks("a", "b", ())
+        self.assertIsNone(composed_hunks("a", "z"))
+
+    def test_changed_window(self):
+        self.assertEqual(
+            changed_window(["a", "b", "c", "d"], ["a", "x", "y", "d"]),
+            (1, ["b", "c"], ["x", "y"]))
+        self.assertEqual(changed_window(["a", "a"], ["a", "a", "a"]), (2, [], ["a"]))
+
+    def test_diff_hunks_are_offset_by_the_common_start(self):
+        head = [str(n) for n in range(100)]
+        saved = head[:50] + ["new"] + head[51:]
+        self.assertEqual(diff_hunks(head, saved), ((51, 1, 51, 1), ))
+
+    def test_large_windows_are_diffed_by_git(self):
+        head = ["a", "b", "c", "d", "e", "f"]
+        saved = ["a", "x", "b", "c", "e", "f", "g"]
+        expected = diff_hunks(head, saved)
+        original = line_mapping.MAX_DIFFLIB_COMPARISONS
+        line_mapping.MAX_DIFFLIB_COMPARISONS = 0
+        try:
+            self.assertEqual(GitLineMapping().line_hunks(head, saved), expected)
+        finally:
+            line_mapping.MAX_DIFFLIB_COMPARISONS = original
+
+    def test_working_tree_lines_map_like_committed_ones(self):
+        # difflib and Git pair these lines up differently.
+        committed = "a\nb\na\na\na\nc\n"
+        changed = "c\na\nb\nc\na\nb\n"
+        with tempfile.TemporaryDirectory() as repo_path:
+            repo = GitLineMapping(repo_path)
+            repo.git("init", "-q")
+            with open(repo.file_path, "w") as f:
+                f.write(committed)
+            repo.git("add", "file")
+            repo.git("-c", "user.name=x", "-c", "user.email=x@x", "commit", "-qm", "file")
+            with open(repo.file_path, "w") as f:
+                f.write(changed)
+            changed_blob = repo.git("hash-object", "-w", "file").strip()
+            committed_blob = repo.git("rev-parse", "HEAD:file").strip()
+
+            blob_hunks = repo.blob_hunks(changed_blob, committed_blob)
+            self.assertNotEqual(blob_hunks, diff_hunks(changed.splitlines(), committed.splitlines()))
+            for line in range(1, 7):
+                self.assertEqual(
+                    repo.find_matching_lineno(None, "HEAD", line),
+                    map_line(blob_hunks, line))
@@ -0,0 +1,91 @@
+from GitSavvy.common.util.parse_blame import parse_blame, commit_cache, NOT_COMMITED_HASH
+
+import unittest
+
+
+FIRST = "bbb0470417006821e3edf7ee6a88bec7abe6e7c1"
+SECOND = "d527f0da59c546f19a58c8f163e8a3c4c29ee2bd"
+
+PORCELAIN = """\
+{first} 1 1 1
+author X
+author-mail <x@y>
+author-time 1792359305
+author-tz +0000
+summary first
+boundary
+filename f
+\ta
+{second} 2 2 1
+author Jürgen
+author-mail <j@y>
+author-time 1792359306
+author-tz +0000
+summary second
+previous {first} f
+filename f
+\tBä
+{first} 3 3 1
+\tc
+{uncommitted} 5 4 1
+author Not Committed Yet
+summary Version of f from f
+filename f
+\td
+""".format(first=FIRST, second=SECOND, uncommitted=NOT_COMMITED_HASH).encode("utf-8")
+
+
+class TestParseBlame(unittest.TestCase):
+    def setUp(self):
+        commit_cache.clear()
+
+    def test_lines(self):
+        blamed_lines, _ = parse_blame(PORCELAIN)
+        self.assertEqual(
+            [(line.contents, line.commit_hash, line.orig_lineno, line.final_lineno)
+             for line in blamed_lines],
+            [
+                ("a", FIRST, 1, 1),
+                ("Bä", SECOND, 2, 2),
+                ("c", FIRST, 3, 3),
+                ("d", NOT_COMMITED_HASH, 5, 4),
+            ]
+        )
+
+    def test_commits(self):
+        _, commits = parse_blame(PORCELAIN)
+        self.assertEqual(set(commits), {FIRST, SECOND, NOT_COMMITED_HASH})
+        self.assertEqual(commits[SECOND]["author"], "Jürgen")
+        self.assertEqual(commits[SECOND]["short_hash"], SECOND[:12])
+        self.assertEqual(commits[FIRST]["boundary"], "")
+        self.assertEqual(commits[FIRST]["summary"], "first")
+
+    def test_commit_metadata_is_cached(self):
+        parse_blame(PORCELAIN)
+        self.assertIn(FIRST, commit_cache)
+        self.assertNotIn(NOT_COMMITED_HASH, commit_cache)
+
+        # A later blame only repeats the header line for known commits.
+        _, commits = parse_blame("{} 1 1 1\n\ta\n".format(FIRST).encode("ascii"))
+        self.assertEqual(commits[FIRST]["author"], "X")
+
+    def test_per_file_keys_are_not_cached(self):
+        parse_blame(PORCELAIN)
+        self.assertNotIn("filename", commit_cache[SECOND])
+        self.assertNotIn("previous", commit_cache[SECOND])
+
+        other_file = (
+            "{second} 7 7 1\n"
+            "author Jürgen\n"
+            "summary second\n"
+            "filename g\n"
+            "\tx\n"
+        ).format(second=SECOND).encode("utf-8")
+        _, commits = parse_blame(other_file)
+        self.assertEqual(commits[SECOND]["filename"], "g")
+        self.assertNotIn("previous", commits[SECOND])
+        self.assertEqual(commits[SECOND]["author-mail"], "<j@y>")
+
+        _, commits = parse_blame(PORCELAIN)
+        self.assertEqual(commits[SECOND]["previous"], "{} f".format(FIRST))
+        self.assertEqual(commits[FIRST]["boundary"], "")
@@ -0,0 +1,116 @@
+from GitSavvy.common.util.parse_diff import parse_diff, iter_hunks, build_partial_patch
+
+import io
+import unittest
+
+
+MULTI_FILE_DIFF = """\
+diff --git a/a.txt b/a.txt
+index 1111111..2222222 100644
+--- a/a.txt
++++ b/a.txt
+@@ -1,3 +1,3 @@
+ one
+--- not a header
++++ not a header either
+ three
+diff --git a/b.txt b/b.txt
+new file mode 100644
+index 0000000..3333333
+--- /dev/null
++++ b/b.txt
+@@ -0,0 +1 @@
++new
+\\ No newline at end of file
+"""
+
+
+class TestParseDiff(unittest.TestCase):
+    def test_multi_file_diff(self):
+        hunks = parse_diff(MULTI_FILE_DIFF)
+        self.assertEqual(len(hunks), 2)
+
+        first, second = hunks
+        self.assertEqual(
+            (first.head_start, first.head_length, first.saved_start, first.saved_length),
+            (1, 3, 1, 3))
+        self.assertEqual(first.raw_lines, [
+            "@@ -1,3 +1,3 @@", " one", "--- not a header", "+++ not a header either", " three"])
+        self.assertEqual(
+            [(change.type, change.head_pos, change.saved_pos, change.text)
+             for change in first.changes],
+            [(" ", 1, 1, "one"), ("-", 1, 1, "-- not a header"),
+             ("+", 2, 1, "++ not a header either"), (" ", 2, 2, "three")])
+
+        self.assertEqual(
+            (second.head_start, second.head_length, second.saved_start, second.saved_length),
+            (0, 0, 1, 1))
+        self.assertEqual(second.raw_lines[-1], "\\ No newline at end of file")
+        self.assertEqual([change.raw for change in second.changes], ["+new"])
+
+    def test_zero_context(self):
+        hunks = parse_diff(
+            "diff --git a/f b/f\n--- a/f\n+++ b/f\n"
+            "@@ -2 +2 @@\n-old\n+new\n@@ -9,0 +10,2 @@\n+x\n+y\n")
+        self.assertEqual([hunk.raw_lines for hunk in hunks], [
+            ["@@ -2 +2 @@", "-old", "+new"],
+            ["@@ -9,0 +10,2 @@", "+x", "+y"]])
+
+    def test_hunks_point_into_the_diff(self):
+        hunk = parse_diff(MULTI_FILE_DIFF)[0]
+        self.assertIs(hunk.buffer, MULTI_FILE_DIFF)
+
+    def test_changes_are_computed_once(self):
+        hunk = parse_diff(MULTI_FILE_DIFF)[0]
+        self.assertIs(hunk.changes, hunk.changes)
+
+    def test_line_iterator(self):
+        from_string = parse_diff(MULTI_FILE_DIFF)
+        from_lines = list(iter_hunks(io.StringIO(MULTI_FILE_DIFF)))
+        self.assertEqual(
+            [hunk.raw_lines for hunk in from_lines], [hunk.raw_lines for hunk in from_string])
+        self.assertEqual(
+            [hunk.changes for hunk in from_lines], [hunk.changes for hunk in from_string])
+
+    def test_crlf(self):
+        hunk, = parse_diff("--- a/f\r\n+++ b/f\r\n@@ -1 +1 @@\r\n-a\r\n+b\r\n")
+        self.assertEqual(hunk.raw_lines, ["@@ -1 +1 @@", "-a", "+b"])
+
+    def test_empty(self):
+        self.assertEqual(parse_diff(""), [])
+
+
+ZERO_CONTEXT_DIFF = """\
+--- a/f
++++ b/f
+@@ -1 +1 @@
+-a
++A
+@@ -4 +3,0 @@
+-d
+@@ -5,0 +5,2 @@
++F
++G
+"""
+
+
+class TestBuildPartialPatch(unittest.TestCase):
+    def test_selected_lines(self):
+        hunks = parse_diff(ZERO_CONTEXT_DIFF)
+        patch = build_partial_patch(hunks, {(0, 1), (1, 0), (2, 1)})
+        self.assertEqual(patch, "\n".join([
+            "@@ -1,0 +2,1 @@", "+A",
+            "@@ -4,1 +4,0 @@", "-d",
+            "@@ -5,0 +6,1 @@", "+G",
+        ]))
+
+    def test_reverse(self):
+        hunks = parse_diff(ZERO_CONTEXT_DIFF)
+        patch = build_partial_patch(hunks, {(0, 0), (2, 0)}, reverse=True)
+        self.assertEqual(patch, "\n".join([
+            "@@ -1,1 +0,0 @@", "-a",
+            "@@ -5,0 +5,1 @@", "+F",
+        ]))
+
+    def test_nothing_selected(self):
+        self.assertEqual(build_partial_patch(parse_diff(ZERO_CONTEXT_DIFF), set()), "")
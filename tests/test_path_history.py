@@ -0,0 +1,122 @@
+from GitSavvy.core.git_mixins.history import HistoryMixin
+from GitSavvy.core.path_history import FileCommits, PathHistory
+
+import os
+import subprocess
+import tempfile
+import unittest
+
+
+LOG_OUTPUT = (
+    "\x00d4\x00400\n\nM\tnew.py\n"
+    "\x00c3\x00300\n\nR100\told.py\tnew.py\n"
+    "\x00b2\x00200\n\nM\told.py\n"
+    "\x00a1\x00100\n\nA\told.py\n"
+)
+
+
+class TestPathHistory(unittest.TestCase):
+    def setUp(self):
+        self.history = PathHistory("d4", LOG_OUTPUT)
+
+    def test_lookup_commits_touching_the_file(self):
+        self.assertEqual(self.history.lookup("d4"), "new.py")
+        self.assertEqual(self.history.lookup("c3"), "new.py")
+        self.assertEqual(self.history.lookup("b2"), "old.py")
+
+    def test_lookup_abbreviated_hash(self):
+        history = PathHistory("f" * 40, "\x00" + "ab" * 20 + "\x00100\n\nA\tfile.py\n")
+        self.assertEqual(history.lookup("abab"), "file.py")
+        self.assertIsNone(history.lookup("abac"))
+
+    def test_known_paths_newest_first(self):
+        self.assertEqual(self.history.known_paths, ["new.py", "old.py"])
+
+    def test_path_in_tree(self):
+        trees = {"e5": ["old.py"], "f6": ["new.py", "old.py"], "g7": []}
+        listed = []
+
+        def list_tree(commit_hash, paths):
+            listed.append(commit_hash)
+            return [path for path in trees[commit_hash] if path in paths]
+
+        self.assertEqual(self.history.path_in_tree("e5", list_tree), "old.py")
+        self.assertEqual(self.history.path_in_tree("f6", list_tree), "new.py")
+        self.assertIsNone(self.history.path_in_tree("g7", list_tree))
+        self.assertEqual(self.history.path_in_tree("e5", list_tree), "old.py")
+        self.assertEqual(listed, ["e5", "f6", "g7"])
+
+    def test_merge_commits_without_changes_are_skipped(self):
+        history = PathHistory("m", "\x00m\x00500\n\x00a1\x00100\n\nA\tfile.py\n")
+        self.assertIsNone(history.lookup("m"))
+        self.assertEqual(history.known_paths, ["file.py"])
+
+
+class GitHistory(HistoryMixin):
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.time = 1500000000
+
+    def git(self, *args, throw_on_stderr=True):
+        env = dict(os.environ, GIT_AUTHOR_DATE="{} +0000".format(self.time))
+        env["GIT_COMMITTER_DATE"] = env["GIT_AUTHOR_DATE"]
+        process = subprocess.Popen(
+            ("git", "-c", "user.name=x", "-c", "user.email=x@x") + args,
+            cwd=self.repo_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env)
+        return process.communicate()[0].decode()
+
+    def read_head_commit(self):
+        return self.git("rev-parse", "HEAD").strip()
+
+    def commit(self, time, message):
+        self.time = time
+        self.git("commit", "-qm", message)
+        return self.read_head_commit()
+
+    def write(self, path, content):
+        with open(os.path.join(self.repo_path, path), "w") as f:
+            f.write(content)
+        self.git("add", path)
+
+
+class TestFilenameAtCommit(unittest.TestCase):
+
+    def test_non_linear_history(self):
+        with tempfile.TemporaryDirectory() as repo_path:
+            repo = GitHistory(repo_path)
+            repo.git("init", "-q")
+            repo.write("old.py", "content\n")
+            repo.commit(1500000100, "Add old.py")
+            main = repo.git("rev-parse", "--abbrev-ref", "HEAD").strip()
+            repo.git("checkout", "-qb", "side")
+            repo.git("mv", "old.py", "new.py")
+            repo.commit(1500000200, "Rename on a branch")
+            repo.git("checkout", "-q", main)
+            # Newer than the rename, but without it.
+            repo.write("other.py", "other\n")
+            unrenamed = repo.commit(1500000300, "Unrelated change")
+            repo.time = 1500000400
+            repo.git("merge", "-q", "--no-edit", "side")
+
+            self.assertEqual(repo.filename_at_commit("new.py", unrenamed, follow=True), "old.py")
+            self.assertEqual(repo.filename_at_commit("new.py", "HEAD", follow=True), "new.py")
+
+
+class TestFileCommits(unittest.TestCase):
+    def setUp(self):
+        self.commits = FileCommits("c" * 40, ["c" * 40, "b" * 40, "a" * 40])
+
+    def test_neighbors(self):
+        self.assertEqual(self.commits.older("c" * 40), "b" * 40)
+        self.assertEqual(self.commits.newer("a" * 40), "b" * 40)
+
+    def test_abbreviated_hash(self):
+        self.assertEqual(self.commits.older("bbbbbbb"), "a" * 40)
+
+    def test_no_neighbor(self):
+        self.assertEqual(self.commits.older("a" * 40), "")
+        self.assertEqual(self.commits.newer("c" * 40), "")
+
+    def test_unknown_commit(self):
+        self.assertIsNone(self.commits.older("d" * 40))
+        self.assertIsNone(self.commits.newer("ddddddd"))
@@ -0,0 +1,67 @@
+from GitSavvy.github.commands import pull_request
+from GitSavvy.github.commands.pull_request import PullRequestRefsMixin, pr_refspec
+
+import unittest
+
+
+class FakeRepo(PullRequestRefsMixin):
+    repo_path = "/repo"
+
+    def __init__(self, refs=()):
+        self.refs = list(refs)
+        self.calls = []
+
+    def get_integrated_remote_name(self):
+        return "origin"
+
+    def git(self, *args, stdin=None, throw_on_stderr=True):
+        self.calls.append((args, stdin))
+        if args[0] == "for-each-ref":
+            return "".join(ref + "\n" for ref in self.refs)
+        return ""
+
+    def commands(self, name):
+        return [(args, stdin) for args, stdin in self.calls if args[0] == name]
+
+
+class TestPullRequestRefs(unittest.TestCase):
+
+    def test_pr_refspec(self):
+        self.assertEqual(pr_refspec("origin", 12), "+refs/pull/12/head:refs/remotes/origin/pr/12")
+
+    def test_refspecs_are_fetched_in_batches(self):
+        repo = FakeRepo()
+        repo.fetch_pull_request_heads(range(1, 451))
+        fetches = repo.commands("fetch")
+        self.assertEqual(
+            [len(args) - 3 for args, _ in fetches],
+            [pull_request.PR_REFSPECS_PER_FETCH, pull_request.PR_REFSPECS_PER_FETCH, 50])
+        self.assertEqual(fetches[0][0][:4], ("fetch", "--no-tags", "origin", pr_refspec("origin", 1)))
+        self.assertEqual(fetches[-1][0][-1], pr_refspec("origin", 450))
+
+    def test_stale_refs_are_deleted(self):
+        repo = FakeRepo(["refs/remotes/origin/pr/1", "refs/remotes/origin/pr/2"])
+        repo.fetch_pull_request_heads([2, 3])
+        self.assertEqual(repo.commands("update-ref"), [
+            (("update-ref", "--stdin"), "delete refs/remotes/origin/pr/1\n")])
+
+    def test_remote_branches_are_kept(self):
+        repo = FakeRepo([
+            "refs/remotes/origin/pr/1",
+            "refs/remotes/origin/pr/my-feature",
+            "refs/remotes/origin/pr/fix/12",
+        ])
+        repo.fetch_pull_request_heads([])
+        self.assertEqual(repo.commands("update-ref"), [
+            (("update-ref", "--stdin"), "delete refs/remotes/origin/pr/1\n")])
+
+    def test_nothing_to_delete(self):
+        repo = FakeRepo(["refs/remotes/origin/pr/2"])
+        repo.fetch_pull_request_heads([2])
+        self.assertEqual(repo.commands("update-ref"), [])
+
+    def test_no_open_pull_requests(self):
+        repo = FakeRepo(["refs/remotes/origin/pr/2"])
+        repo.fetch_pull_request_heads([])
+        self.assertEqual(repo.commands("fetch"), [])
+        self.assertEqual(len(repo.commands("update-ref")), 1)
@@ -0,0 +1,29 @@
+from GitSavvy.common.util.file import parse_file_extensions
+
+import unittest
+
+
+class TestParseFileExtensions(unittest.TestCase):
+    def test_block_list(self):
+        syntax = (
+            "name: Python\n"
+            "file_extensions:\n"
+            "  - py\n"
+            "  # Ren'Py\n"
+            "\n"
+            "  - \"rpy\"  # quoted\n"
+            "first_line_match: ^#!.*python\n"
+            "contexts:\n"
+            "  main:\n"
+            "    - match: x\n")
+        self.assertEqual(parse_file_extensions(syntax), ["py", "rpy"])
+
+    def test_unindented_block_list(self):
+        self.assertEqual(parse_file_extensions("file_extensions:\n- a\n- b\nscope: s\n"), ["a", "b"])
+
+    def test_flow_list(self):
+        syntax = "file_extensions: [c++, 'cc', \"cxx\"]  # C++\nscope: source.c++\n"
+        self.assertEqual(parse_file_extensions(syntax), ["c++", "cc", "cxx"])
+
+    def test_no_extensions(self):
+        self.assertEqual(parse_file_extensions("scope: text.git-savvy\nhidden: true\n"), [])